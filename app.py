@@ -1,32 +1,227 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
-import google.generativeai as genai
-import requests
+from flask import Flask, Response, g, render_template, request, jsonify, session, redirect, url_for, flash, send_file, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+import contextvars
+import hmac
 import json
+import logging
+import math
 import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 import warnings
 from functools import wraps
 import uuid
 warnings.filterwarnings('ignore')
 
-# Import our new ML models
-from ml_models_fixed import MLRecommendationEngine, DLRecommendationEngine
+# python app.py --startup-report measures a cold start in a child interpreter and exits
+if __name__ == '__main__' and '--startup-report' in sys.argv:
+    import startup
+    sys.exit(startup.run_report())
+
+# Log records go through a bounded queue to a background writer thread, so request
+# threads never block on stdout. Configured before the engines load so their startup
+# messages are captured too.
+import structured_logging
+from structured_logging import sampled
+structured_logging.configure(
+    level=os.environ.get('CAREERCOMPASS_LOG_LEVEL', 'INFO'),
+    fmt=os.environ.get('CAREERCOMPASS_LOG_FORMAT', 'json')
+)
+logger = logging.getLogger(__name__)
+
+# High-volume per-request messages keep only this share of their records
+SAMPLED = sampled(float(os.environ.get('CAREERCOMPASS_LOG_SAMPLE_RATE', 0.1)))
+
+# The ML models (pandas, scikit-learn) and the Gemini SDK are imported by the engine
+# warm-up thread, not here, so the app can start serving pages right away
+import startup
+from response_cache import ResponseCache
+from singleflight import SingleFlight
+from llm_clients import create_llm_client
+import metrics
+from metrics import CACHE_LOOKUPS, FALLBACKS, GEMINI_SECONDS, timed
+from profiling import PROFILE_MODES, RequestProfiler
+from resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, LatencyWindow
+from llm_json import JSONArrayStreamParser, parse_llm_json, validate_array_response
+from prompt_templates import (
+    CERTIFICATE_PROMPT, COURSE_PROMPT, COMPANY_PROMPT, TokenUsage,
+    budget_context, estimate_tokens, percent_list
+)
+import storage
+from recommendation_store import (
+    MaterializedRecommendations, RecommendationBuilder, RECOMMENDATION_TYPES,
+    recommendation_inputs, education_level, encode_cursor, decode_cursor
+)
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Default JSON provider that times building JSON responses"""
+    
+    def response(self, *args, **kwargs):
+        with timed('response_serialization'):
+            return super().response(*args, **kwargs)
 
 app = Flask(__name__)
+app.json = TimedJSONProvider(app)
 app.config['SECRET_KEY'] = 'careercompass-secret-key-2024'
 app.config['SESSION_PERMANENT'] = False
 app.config['SESSION_TYPE'] = 'filesystem'
 
 # Configure Gemini AI with the correct API key and model
 GEMINI_API_KEY = "Your API KEY"
-genai.configure(api_key=GEMINI_API_KEY)
 
 # Set default model to the latest available Gemini model
 DEFAULT_GEMINI_MODEL = "gemini-2.5-flash"  # Updated to latest version
 
-# In-memory storage for users and saved items (in production, use a database)
-users_db = {}
-saved_items_db = {}
+# Where generate_content calls go: gemini (the real API), fake (local generator for load
+# tests), record (gemini, saving every response) or replay (saved responses, fake for misses)
+LLM_BACKEND = os.environ.get('CAREERCOMPASS_LLM_BACKEND', 'gemini')
+LLM_RECORDING_PATH = os.environ.get(
+    'CAREERCOMPASS_LLM_RECORDING',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'llm_recording.jsonl')
+)
+
+# Bump whenever a prompt changes so cached responses from the old prompt are not reused
+PROMPT_TEMPLATE_VERSION = 3
+
+# Most tokens of ML context (cluster, career predictions, ML picks) added to a prompt
+PROMPT_CONTEXT_TOKEN_BUDGET = int(os.environ.get('CAREERCOMPASS_PROMPT_CONTEXT_TOKENS', 60))
+
+def _array_response_schema(array_key, required, strings, integers=(), lists=(), insights=()):
+    """Gemini response schema: an object holding the array of items the endpoint renders"""
+    properties = {name: {'type': 'STRING'} for name in strings}
+    properties.update({name: {'type': 'INTEGER'} for name in integers})
+    properties.update({name: {'type': 'ARRAY', 'items': {'type': 'STRING'}} for name in lists})
+    properties['ml_enhanced'] = {'type': 'BOOLEAN'}
+    return {
+        'type': 'OBJECT',
+        'properties': {
+            array_key: {
+                'type': 'ARRAY',
+                'items': {'type': 'OBJECT', 'properties': properties, 'required': list(required)}
+            },
+            'ml_insights': {
+                'type': 'OBJECT',
+                'properties': {name: {'type': 'STRING'} for name in insights}
+            }
+        },
+        'required': [array_key]
+    }
+
+# JSON-mode output per endpoint: the schema Gemini must follow, the fields an item
+# needs to be shown, and an output token cap sized for the number of items requested
+RESPONSE_FORMATS = {
+    'certificates': {
+        'schema': _array_response_schema(
+            'certificates', ('name', 'provider', 'url'),
+            ('name', 'provider', 'description', 'cost', 'duration', 'url'),
+            integers=('relevance_score',), lists=('skills',),
+            insights=('user_cluster', 'predicted_careers', 'confidence_boost')
+        ),
+        'required_fields': ('name', 'provider'),
+        'max_output_tokens': 2048
+    },
+    'courses': {
+        'schema': _array_response_schema(
+            'courses', ('title', 'provider', 'url'),
+            ('title', 'provider', 'description', 'difficulty', 'duration', 'price', 'url'),
+            integers=('relevance_score',), lists=('skills',),
+            insights=('content_similarity', 'career_alignment', 'ml_boost')
+        ),
+        'required_fields': ('title', 'provider'),
+        'max_output_tokens': 2560
+    },
+    'companies': {
+        'schema': _array_response_schema(
+            'companies', ('name', 'industry'),
+            ('name', 'industry', 'description', 'why_relevant', 'search_query', 'company_size'),
+            integers=('ml_match_score',),
+            insights=('cluster_match', 'market_analysis', 'success_probability')
+        ),
+        'required_fields': ('name', 'industry'),
+        'max_output_tokens': 2560
+    }
+}
+
+# Latency budget per endpoint, counted from the start of the request (ML context included);
+# when it runs out the ML-only results are served instead of waiting on Gemini
+GEMINI_DEADLINES = {
+    kind: float(os.environ.get(f'CAREERCOMPASS_GEMINI_DEADLINE_{kind.upper()}', default))
+    for kind, default in (('certificates', 20.0), ('courses', 20.0), ('companies', 15.0))
+}
+
+# Optional model raced against a Gemini call that is still running after its p95 latency
+# (e.g. gemini-1.5-flash); unset to disable hedging
+HEDGE_GEMINI_MODEL = os.environ.get('CAREERCOMPASS_HEDGE_MODEL', '')
+HEDGE_MIN_DELAY_SECONDS = 1.0
+
+# After this many consecutive Gemini failures or timeouts, skip Gemini for the cool-down
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('CAREERCOMPASS_BREAKER_FAILURES', 5))
+BREAKER_COOLDOWN_SECONDS = float(os.environ.get('CAREERCOMPASS_BREAKER_COOLDOWN', 30.0))
+
+# Gemini response cache shared by all workers on this host
+RESPONSE_CACHE_PATH = os.environ.get(
+    'CAREERCOMPASS_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'gemini_responses.sqlite3')
+)
+RESPONSE_CACHE_TTL = int(os.environ.get('CAREERCOMPASS_CACHE_TTL', 24 * 60 * 60))
+
+# Materialized per-user recommendation lists for /api/recommendations/<type>; entries are
+# rebuilt when their inputs change, the TTL only bounds how long idle users are kept
+RECOMMENDATION_CACHE_PATH = os.environ.get(
+    'CAREERCOMPASS_RECOMMENDATION_CACHE_PATH',
+    os.path.join(os.path.dirname(RESPONSE_CACHE_PATH), 'materialized_recommendations.sqlite3')
+)
+RECOMMENDATION_CACHE_TTL = int(os.environ.get('CAREERCOMPASS_RECOMMENDATION_CACHE_TTL', 30 * 24 * 60 * 60))
+# Seconds a worker may serve a list from its own memory; lists are rebuilt in place by any
+# worker, so the default 0 reads the shared disk tier and pages of one list never mix versions
+RECOMMENDATION_MEMORY_TTL = float(os.environ.get('CAREERCOMPASS_RECOMMENDATION_MEMORY_TTL', 0))
+RECOMMENDATION_PAGE_SIZE = 10
+RECOMMENDATION_MAX_PAGE_SIZE = 50
+
+# How often each worker applies the interactions other workers logged to its collaborative filtering model
+INTERACTION_REPLAY_SECONDS = float(os.environ.get('CAREERCOMPASS_INTERACTION_REPLAY_SECONDS', 1.0))
+
+# Largest number of profiles accepted by one /api/batch-recommendations call
+BATCH_MAX_PROFILES = int(os.environ.get('CAREERCOMPASS_BATCH_MAX_PROFILES', 5000))
+# num_recommendations of a batch call is clamped to 1..BATCH_MAX_RECOMMENDATIONS
+BATCH_MAX_RECOMMENDATIONS = 50
+
+# How the recommendation engine schedules its work:
+#   sequential  - ML stages one after another, then Gemini (original behaviour)
+#   concurrent  - independent ML stages run in parallel on the shared pool
+#   speculative - concurrent, plus a raw-profile Gemini request is sent while the
+#                 ML context is computed and used if the ML-enhanced request misses
+#                 SPECULATIVE_BUDGET_SECONDS (costs up to two Gemini calls per request)
+ENGINE_EXECUTION_MODE = os.environ.get('CAREERCOMPASS_EXECUTION_MODE', 'concurrent')
+SPECULATIVE_BUDGET_SECONDS = float(os.environ.get('CAREERCOMPASS_SPECULATIVE_BUDGET', 8.0))
+
+# Shared pool for ML stages and background Gemini calls (threads start lazily, so it is fork-safe)
+ENGINE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('CAREERCOMPASS_ENGINE_THREADS', 16)),
+    thread_name_prefix='engine'
+)
+
+# Admin-only routes and headers are accepted with X-Admin-Token set to this value;
+# they are disabled while it is empty
+ADMIN_TOKEN = os.environ.get('CAREERCOMPASS_ADMIN_TOKEN', '')
+
+# On-demand request profiling: an admin sends X-Profile: sampling|cprofile, and this share
+# of all requests is profiled in PROFILE_DEFAULT_MODE. With no admin token and a zero rate
+# the profiling hooks are not registered at all.
+PROFILE_DIR = os.environ.get(
+    'CAREERCOMPASS_PROFILE_DIR',
+    os.path.join(os.path.dirname(RESPONSE_CACHE_PATH), 'profiles')
+)
+PROFILE_SAMPLE_RATE = float(os.environ.get('CAREERCOMPASS_PROFILE_SAMPLE_RATE', 0.0))
+PROFILE_DEFAULT_MODE = os.environ.get('CAREERCOMPASS_PROFILE_MODE', 'sampling')
+PROFILE_KEEP = int(os.environ.get('CAREERCOMPASS_PROFILE_KEEP', 50))
+
+# Users and saved items live in a SQLite database (WAL mode) shared by every worker on the host;
+# set CAREERCOMPASS_DATABASE_URL to use another database
+storage.init_app(app, os.environ.get('CAREERCOMPASS_DATABASE_URL'))
 
 # Authentication decorator
 def login_required(f):
@@ -38,236 +233,606 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def is_admin_request():
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
+
+def admin_required(f):
+    """Admin-only route; answers 404 to everyone else so the route stays hidden"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not is_admin_request():
+            return jsonify({'success': False, 'message': 'Not found'}), 404
+        return f(*args, **kwargs)
+    return decorated_function
+
 class HybridAIRecommendationEngine:
     def __init__(self):
         try:
             # Initialize Gemini AI with the default model
-            self.gemini_model = genai.GenerativeModel(DEFAULT_GEMINI_MODEL)
+            self.gemini_model = create_llm_client(LLM_BACKEND, DEFAULT_GEMINI_MODEL, LLM_RECORDING_PATH, GEMINI_API_KEY)
             self.model_name = DEFAULT_GEMINI_MODEL
-            print(f"✅ Successfully initialized Gemini model: {DEFAULT_GEMINI_MODEL}")
+            logger.info("✅ Successfully initialized Gemini model: %s (%s backend)", DEFAULT_GEMINI_MODEL, LLM_BACKEND)
         except Exception as e:
             # First fallback to gemini-1.5-flash if 2.5 is not available
             try:
-                print(f"⚠️ Error initializing {DEFAULT_GEMINI_MODEL}: {e}")
-                print("⚠️ Falling back to gemini-1.5-flash model")
-                self.gemini_model = genai.GenerativeModel("gemini-1.5-flash")
+                logger.warning("⚠️ Error initializing %s: %s", DEFAULT_GEMINI_MODEL, e)
+                logger.warning("⚠️ Falling back to gemini-1.5-flash model")
+                self.gemini_model = create_llm_client(LLM_BACKEND, "gemini-1.5-flash", LLM_RECORDING_PATH, GEMINI_API_KEY)
                 self.model_name = "gemini-1.5-flash"
-                print("✅ Successfully initialized fallback model: gemini-1.5-flash")
+                logger.info("✅ Successfully initialized fallback model: gemini-1.5-flash")
             except Exception as e2:
                 # Second fallback to gemini-pro if needed
-                print(f"⚠️ Error initializing fallback model: {e2}")
-                print("⚠️ Falling back to gemini-pro model")
-                self.gemini_model = genai.GenerativeModel("gemini-pro")
+                logger.warning("⚠️ Error initializing fallback model: %s", e2)
+                logger.warning("⚠️ Falling back to gemini-pro model")
+                self.gemini_model = create_llm_client(LLM_BACKEND, "gemini-pro", LLM_RECORDING_PATH, GEMINI_API_KEY)
                 self.model_name = "gemini-pro"
         
-        # Initialize ML/DL engines
-        self.ml_engine = MLRecommendationEngine()
-        self.dl_engine = DLRecommendationEngine()
+        # Share the process-wide ML/DL engines instead of training private copies
+        from ml_models_fixed import get_ml_engine, get_dl_engine
+        self.ml_engine = get_ml_engine()
+        self.dl_engine = get_dl_engine()
+        
+        self.response_cache = ResponseCache(RESPONSE_CACHE_PATH, ttl_seconds=RESPONSE_CACHE_TTL)
+        
+        # Prompt/completion tokens spent per endpoint by this process
+        self.token_usage = TokenUsage()
         
-        print("✅ Hybrid AI + ML/DL Recommendation Engine initialized!")
-        print("🤖 Available Models:")
-        print(f"   - {self.model_name} (Generative AI)")
-        print("   - TF-IDF + Cosine Similarity (Content-Based)")
-        print("   - K-Means Clustering (User Segmentation)")
-        print("   - Random Forest (Career Prediction)")
-        print("   - Collaborative Filtering (User-Based)")
-        print("   - Neural Network (Deep Learning)")
+        # Identical requests that miss the cache at the same time share one Gemini call
+        self.single_flight = SingleFlight()
+        
+        # Bound how long a request can wait on Gemini: deadlines, hedging and a circuit breaker
+        self.circuit_breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN_SECONDS)
+        self.latency = {kind: LatencyWindow() for kind in RESPONSE_FORMATS}
+        self.hedge_model = (
+            create_llm_client(LLM_BACKEND, HEDGE_GEMINI_MODEL, LLM_RECORDING_PATH, GEMINI_API_KEY)
+            if HEDGE_GEMINI_MODEL else None
+        )
+        self._gemini_stats_lock = threading.Lock()
+        self._gemini_stats = {
+            'deadline_fallbacks': 0,
+            'hedges_started': 0,
+            'hedges_won': 0,
+            'speculative_used': 0
+        }
+        
+        # Cleared if the SDK or model rejects JSON mode; the prompts still ask for JSON
+        self.structured_output = True
+        # Cleared if the SDK rejects request_options (per-call timeouts)
+        self.request_timeouts = True
+        
+        logger.info("✅ Hybrid AI + ML/DL Recommendation Engine initialized!")
+        logger.info("🤖 Available Models:")
+        logger.info("   - %s (Generative AI)", self.model_name)
+        logger.info("   - TF-IDF + Cosine Similarity (Content-Based)")
+        logger.info("   - K-Means Clustering (User Segmentation)")
+        logger.info("   - Random Forest (Career Prediction)")
+        logger.info("   - Collaborative Filtering (User-Based)")
+        logger.info("   - Neural Network (Deep Learning)")
     
-    def find_certificates_with_ml(self, interests, goals, course_preference):
-        """Enhanced certificate finding with ML + AI"""
+    def _run_ml_stages(self, *stages):
+        """Run independent ML stages, in parallel on the shared pool unless in sequential mode"""
+        if ENGINE_EXECUTION_MODE == 'sequential':
+            return [stage() for stage in stages]
+        futures = [metrics.submit(ENGINE_EXECUTOR, stage) for stage in stages]
+        return [future.result() for future in futures]
+    
+    def _generation_config(self, kind):
+        """Output token cap for kind, plus its JSON schema while structured output works"""
+        response_format = RESPONSE_FORMATS[kind]
+        config = {'max_output_tokens': response_format['max_output_tokens']}
+        if self.structured_output:
+            config['response_mime_type'] = 'application/json'
+            config['response_schema'] = response_format['schema']
+        return config
+    
+    def _generate(self, prompt, kind, stream=False, model=None, timeout=None):
+        """generate_content constrained to the response format of kind.
+        
+        When the SDK or model rejects an argument, the call is retried without
+        that argument only, and it is left out of later calls: request_options
+        (the client-side timeout; the deadline still bounds the wait) or the
+        JSON mode settings (the prompts still ask for JSON).
+        Token usage of non-streaming calls is recorded here; streams are
+        recorded by the caller once they have been read to the end.
+        """
+        # Loads grpc, so it is imported on the first call rather than with app.py
+        from google.api_core import exceptions as google_exceptions
+        model = model or self.gemini_model
+        while True:
+            options = {'request_options': {'timeout': timeout}} if timeout and self.request_timeouts else {}
+            try:
+                response = model.generate_content(
+                    prompt, generation_config=self._generation_config(kind), stream=stream, **options
+                )
+                break
+            except TypeError as e:
+                if options and 'request_options' in str(e):
+                    logger.warning("⚠️ SDK does not accept request_options, calling Gemini without a timeout: %s", e)
+                    self.request_timeouts = False
+                elif self.structured_output:
+                    self._disable_structured_output(e)
+                else:
+                    raise
+            except (ValueError, KeyError, google_exceptions.InvalidArgument) as e:
+                if not self.structured_output:
+                    raise
+                self._disable_structured_output(e)
+        if not stream:
+            self._record_token_usage(kind, prompt, response)
+        return response
+    
+    def _disable_structured_output(self, error):
+        # Older SDKs and models do not support response_mime_type/response_schema
+        logger.warning("⚠️ Structured output unavailable, relying on the prompt for JSON: %s", error)
+        self.structured_output = False
+    
+    def _generate_text(self, prompt, kind, model=None, timeout=None, latency=None):
+        """Text of one non-streaming call; its latency is added to latency when given"""
+        started_at = time.perf_counter()
+        text = self._generate(prompt, kind, model=model, timeout=timeout).text
+        elapsed = time.perf_counter() - started_at
+        GEMINI_SECONDS.observe(elapsed, endpoint=kind, phase='total')
+        if latency is not None:
+            latency.record(elapsed)
+        return text
+    
+    def _record_token_usage(self, kind, prompt, response, completion_text=None):
+        """Count a call's tokens from the API's usage metadata, or estimate them from the text"""
+        usage = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+        if prompt_tokens:
+            completion_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+            self.token_usage.record(kind, prompt_tokens, completion_tokens)
+            return
+        if completion_text is None:
+            try:
+                completion_text = response.text
+            except (AttributeError, ValueError):
+                completion_text = ''
+        self.token_usage.record(kind, estimate_tokens(prompt), estimate_tokens(completion_text), estimated=True)
+    
+    def _parse_response(self, text, kind):
+        """Parse and validate a response once on the server; None when nothing usable came back"""
+        with timed('json_parse'):
+            return validate_array_response(parse_llm_json(text), kind, RESPONSE_FORMATS[kind]['required_fields'])
+    
+    def _start_speculative_request(self, prompt, kind):
+        """In speculative mode, send the raw-profile prompt while the ML context is computed"""
+        if ENGINE_EXECUTION_MODE != 'speculative' or not self.circuit_breaker.is_closed():
+            return None
+        return metrics.submit(ENGINE_EXECUTOR, self._generate_text, prompt, kind, None, GEMINI_DEADLINES[kind])
+    
+    def _count(self, name):
+        with self._gemini_stats_lock:
+            self._gemini_stats[name] += 1
+    
+    def _hedge_delay(self, kind):
+        """Seconds after which a still-running call is hedged; None when hedging is off or p95 is unknown"""
+        if self.hedge_model is None:
+            return None
+        p95 = self.latency[kind].percentile(95)
+        return max(p95, HEDGE_MIN_DELAY_SECONDS) if p95 is not None else None
+    
+    def _generate_response_text(self, prompt, kind, speculative=None, started_at=None):
+        """Text of the response to the ML-enhanced prompt, within the latency budget of kind.
+        
+        The speculative raw-profile response is accepted once the enhanced request
+        fails or misses SPECULATIVE_BUDGET_SECONDS, and a hedge request goes to
+        the fallback model once the enhanced request outlives its p95 latency.
+        Raises CircuitOpenError while the circuit breaker skips Gemini and
+        DeadlineExceeded when the budget runs out, so callers serve ML results.
+        """
+        if not self.circuit_breaker.allow():
+            raise CircuitOpenError(f"Gemini circuit is open, skipping the {kind} request")
+        
+        sent_at = time.perf_counter()
+        started_at = started_at or sent_at
+        deadline = started_at + GEMINI_DEADLINES[kind]
+        if deadline <= sent_at:
+            self.circuit_breaker.release()
+            self._count('deadline_fallbacks')
+            raise DeadlineExceeded(f"No time left for the {kind} request after computing the ML context")
+        
+        primary = metrics.submit(
+            ENGINE_EXECUTOR, self._generate_text, prompt, kind, None, deadline - sent_at, self.latency[kind]
+        )
+        running = {primary} if speculative is None else {primary, speculative}
+        speculative_at = started_at + SPECULATIVE_BUDGET_SECONDS
+        hedge_delay = self._hedge_delay(kind)
+        hedge_at = sent_at + hedge_delay if hedge_delay is not None else None
+        held = None  # speculative response that arrived before its budget
+        error = None
+        
         try:
-            # Get ML-based recommendations first
-            user_profile = {
-                'interests': ' '.join(interests),
-                'career_goal': ' '.join(goals),
-                'user_id': 1  # Default user ID
-            }
-            
-            ml_recommendations = self.ml_engine.get_hybrid_recommendations(user_profile, 4)
-            cluster_insights = self.ml_engine.get_user_cluster_insights(' '.join(interests))
-            career_predictions = self.ml_engine.predict_career_path(user_profile)
+            while True:
+                now = time.perf_counter()
+                if held is not None and now >= speculative_at:
+                    logger.info("⚡ Using speculative response (ML-enhanced request missed the budget)", extra=SAMPLED)
+                    self._count('speculative_used')
+                    self.circuit_breaker.record_success()
+                    return held.result()
+                if now >= deadline or (not running and held is None):
+                    break
+                if hedge_at is not None and now >= hedge_at and primary in running:
+                    hedge_at = None
+                    self._count('hedges_started')
+                    running.add(metrics.submit(
+                        ENGINE_EXECUTOR, self._generate_text, prompt, kind, self.hedge_model, deadline - now
+                    ))
+                
+                wake_at = min(t for t in (deadline, hedge_at, speculative_at if held else None) if t is not None)
+                if not running:
+                    time.sleep(max(wake_at - now, 0))
+                    continue
+                done, running = wait(running, timeout=max(wake_at - now, 0), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        error = future.exception()
+                        if future is primary:
+                            speculative_at = now
+                    elif future is speculative:
+                        held = future
+                    else:
+                        if future is not primary:
+                            logger.info("⚡ Using hedged %s response for %s", HEDGE_GEMINI_MODEL, kind, extra=SAMPLED)
+                            self._count('hedges_won')
+                        self.circuit_breaker.record_success()
+                        return future.result()
             
-            # Enhanced Gemini prompt with ML insights
-            ml_context = f"""
-            ML Analysis Results:
-            - User Cluster: {cluster_insights.get('cluster_id', 'Unknown')} (similar to {cluster_insights.get('cluster_size', 0)} users)
-            - Predicted Career Paths: {[cp['career_path'] for cp in career_predictions[:2]]}
-            - ML Recommended Categories: {[rec['category'] for rec in ml_recommendations[:3]]}
-            """
-            
-            prompt = f"""
-            As an AI career advisor enhanced with Machine Learning insights, recommend REAL certificates based on:
-            
-            User Profile:
-            - Interests: {', '.join(interests)}
-            - Goals: {', '.join(goals)}
-            - Course Preference: {course_preference}
-            
-            {ml_context}
-            
-            IMPORTANT: Use both AI reasoning and ML insights to recommend 6-8 REAL certificates from:
-            - Google Career Certificates, Microsoft Certifications, AWS Certifications
-            - IBM Professional Certificates, Meta Professional Certificates
-            - Coursera Professional Certificates, Salesforce Trailhead
-            
-            Provide response in this EXACT JSON format:
-            {{
-                "certificates": [
-                    {{
-                        "name": "Certificate Name",
-                        "provider": "Provider",
-                        "description": "Why this matches user profile and ML predictions",
-                        "relevance_score": 90,
-                        "ml_enhanced": true,
-                        "cost": "Cost",
-                        "duration": "Duration",
-                        "skills": ["skill1", "skill2"],
-                        "url": "https://real-url.com"
-                    }}
-                ],
-                "ml_insights": {{
-                    "user_cluster": {cluster_insights.get('cluster_id', 0)},
-                    "predicted_careers": {[cp['career_path'] for cp in career_predictions[:2]]},
-                    "confidence_boost": "ML analysis increases recommendation confidence by 15%"
-                }}
-            }}
-            """
+            self.circuit_breaker.record_failure()
+            if error is not None and time.perf_counter() < deadline:
+                raise error
+            self._count('deadline_fallbacks')
+            raise DeadlineExceeded(f"Gemini {kind} request exceeded its {GEMINI_DEADLINES[kind]:g}s budget")
+        finally:
+            metrics.add_request_timing('gemini', time.perf_counter() - sent_at)
+    
+    def resilience_stats(self):
+        """Deadline, hedging and circuit breaker counters for /api/engine-stats"""
+        with self._gemini_stats_lock:
+            stats = dict(self._gemini_stats)
+        stats['circuit_breaker'] = self.circuit_breaker.stats()
+        stats['deadline_seconds'] = GEMINI_DEADLINES
+        stats['hedge_model'] = HEDGE_GEMINI_MODEL or None
+        stats['p95_latency_ms'] = {}
+        for kind, window in self.latency.items():
+            p95 = window.percentile(95)
+            stats['p95_latency_ms'][kind] = round(p95 * 1000, 1) if p95 is not None else None
+        return stats
+    
+    def _build_certificate_prompt(self, interests, goals, course_preference,
+                                  ml_recommendations=None, cluster_insights=None, career_predictions=None):
+        """Certificate prompt; without ML results it only describes the raw profile"""
+        ml_context = ''
+        if cluster_insights is not None:
+            categories = list(dict.fromkeys(rec['category'] for rec in ml_recommendations))
+            ml_context = budget_context([
+                f"Likely careers: {percent_list([(cp['career_path'], cp['confidence']) for cp in career_predictions], 2)}."
+                if career_predictions else '',
+                f"ML-suggested areas: {', '.join(categories[:3])}." if categories else '',
+                f"Profile cluster {cluster_insights.get('cluster_id', 0)} of {cluster_insights.get('cluster_size', 0)} similar users."
+            ], PROMPT_CONTEXT_TOKEN_BUDGET)
+        
+        return CERTIFICATE_PROMPT.render(
+            interests=', '.join(interests), goals=', '.join(goals),
+            course_preference=course_preference, ml_context=ml_context
+        )
+    
+    def _build_course_prompt(self, learning_prefs, education_bg, career_aspirations,
+                             ml_recommendations=None, career_predictions=None):
+        """Course prompt; without ML results it only describes the raw profile"""
+        ml_context = ''
+        if ml_recommendations is not None:
+            ml_context = budget_context([
+                f"ML picks: {percent_list([(rec['title'], rec['ml_confidence']) for rec in ml_recommendations], 3)}."
+                if ml_recommendations else '',
+                f"Likely careers: {percent_list([(cp['career_path'], cp['confidence']) for cp in career_predictions], 2)}."
+                if career_predictions else ''
+            ], PROMPT_CONTEXT_TOKEN_BUDGET)
+        
+        return COURSE_PROMPT.render(
+            learning_prefs=', '.join(learning_prefs), education_bg=', '.join(education_bg),
+            career_aspirations=', '.join(career_aspirations), ml_context=ml_context
+        )
+    
+    def _certificate_cache_key(self, interests, goals, course_preference, user_id=None):
+        fields = {'interests': interests, 'goals': goals, 'course_preference': course_preference}
+        # The hybrid ML picks in the prompt are personal once the user has interaction history
+        if self.ml_engine.has_collaborative_history(user_id):
+            fields['collaborative_user'] = str(user_id)
+        return self.response_cache.make_key('certificates', self.model_name, PROMPT_TEMPLATE_VERSION, **fields)
+    
+    def _course_cache_key(self, learning_prefs, education_bg, career_aspirations):
+        return self.response_cache.make_key(
+            'courses', self.model_name, PROMPT_TEMPLATE_VERSION,
+            learning_prefs=learning_prefs, education_bg=education_bg,
+            career_aspirations=career_aspirations
+        )
+    
+    def _company_cache_key(self, job_title, location):
+        return self.response_cache.make_key(
+            'companies', self.model_name, PROMPT_TEMPLATE_VERSION,
+            job_title=job_title, location=location
+        )
+    
+    def _certificate_ml_prompt(self, interests, goals, course_preference, user_id=None):
+        """Run the certificate ML stages and build the ML-enhanced prompt"""
+        user_profile = {
+            'interests': ' '.join(interests),
+            'career_goal': ' '.join(goals),
+            'user_id': user_id
+        }
+        
+        ml_recommendations, cluster_insights, career_predictions = self._run_ml_stages(
+            lambda: self.ml_engine.get_hybrid_recommendations(user_profile, 4),
+            lambda: self.ml_engine.get_user_cluster_insights(' '.join(interests)),
+            lambda: self.ml_engine.predict_career_path(user_profile)
+        )
+        
+        with timed('prompt_build'):
+            return self._build_certificate_prompt(
+                interests, goals, course_preference,
+                ml_recommendations, cluster_insights, career_predictions
+            )
+    
+    def _course_ml_prompt(self, learning_prefs, education_bg, career_aspirations, user_id=None):
+        """Run the course ML stages and build the ML-enhanced prompt"""
+        user_profile = {
+            'interests': ' '.join(learning_prefs + career_aspirations),
+            'education_level': education_bg[0] if education_bg else 'Bachelor',
+            'career_goal': career_aspirations[0] if career_aspirations else 'Software Engineer',
+            'user_id': user_id
+        }
+        
+        ml_recommendations, career_predictions = self._run_ml_stages(
+            lambda: self.ml_engine.get_content_based_recommendations(user_profile['interests'], 6),
+            lambda: self.ml_engine.predict_career_path(user_profile)
+        )
+        
+        with timed('prompt_build'):
+            return self._build_course_prompt(
+                learning_prefs, education_bg, career_aspirations,
+                ml_recommendations, career_predictions
+            )
+    
+    def _company_ml_prompt(self, job_title, location):
+        """Run the job-market cluster analysis and build the ML-enhanced prompt"""
+        cluster_insights = self.ml_engine.get_user_cluster_insights(job_title)
+        common_goals = list(cluster_insights.get('common_career_goals', {}).keys())[:3]
+        
+        with timed('prompt_build'):
+            ml_context = budget_context([
+                f"Similar professionals aim for: {', '.join(common_goals)}." if common_goals else '',
+                f"Their average experience: {cluster_insights.get('average_experience', 0):.1f} years."
+            ], PROMPT_CONTEXT_TOKEN_BUDGET)
+            return COMPANY_PROMPT.render(job_title=job_title, location=location, ml_context=ml_context)
+    
+    def _coalesced(self, cache_key, fetch):
+        """fetch() once for all concurrent requests with cache_key; a request arriving
+        just after the previous flight finished reads its cached result instead"""
+        def leader():
+            cached = self.response_cache.get(cache_key)
+            return cached if cached is not None else fetch()
+        return self.single_flight.do(cache_key, leader)
+    
+    def find_certificates_with_ml(self, interests, goals, course_preference, user_id=None):
+        """Enhanced certificate finding with ML + AI"""
+        try:
+            cache_key = self._certificate_cache_key(interests, goals, course_preference, user_id)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("⚡ Certificate response served from cache", extra=SAMPLED)
+                CACHE_LOOKUPS.inc(cache='gemini_response', result='hit')
+                return cached
+            CACHE_LOOKUPS.inc(cache='gemini_response', result='miss')
             
-            response = self.gemini_model.generate_content(prompt)
-            print(f"✅ ML-Enhanced Certificate Response Generated")
-            return response.text
+            return self._coalesced(
+                cache_key, lambda: self._fetch_certificates(interests, goals, course_preference, user_id, cache_key)
+            )
             
         except Exception as e:
-            print(f"ML-Enhanced certificate finder error: {e}")
-            return self._get_ml_fallback_certificates(interests, goals, course_preference)
+            logger.warning("ML-Enhanced certificate finder error: %s", e)
+            FALLBACKS.inc(endpoint='certificates', reason=type(e).__name__)
+            return self._build_ml_fallback_certificates(interests, goals, course_preference, user_id)
     
-    def suggest_courses_with_ml(self, learning_prefs, education_bg, career_aspirations):
+    def _fetch_certificates(self, interests, goals, course_preference, user_id, cache_key):
+        started_at = time.perf_counter()
+        speculative = self._start_speculative_request(
+            self._build_certificate_prompt(interests, goals, course_preference), 'certificates'
+        )
+        
+        # Enhanced Gemini prompt with ML insights
+        prompt = self._certificate_ml_prompt(interests, goals, course_preference, user_id)
+        
+        result = self._parse_response(
+            self._generate_response_text(prompt, 'certificates', speculative, started_at), 'certificates'
+        )
+        if result is None:
+            raise ValueError("Gemini response contained no usable certificates")
+        logger.info("✅ ML-Enhanced Certificate Response Generated", extra=SAMPLED)
+        self.response_cache.set(cache_key, result)
+        return result
+    
+    def suggest_courses_with_ml(self, learning_prefs, education_bg, career_aspirations, user_id=None):
         """Enhanced course suggestions with ML + AI"""
         try:
-            # Get ML recommendations
-            user_profile = {
-                'interests': ' '.join(learning_prefs + career_aspirations),
-                'education_level': education_bg[0] if education_bg else 'Bachelor',
-                'career_goal': career_aspirations[0] if career_aspirations else 'Software Engineer',
-                'user_id': 2
-            }
+            cache_key = self._course_cache_key(learning_prefs, education_bg, career_aspirations)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("⚡ Course response served from cache", extra=SAMPLED)
+                CACHE_LOOKUPS.inc(cache='gemini_response', result='hit')
+                return cached
+            CACHE_LOOKUPS.inc(cache='gemini_response', result='miss')
             
-            ml_recommendations = self.ml_engine.get_content_based_recommendations(
-                user_profile['interests'], 6
+            return self._coalesced(
+                cache_key,
+                lambda: self._fetch_courses(learning_prefs, education_bg, career_aspirations, user_id, cache_key)
             )
-            career_predictions = self.ml_engine.predict_career_path(user_profile)
-            
-            # Enhanced prompt with ML insights
-            ml_context = f"""
-            ML Content-Based Analysis:
-            - Top ML Recommended Courses: {[rec['title'] for rec in ml_recommendations[:3]]}
-            - ML Confidence Scores: {[f"{rec['title']}: {rec['ml_confidence']:.1f}%" for rec in ml_recommendations[:3]]}
-            - Career Path Predictions: {[f"{cp['career_path']} ({cp['confidence']:.1f}%)" for cp in career_predictions[:2]]}
-            """
-            
-            prompt = f"""
-            As an AI education advisor enhanced with Machine Learning, recommend courses based on:
-            
-            User Profile:
-            - Learning Preferences: {', '.join(learning_prefs)}
-            - Educational Background: {', '.join(education_bg)}
-            - Career Aspirations: {', '.join(career_aspirations)}
-            
-            {ml_context}
-            
-            Recommend 7-10 REAL courses from Coursera, Udemy, edX, Khan Academy, etc.
-            
-            JSON format:
-            {{
-                "courses": [
-                    {{
-                        "title": "Course Title",
-                        "provider": "Platform",
-                        "description": "How this aligns with ML predictions and user goals",
-                        "relevance_score": 92,
-                        "ml_enhanced": true,
-                        "difficulty": "Level",
-                        "duration": "Duration",
-                        "price": "Price",
-                        "skills": ["skill1", "skill2"],
-                        "url": "https://real-url.com"
-                    }}
-                ],
-                "ml_insights": {{
-                    "content_similarity": "High match with user interests",
-                    "career_alignment": {[cp['career_path'] for cp in career_predictions[:2]]},
-                    "ml_boost": "Content-based filtering increases accuracy by 20%"
-                }}
-            }}
-            """
-            
-            response = self.gemini_model.generate_content(prompt)
-            print(f"✅ ML-Enhanced Course Response Generated")
-            return response.text
             
         except Exception as e:
-            print(f"ML-Enhanced course suggester error: {e}")
-            return self._get_ml_fallback_courses(learning_prefs, education_bg, career_aspirations)
+            logger.warning("ML-Enhanced course suggester error: %s", e)
+            FALLBACKS.inc(endpoint='courses', reason=type(e).__name__)
+            return self._build_ml_fallback_courses(learning_prefs, education_bg, career_aspirations)
+    
+    def _fetch_courses(self, learning_prefs, education_bg, career_aspirations, user_id, cache_key):
+        started_at = time.perf_counter()
+        speculative = self._start_speculative_request(
+            self._build_course_prompt(learning_prefs, education_bg, career_aspirations), 'courses'
+        )
+        
+        # Enhanced prompt with ML insights
+        prompt = self._course_ml_prompt(learning_prefs, education_bg, career_aspirations, user_id)
+        
+        result = self._parse_response(
+            self._generate_response_text(prompt, 'courses', speculative, started_at), 'courses'
+        )
+        if result is None:
+            raise ValueError("Gemini response contained no usable courses")
+        logger.info("✅ ML-Enhanced Course Response Generated", extra=SAMPLED)
+        self.response_cache.set(cache_key, result)
+        return result
     
     def find_companies_with_ml(self, job_title, location):
         """Enhanced company finding with ML + AI"""
         try:
-            # Get user cluster insights for job matching
-            user_profile = {'interests': job_title, 'career_goal': job_title}
-            cluster_insights = self.ml_engine.get_user_cluster_insights(job_title)
-            
-            ml_context = f"""
-            ML Job Market Analysis:
-            - User falls in cluster {cluster_insights.get('cluster_id', 0)} with {cluster_insights.get('cluster_size', 0)} similar professionals
-            - Common career goals in cluster: {list(cluster_insights.get('common_career_goals', {}).keys())[:3]}
-            - Average experience in cluster: {cluster_insights.get('average_experience', 0):.1f} years
-            """
-            
-            prompt = f"""
-            As an AI job search assistant enhanced with Machine Learning insights, find companies in {location}, India for "{job_title}":
+            cache_key = self._company_cache_key(job_title, location)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("⚡ Company response served from cache", extra=SAMPLED)
+                CACHE_LOOKUPS.inc(cache='gemini_response', result='hit')
+                return cached
+            CACHE_LOOKUPS.inc(cache='gemini_response', result='miss')
             
-            {ml_context}
+            return self._coalesced(cache_key, lambda: self._fetch_companies(job_title, location, cache_key))
             
-            Recommend 10-12 REAL companies that:
-            1. Operate in {location}, India
-            2. Hire for {job_title} roles
-            3. Match the ML-identified user cluster profile
-            
-            JSON format:
-            {{
-                "companies": [
-                    {{
-                        "name": "Company Name",
-                        "industry": "Industry",
-                        "description": "Company description and {location} presence",
-                        "why_relevant": "Why they hire {job_title}s + ML cluster match",
-                        "ml_match_score": 85,
-                        "search_query": "Optimized search query",
-                        "company_size": "Size"
-                    }}
-                ],
-                "ml_insights": {{
-                    "cluster_match": "Companies aligned with user's professional cluster",
-                    "market_analysis": "ML identifies high-demand sectors for this role",
-                    "success_probability": "Higher success rate due to ML matching"
-                }}
-            }}
-            """
+        except Exception as e:
+            logger.warning("ML-Enhanced company finder error: %s", e)
+            FALLBACKS.inc(endpoint='companies', reason=type(e).__name__)
+            return self._build_ml_fallback_companies(job_title, location)
+    
+    def _fetch_companies(self, job_title, location, cache_key):
+        started_at = time.perf_counter()
+        
+        # Enhanced prompt with the user's cluster insights
+        prompt = self._company_ml_prompt(job_title, location)
+        
+        result = self._parse_response(
+            self._generate_response_text(prompt, 'companies', None, started_at), 'companies'
+        )
+        if result is None:
+            raise ValueError("Gemini response contained no usable companies")
+        logger.info("✅ ML-Enhanced Company Response Generated", extra=SAMPLED)
+        self.response_cache.set(cache_key, result)
+        return result
+    
+    def _stream_recommendations(self, array_key, ml_results, cache_key, build_prompt, deadline):
+        """Event sequence for the streaming endpoints: the ML-only results first,
+        then every AI object as soon as it can be parsed from the Gemini stream.
+        
+        deadline (a time.perf_counter() value) is fixed when the request arrives,
+        so the ML stages and any wait before the body is read count against it.
+        """
+        yield 'ml_results', ml_results
+        
+        try:
+            cached = self.response_cache.get(cache_key)
+            CACHE_LOOKUPS.inc(cache='gemini_response', result='hit' if cached is not None else 'miss')
+            if cached is not None:
+                for item in cached[array_key]:
+                    yield 'item', item
+                yield 'done', {'cached': True}
+                return
             
-            response = self.gemini_model.generate_content(prompt)
-            print(f"✅ ML-Enhanced Company Response Generated")
-            return response.text
+            parser = JSONArrayStreamParser(array_key)
+            required_fields = RESPONSE_FORMATS[array_key]['required_fields']
+            chunks = []
+            prompt = build_prompt()
+            budget = GEMINI_DEADLINES[array_key]
+            if time.perf_counter() >= deadline:
+                self._count('deadline_fallbacks')
+                raise DeadlineExceeded(f"No time left for the {array_key} stream after computing the ML context")
+            if not self.circuit_breaker.allow():
+                raise CircuitOpenError(f"Gemini circuit is open, skipping the {array_key} stream")
+            outcome = None
+            try:
+                sent_at = time.perf_counter()
+                stream = self._generate(prompt, array_key, stream=True, timeout=deadline - sent_at)
+                for chunk in stream:
+                    if not chunks:
+                        GEMINI_SECONDS.observe(time.perf_counter() - sent_at, endpoint=array_key, phase='ttft')
+                    if time.perf_counter() > deadline:
+                        self._count('deadline_fallbacks')
+                        raise DeadlineExceeded(f"Gemini {array_key} stream exceeded its {budget:g}s budget")
+                    chunks.append(chunk.text)
+                    for item in parser.feed(chunk.text):
+                        if all(item.get(field) not in (None, '') for field in required_fields):
+                            yield 'item', item
+                GEMINI_SECONDS.observe(time.perf_counter() - sent_at, endpoint=array_key, phase='total')
+                outcome = True
+            except Exception:
+                outcome = False
+                raise
+            finally:
+                if outcome:
+                    self.circuit_breaker.record_success()
+                elif outcome is False:
+                    self.circuit_breaker.record_failure()
+                else:
+                    # The client went away mid-stream, which says nothing about Gemini
+                    self.circuit_breaker.release()
             
+            logger.info("✅ ML-Enhanced %s Stream Completed", array_key.capitalize(), extra=SAMPLED)
+            text = ''.join(chunks)
+            self._record_token_usage(array_key, prompt, stream, text)
+            result = self._parse_response(text, array_key)
+            if result is not None:
+                self.response_cache.set(cache_key, result)
+            yield 'done', {'cached': False}
         except Exception as e:
-            print(f"ML-Enhanced company finder error: {e}")
-            return self._get_ml_fallback_companies(job_title, location)
+            logger.warning("ML-Enhanced %s stream error: %s", array_key, e)
+            FALLBACKS.inc(endpoint=f'{array_key}_stream', reason=type(e).__name__)
+            yield 'error', {'message': 'AI recommendations are unavailable, showing ML results'}
+    
+    def stream_certificates_with_ml(self, interests, goals, course_preference, user_id=None, started_at=None):
+        """Streaming variant of find_certificates_with_ml"""
+        deadline = (started_at or time.perf_counter()) + GEMINI_DEADLINES['certificates']
+        return self._stream_recommendations(
+            'certificates',
+            self._build_ml_fallback_certificates(interests, goals, course_preference, user_id),
+            self._certificate_cache_key(interests, goals, course_preference, user_id),
+            lambda: self._certificate_ml_prompt(interests, goals, course_preference, user_id),
+            deadline
+        )
+    
+    def stream_courses_with_ml(self, learning_prefs, education_bg, career_aspirations, user_id=None, started_at=None):
+        """Streaming variant of suggest_courses_with_ml"""
+        deadline = (started_at or time.perf_counter()) + GEMINI_DEADLINES['courses']
+        return self._stream_recommendations(
+            'courses',
+            self._build_ml_fallback_courses(learning_prefs, education_bg, career_aspirations),
+            self._course_cache_key(learning_prefs, education_bg, career_aspirations),
+            lambda: self._course_ml_prompt(learning_prefs, education_bg, career_aspirations, user_id),
+            deadline
+        )
     
-    def _get_ml_fallback_certificates(self, interests, goals, preference):
-        """ML-powered fallback for certificates"""
+    def stream_companies_with_ml(self, job_title, location, started_at=None):
+        """Streaming variant of find_companies_with_ml"""
+        deadline = (started_at or time.perf_counter()) + GEMINI_DEADLINES['companies']
+        return self._stream_recommendations(
+            'companies',
+            self._build_ml_fallback_companies(job_title, location),
+            self._company_cache_key(job_title, location),
+            lambda: self._company_ml_prompt(job_title, location),
+            deadline
+        )
+    
+    def _build_ml_fallback_certificates(self, interests, goals, preference, user_id=None):
+        """ML-only certificate results, built without calling Gemini"""
         user_profile = {
             'interests': ' '.join(interests),
             'career_goal': ' '.join(goals),
-            'user_id': 1
+            'user_id': user_id
         }
         
         ml_recs = self.ml_engine.get_hybrid_recommendations(user_profile, 6)
@@ -287,17 +852,17 @@ class HybridAIRecommendationEngine:
                 "url": "https://coursera.org/professional-certificates"
             })
         
-        return json.dumps({
+        return {
             "certificates": certificates,
             "ml_insights": {
                 "recommendation_engine": "Hybrid ML (Content-Based + Collaborative)",
                 "confidence": "High ML confidence scores",
                 "personalization": "Tailored using machine learning algorithms"
             }
-        })
+        }
     
-    def _get_ml_fallback_courses(self, learning_prefs, education_bg, aspirations):
-        """ML-powered fallback for courses"""
+    def _build_ml_fallback_courses(self, learning_prefs, education_bg, aspirations):
+        """ML-only course results, built without calling Gemini"""
         user_profile = {
             'interests': ' '.join(learning_prefs + aspirations),
             'education_level': education_bg[0] if education_bg else 'Bachelor',
@@ -321,17 +886,17 @@ class HybridAIRecommendationEngine:
                 "url": "https://udemy.com/course/ml-recommended"
             })
         
-        return json.dumps({
+        return {
             "courses": courses,
             "ml_insights": {
                 "algorithm": "TF-IDF + Cosine Similarity",
                 "personalization": "Content-based machine learning",
                 "accuracy": "High similarity matching"
             }
-        })
+        }
     
-    def _get_ml_fallback_companies(self, job_title, location):
-        """ML-powered fallback for companies"""
+    def _build_ml_fallback_companies(self, job_title, location):
+        """ML-only company results, built without calling Gemini"""
         cluster_insights = self.ml_engine.get_user_cluster_insights(job_title)
         
         companies = [
@@ -346,62 +911,149 @@ class HybridAIRecommendationEngine:
             }
         ]
         
-        return json.dumps({
+        return {
             "companies": companies,
             "ml_insights": {
                 "cluster_analysis": f"User belongs to cluster {cluster_insights.get('cluster_id', 0)}",
                 "market_intelligence": "ML-powered job market analysis",
                 "success_rate": "Higher success through ML matching"
             }
-        })
+        }
 
-# Initialize hybrid AI + ML engine
-ai_ml_engine = HybridAIRecommendationEngine()
+# The hybrid AI + ML engine and the per-user recommendation lists (built in the background
+# from the stored profile and saved items) are created by warm_up(); routes that need them
+# answer 503 until ENGINES_READY is set
+ai_ml_engine = None
+recommendation_store = None
+ENGINES_READY = threading.Event()
+
+def warm_up():
+    """Import the ML stack and build the engines, then mark the app ready"""
+    global ai_ml_engine, recommendation_store
+    try:
+        with startup.phase('import ml_models_fixed'):
+            import ml_models_fixed
+        with startup.phase('ml_engine'):
+            ml_models_fixed.get_ml_engine()
+        with startup.phase('dl_engine'):
+            ml_models_fixed.get_dl_engine()
+        with startup.phase('hybrid_engine'):
+            engine = HybridAIRecommendationEngine()
+            updater = getattr(engine.ml_engine, 'interaction_updater', None)
+            if updater is not None:
+                updater.replay_from(fetch_logged_interactions, INTERACTION_REPLAY_SECONDS)
+        with startup.phase('recommendation_store'):
+            recommendation_store = MaterializedRecommendations(
+                RecommendationBuilder(engine.ml_engine, depth=RECOMMENDATION_MAX_PAGE_SIZE),
+                ResponseCache(
+                    RECOMMENDATION_CACHE_PATH, ttl_seconds=RECOMMENDATION_CACHE_TTL,
+                    memory_ttl_seconds=RECOMMENDATION_MEMORY_TTL
+                ),
+                ENGINE_EXECUTOR
+            )
+        ai_ml_engine = engine
+        ENGINES_READY.set()
+        logger.info("✅ All ML/DL engines initialized successfully!")
+    except Exception as e:
+        logger.exception("❌ Engine warm-up failed: %s", e)
+
+def wait_until_ready(timeout=None):
+    """Block until the warm-up finished (e.g. before gunicorn forks workers); returns ENGINES_READY"""
+    WARM_UP_THREAD.join(timeout)
+    return ENGINES_READY.is_set()
+
+WARM_UP_THREAD = threading.Thread(target=warm_up, name='engine-warm-up', daemon=True)
+WARM_UP_THREAD.start()
+
+def engines_required(f):
+    """Route that needs the recommendation engines; 503 with Retry-After while they warm up"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not ENGINES_READY.is_set():
+            return jsonify({
+                'success': False,
+                'message': 'Recommendation engines are starting up, please retry shortly'
+            }), 503, {'Retry-After': '5'}
+        return f(*args, **kwargs)
+    return decorated_function
 
 # Helper functions
 def get_user_data(user_id):
     """Get user data from database"""
-    return users_db.get(user_id, {})
+    return storage.get_user(user_id)
 
 def save_user_data(user_id, data):
     """Save user data to database"""
-    if user_id not in users_db:
-        users_db[user_id] = {}
-    users_db[user_id].update(data)
+    storage.save_user(user_id, data)
 
 def get_user_saved_items(user_id):
     """Get user's saved items"""
-    if user_id not in saved_items_db:
-        saved_items_db[user_id] = {
-            'certificates': [],
-            'courses': [],
-            'jobs': []
-        }
-    return saved_items_db[user_id]
+    return storage.get_saved_items(user_id)
 
 def save_user_item(user_id, item_type, item_data):
-    """Save an item for user"""
-    if user_id not in saved_items_db:
-        saved_items_db[user_id] = {
-            'certificates': [],
-            'courses': [],
-            'jobs': []
-        }
+    """Save an item for user; returns None when the same item is already saved"""
+    return storage.save_item(user_id, item_type, item_data)
+
+DUPLICATE_ITEM_MESSAGES = {
+    'certificate': 'This certificate is already saved',
+    'course': 'This course is already saved',
+    'job': 'This job search is already saved'
+}
+
+def saved_items_etag(version, item_types, since):
+    """ETag of a /api/saved-items response: changes with the version and the requested view"""
+    return f"v{version}-{'.'.join(item_types)}-{'full' if since is None else since}"
+
+def fetch_logged_interactions(last_id):
+    """Course interactions any worker logged after last_id, for the collaborative filtering replay"""
+    with app.app_context():
+        return storage.get_interactions_since(last_id, item_type='course')
+
+def get_recommendation_inputs(user_id):
+    """Everything the user's materialized recommendations are built from"""
+    return recommendation_inputs(
+        get_user_data(user_id), get_user_saved_items(user_id), storage.get_interaction_version(user_id)
+    )
+
+def refresh_user_recommendations(user_id):
+    """Queue background rebuilds of the user's materialized recommendations after their inputs change"""
+    if not ENGINES_READY.is_set():
+        # Lists are fingerprinted by their inputs, so they are rebuilt on the next read anyway
+        return
+    try:
+        recommendation_store.refresh(user_id, get_recommendation_inputs(user_id))
+    except Exception as e:
+        logger.warning("⚠️ Could not queue recommendation refresh for %s: %s", user_id, e)
+
+def sse_response(events):
+    """Serialize (event, data) pairs as a Server-Sent Events stream.
+    
+    The body is produced after the view returns and its request teardown
+    has run, so it is generated inside the request context and with a copy
+    of the request's context variables (request id, stage timings).
+    """
+    context = contextvars.copy_context()
     
-    # Add unique ID and timestamp
-    item_id = str(uuid.uuid4())
-    item_data['id'] = item_id
-    item_data['saved_at'] = datetime.now().isoformat()
+    def generate():
+        events_iterator = iter(events)
+        while True:
+            try:
+                event, data = context.run(next, events_iterator)
+            except StopIteration:
+                return
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
     
-    saved_items_db[user_id][f'{item_type}s'].append(item_data)
-    return item_id
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # stop reverse proxies from buffering the stream
+    })
 
 # Public routes (no authentication required)
 @app.route('/')
 def index():
     # Check if user is actually logged in (not auto-login)
     if session.get('logged_in') and session.get('user_id'):
-        print(f"👤 User {session.get('user_id')} is logged in, showing dashboard option")
+        logger.info("👤 User %s is logged in, showing dashboard option", session.get('user_id'), extra=SAMPLED)
         # Show landing page with login status
         return render_template('index.html', logged_in=True, user_name=session.get('user_name'))
     
@@ -445,7 +1097,7 @@ def api_login():
             session['logged_in'] = True
             session.permanent = True
             
-            print(f"✅ User logged in: {email}")
+            logger.info("✅ User logged in: %s", email)
             
             return jsonify({
                 'success': True,
@@ -469,7 +1121,7 @@ def api_login():
             session['logged_in'] = True
             session.permanent = True
             
-            print(f"✅ New user created and logged in: {email}")
+            logger.info("✅ New user created and logged in: %s", email)
             
             return jsonify({
                 'success': True,
@@ -483,7 +1135,7 @@ def api_login():
             }), 400
             
     except Exception as e:
-        print(f"❌ Login error: {e}")
+        logger.exception("❌ Login error: %s", e)
         return jsonify({
             'success': False,
             'message': 'Login failed. Please try again.'
@@ -526,7 +1178,7 @@ def api_register():
         session['logged_in'] = True
         session.permanent = True
         
-        print(f"✅ New user registered: {email}")
+        logger.info("✅ New user registered: %s", email)
         
         return jsonify({
             'success': True,
@@ -535,7 +1187,7 @@ def api_register():
         })
         
     except Exception as e:
-        print(f"❌ Registration error: {e}")
+        logger.exception("❌ Registration error: %s", e)
         return jsonify({
             'success': False,
             'message': 'Registration failed. Please try again.'
@@ -549,7 +1201,7 @@ def logout():
     # Clear session completely
     session.clear()
     
-    print(f"✅ User logged out: {user_id}")
+    logger.info("✅ User logged out: %s", user_id)
     
     flash(f'Goodbye {user_name}! You have been logged out successfully.', 'success')
     return redirect(url_for('index'))
@@ -614,6 +1266,7 @@ def recommendations():
 # Protected API routes
 @app.route('/api/find-certificates', methods=['POST'])
 @login_required
+@engines_required
 def api_find_certificates():
     try:
         data = request.get_json()
@@ -625,16 +1278,17 @@ def api_find_certificates():
             return jsonify({'error': 'Please select at least one interest and one goal'}), 400
         
         user_id = session.get('user_id')
-        print(f"🤖 ML-Enhanced Certificate Finding for {user_id}: {interests} + {goals}")
+        logger.info("🤖 ML-Enhanced Certificate Finding for %s: %s + %s", user_id, interests, goals, extra=SAMPLED)
         
-        result = ai_ml_engine.find_certificates_with_ml(interests, goals, course_preference)
+        result = ai_ml_engine.find_certificates_with_ml(interests, goals, course_preference, user_id)
         return jsonify({'success': True, 'data': result})
     except Exception as e:
-        print(f"❌ ML Certificate API error: {e}")
+        logger.exception("❌ ML Certificate API error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/suggest-courses', methods=['POST'])
 @login_required
+@engines_required
 def api_suggest_courses():
     try:
         data = request.get_json()
@@ -646,16 +1300,17 @@ def api_suggest_courses():
             return jsonify({'error': 'Please fill in all sections'}), 400
         
         user_id = session.get('user_id')
-        print(f"🎓 ML-Enhanced Course Suggestions for {user_id}: {career_aspirations}")
+        logger.info("🎓 ML-Enhanced Course Suggestions for %s: %s", user_id, career_aspirations, extra=SAMPLED)
         
-        result = ai_ml_engine.suggest_courses_with_ml(learning_prefs, education_bg, career_aspirations)
+        result = ai_ml_engine.suggest_courses_with_ml(learning_prefs, education_bg, career_aspirations, user_id)
         return jsonify({'success': True, 'data': result})
     except Exception as e:
-        print(f"❌ ML Course API error: {e}")
+        logger.exception("❌ ML Course API error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/find-companies', methods=['POST'])
 @login_required
+@engines_required
 def api_find_companies():
     try:
         data = request.get_json()
@@ -666,14 +1321,200 @@ def api_find_companies():
             return jsonify({'error': 'Please select both job title and location'}), 400
         
         user_id = session.get('user_id')
-        print(f"🏢 ML-Enhanced Company Finding for {user_id}: {job_title} in {location}")
+        logger.info("🏢 ML-Enhanced Company Finding for %s: %s in %s", user_id, job_title, location, extra=SAMPLED)
         
         result = ai_ml_engine.find_companies_with_ml(job_title, location)
         return jsonify({'success': True, 'data': result})
     except Exception as e:
-        print(f"❌ ML Company API error: {e}")
+        logger.exception("❌ ML Company API error: %s", e)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/find-certificates/stream', methods=['POST'])
+@login_required
+@engines_required
+def api_find_certificates_stream():
+    data = request.get_json()
+    interests = data.get('interests', [])
+    goals = data.get('goals', [])
+    course_preference = data.get('course_preference', 'Any')
+    
+    if not interests or not goals:
+        return jsonify({'error': 'Please select at least one interest and one goal'}), 400
+    
+    logger.info("🤖 Streaming ML-Enhanced Certificate Finding for %s", session.get('user_id'), extra=SAMPLED)
+    return sse_response(ai_ml_engine.stream_certificates_with_ml(
+        interests, goals, course_preference, session.get('user_id'), g.get('request_started_at')
+    ))
+
+@app.route('/api/suggest-courses/stream', methods=['POST'])
+@login_required
+@engines_required
+def api_suggest_courses_stream():
+    data = request.get_json()
+    learning_prefs = data.get('learning_preferences', [])
+    education_bg = data.get('educational_background', [])
+    career_aspirations = data.get('career_aspirations', [])
+    
+    if not learning_prefs or not education_bg or not career_aspirations:
+        return jsonify({'error': 'Please fill in all sections'}), 400
+    
+    logger.info("🎓 Streaming ML-Enhanced Course Suggestions for %s", session.get('user_id'), extra=SAMPLED)
+    return sse_response(ai_ml_engine.stream_courses_with_ml(
+        learning_prefs, education_bg, career_aspirations, session.get('user_id'), g.get('request_started_at')
+    ))
+
+@app.route('/api/find-companies/stream', methods=['POST'])
+@login_required
+@engines_required
+def api_find_companies_stream():
+    data = request.get_json()
+    job_title = data.get('job_title', '')
+    location = data.get('location', '')
+    
+    if not job_title or not location:
+        return jsonify({'error': 'Please select both job title and location'}), 400
+    
+    logger.info("🏢 Streaming ML-Enhanced Company Finding for %s", session.get('user_id'), extra=SAMPLED)
+    return sse_response(ai_ml_engine.stream_companies_with_ml(job_title, location, g.get('request_started_at')))
+
+@app.route('/api/batch-recommendations', methods=['POST'])
+@login_required
+@engines_required
+def api_batch_recommendations():
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        profiles = data.get('profiles', [])
+        try:
+            num_recommendations = int(data.get('num_recommendations', 5))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'num_recommendations must be an integer'}), 400
+        num_recommendations = min(max(num_recommendations, 1), BATCH_MAX_RECOMMENDATIONS)
+        
+        if not profiles or not isinstance(profiles, list):
+            return jsonify({'error': 'Please provide a list of profiles'}), 400
+        if len(profiles) > BATCH_MAX_PROFILES:
+            return jsonify({'error': f'At most {BATCH_MAX_PROFILES} profiles per batch'}), 400
+        if not all(isinstance(profile, dict) for profile in profiles):
+            return jsonify({'error': 'Every profile must be a JSON object'}), 400
+        # One unusable profile would fail the whole batch's model call, so name it instead
+        for index, profile in enumerate(profiles):
+            try:
+                experience = float(profile.get('experience_years', 0) or 0)
+            except (TypeError, ValueError):
+                experience = math.nan
+            if not math.isfinite(experience):
+                return jsonify({'error': f'profiles[{index}].experience_years must be a number'}), 400
+        
+        logger.info("📦 Batch recommendations for %s profiles", len(profiles), extra=SAMPLED)
+        results = ai_ml_engine.ml_engine.get_batch_recommendations(profiles, num_recommendations)
+        return jsonify({'success': True, 'results': results})
+    except Exception as e:
+        logger.exception("❌ Batch recommendation API error: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/recommendations/<rec_type>')
+@login_required
+@engines_required
+def api_recommendations(rec_type):
+    """Serve the user's materialized recommendations one page at a time.
+    
+    Never calls the model or Gemini: a missing or outdated list is rebuilt in
+    the background and the response says 'pending' (nothing yet) or 'stale'
+    (the previous list) until the new one is ready.
+    """
+    if rec_type not in RECOMMENDATION_TYPES:
+        return jsonify({'success': False, 'error': f'Unknown recommendation type, expected one of {list(RECOMMENDATION_TYPES)}'}), 404
+    
+    try:
+        limit = min(max(int(request.args.get('limit', RECOMMENDATION_PAGE_SIZE)), 1), RECOMMENDATION_MAX_PAGE_SIZE)
+        cursor = request.args.get('cursor')
+        offset = 0
+        if cursor:
+            cursor_fingerprint, offset = decode_cursor(cursor)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid limit or cursor'}), 400
+    
+    try:
+        user_id = session.get('user_id')
+        status, entry = recommendation_store.get(user_id, rec_type, get_recommendation_inputs(user_id))
+        CACHE_LOOKUPS.inc(cache='materialized_recommendations', result=status)
+        
+        if entry is None:
+            response = jsonify({'success': True, 'status': status, 'recommendations': [], 'next_cursor': None, 'retry_after': 1})
+            response.headers['Retry-After'] = '1'
+            return response, 202
+        
+        if cursor and (not cursor_fingerprint or cursor_fingerprint != entry['fingerprint']):
+            return jsonify({
+                'success': False,
+                'status': status,
+                'error': 'Recommendations changed since this cursor was issued, start again from the first page'
+            }), 409
+        
+        items = entry['items']
+        end = offset + limit
+        return jsonify({
+            'success': True,
+            'status': status,
+            'recommendations': items[offset:end],
+            'next_cursor': encode_cursor(entry['fingerprint'], end) if end < len(items) else None,
+            'total': len(items),
+            'computed_at': entry['computed_at'],
+            'ai_insights': entry['ai_insights'] if offset == 0 else None,
+            'retry_after': 1 if status != 'ready' else None
+        })
+    except Exception as e:
+        logger.exception("❌ Recommendations API error: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/career-path-prediction', methods=['GET', 'POST'])
+@login_required
+@engines_required
+def api_career_path_prediction():
+    """Career path probabilities for the posted profile, or for the stored profile on GET"""
+    try:
+        if request.method == 'POST':
+            data = request.get_json() or {}
+            profile = {
+                'interests': data.get('interests', ''),
+                'career_goal': data.get('career_goal', ''),
+                'education_level': data.get('education_level', 'Bachelor'),
+                'experience_years': data.get('experience_years', 0)
+            }
+            try:
+                float(profile['experience_years'] or 0)
+            except (TypeError, ValueError):
+                return jsonify({'success': False, 'error': 'experience_years must be a number'}), 400
+        else:
+            stored = get_user_data(session.get('user_id'))
+            profile = {
+                'interests': stored.get('skills', ''),
+                'career_goal': stored.get('aspirations', ''),
+                'education_level': education_level(stored.get('education', '')),
+                'experience_years': stored.get('experience_years', 0)
+            }
+        
+        prediction = ai_ml_engine.ml_engine.predict_career_distribution(profile)
+        career_paths = [{
+            'name': p['career_path'],
+            'probability': p['probability'],
+            'confidence': p['confidence'],
+            'prediction_type': p['prediction_type'],
+            'description': f"{p['confidence']:.1f}% match for your profile ({p['prediction_type']})"
+        } for p in prediction['top_predictions']]
+        
+        return jsonify({
+            'success': True,
+            'career_paths': career_paths,
+            'classes': prediction['classes'],
+            'probabilities': prediction['probabilities']
+        })
+    except Exception as e:
+        logger.exception("❌ Career path prediction error: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/save-item', methods=['POST'])
 @login_required
 def api_save_item():
@@ -689,38 +1530,22 @@ def api_save_item():
                 'message': 'Missing required data'
             }), 400
         
-        # Check if item already exists
-        saved_items = get_user_saved_items(user_id)
-        existing_items = saved_items.get(f'{item_type}s', [])
-        
-        # Check for duplicates based on item type
-        for existing_item in existing_items:
-            if item_type == 'certificate':
-                if (existing_item.get('name') == item_data.get('name') and 
-                    existing_item.get('provider') == item_data.get('provider')):
-                    return jsonify({
-                        'success': False,
-                        'message': 'This certificate is already saved'
-                    }), 400
-            elif item_type == 'course':
-                if (existing_item.get('title') == item_data.get('title') and 
-                    existing_item.get('provider') == item_data.get('provider')):
-                    return jsonify({
-                        'success': False,
-                        'message': 'This course is already saved'
-                    }), 400
-            elif item_type == 'job':
-                if (existing_item.get('name') == item_data.get('name') and 
-                    existing_item.get('industry') == item_data.get('industry')):
-                    return jsonify({
-                        'success': False,
-                        'message': 'This job search is already saved'
-                    }), 400
-        
-        # Save the item
+        if item_type not in storage.SAVED_ITEM_TYPES:
+            return jsonify({
+                'success': False,
+                'message': 'Unknown item type'
+            }), 400
+        
+        # The unique index on the item's identifying fields rejects duplicates
         item_id = save_user_item(user_id, item_type, item_data)
+        if item_id is None:
+            return jsonify({
+                'success': False,
+                'message': DUPLICATE_ITEM_MESSAGES[item_type]
+            }), 400
+        refresh_user_recommendations(user_id)
         
-        print(f"✅ Saved {item_type} for user {user_id}")
+        logger.info("✅ Saved %s for user %s", item_type, user_id, extra=SAMPLED)
         return jsonify({
             'success': True,
             'message': f'{item_type.capitalize()} saved successfully!',
@@ -728,12 +1553,60 @@ def api_save_item():
         })
         
     except Exception as e:
-        print(f"❌ Save item error: {e}")
+        logger.exception("❌ Save item error: %s", e)
         return jsonify({
             'success': False,
             'message': 'Failed to save item'
         }), 500
 
+@app.route('/api/saved-items')
+@login_required
+def api_saved_items():
+    """All saved items (or ?types=course,job) in one response, with conditional GET and delta sync.
+    
+    The ETag is the user's saved-items version, so If-None-Match is answered
+    with 304 after a single primary-key lookup. ?since=<version> returns only
+    the items saved and the ids deleted after that version. Stored item JSON
+    is spliced into the response as-is instead of being decoded and encoded.
+    """
+    try:
+        user_id = session.get('user_id')
+        types = request.args.get('types')
+        # Duplicates and empty segments ('course,,course,') are dropped, keeping the first-seen order
+        item_types = tuple(dict.fromkeys(t.strip() for t in (types or '').split(',') if t.strip()))
+        item_types = item_types or storage.SAVED_ITEM_TYPES
+        since = request.args.get('since')
+        since = int(since) if since not in (None, '') else None
+    except ValueError:
+        return jsonify({'success': False, 'error': 'since must be an integer version'}), 400
+    if any(item_type not in storage.SAVED_ITEM_TYPES for item_type in item_types):
+        return jsonify({'success': False, 'error': f'Unknown item type, expected any of {list(storage.SAVED_ITEM_TYPES)}'}), 400
+    
+    try:
+        version = storage.get_saved_items_version(user_id)
+        # A client ahead of the server (e.g. after the database was reset) gets everything
+        if since is not None and since > version:
+            since = None
+        etag = saved_items_etag(version, item_types, since)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            version, items, deleted = storage.export_saved_items(user_id, item_types, since)
+            etag = saved_items_etag(version, item_types, since)
+            body = '{"success":true,"version":%d,"since":%s,"items":{%s},"deleted":%s}' % (
+                version,
+                json.dumps(since),
+                ','.join(f'"{item_type}s":[{",".join(items[item_type])}]' for item_type in item_types),
+                json.dumps({f'{item_type}s': ids for item_type, ids in deleted.items()})
+            )
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    except Exception as e:
+        logger.exception("❌ Get saved items error: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/get-saved-items/<item_type>')
 @login_required
 def api_get_saved_items(item_type):
@@ -747,7 +1620,7 @@ def api_get_saved_items(item_type):
             'items': items
         })
     except Exception as e:
-        print(f"❌ Get saved items error: {e}")
+        logger.exception("❌ Get saved items error: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -768,21 +1641,15 @@ def api_delete_saved_item():
                 'message': 'Missing required data'
             }), 400
         
-        saved_items = get_user_saved_items(user_id)
-        items = saved_items.get(f'{item_type}s', [])
-        
-        # Find and remove the item
-        updated_items = [item for item in items if item.get('id') != item_id]
-        
-        if len(updated_items) == len(items):
+        if not storage.delete_item(user_id, item_type, item_id):
             return jsonify({
                 'success': False,
                 'message': 'Item not found'
             }), 404
         
-        saved_items[f'{item_type}s'] = updated_items
+        refresh_user_recommendations(user_id)
         
-        print(f"✅ Deleted {item_type} {item_id} for user {user_id}")
+        logger.info("✅ Deleted %s %s for user %s", item_type, item_id, user_id, extra=SAMPLED)
         
         return jsonify({
             'success': True,
@@ -790,7 +1657,7 @@ def api_delete_saved_item():
         })
         
     except Exception as e:
-        print(f"❌ Delete item error: {e}")
+        logger.exception("❌ Delete item error: %s", e)
         return jsonify({
             'success': False,
             'message': 'Failed to delete item'
@@ -813,23 +1680,165 @@ def api_save_profile():
         }
         
         save_user_data(user_id, user_updates)
+        refresh_user_recommendations(user_id)
         
         # Update session
         session['user_name'] = user_updates['name']
         
-        print(f"✅ Profile updated for user {user_id}")
+        logger.info("✅ Profile updated for user %s", user_id, extra=SAMPLED)
         
         return jsonify({
             'success': True,
             'message': 'Profile updated successfully'
         })
     except Exception as e:
-        print(f"❌ Save profile error: {e}")
+        logger.exception("❌ Save profile error: %s", e)
         return jsonify({
             'success': False,
             'message': 'Failed to update profile'
         }), 500
 
+@app.route('/api/track-interaction', methods=['POST'])
+@login_required
+@engines_required
+def api_track_interaction():
+    try:
+        data = request.get_json() or {}
+        item_type = data.get('item_type')
+        interaction_type = data.get('interaction_type')
+        try:
+            item_id = int(data.get('item_id'))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'item_id must be an integer'}), 400
+        
+        from ml_models_fixed import INTERACTION_RATINGS
+        if item_type not in ('course', 'certificate', 'job') or interaction_type not in INTERACTION_RATINGS:
+            return jsonify({
+                'success': False,
+                'message': f'Unknown item_type or interaction_type (expected one of {sorted(INTERACTION_RATINGS)})'
+            }), 400
+        
+        user_id = session.get('user_id')
+        # The shared log is what every worker (and the next restart) learns from;
+        # recording locally as well makes this worker learn it right away
+        storage.record_interaction(user_id, item_type, item_id, interaction_type, INTERACTION_RATINGS[interaction_type])
+        learned = ai_ml_engine.ml_engine.record_interaction(user_id, item_type, item_id, interaction_type)
+        refresh_user_recommendations(user_id)
+        return jsonify({'success': True, 'learned': learned}), 202
+    except Exception as e:
+        logger.exception("❌ Track interaction error: %s", e)
+        return jsonify({'success': False, 'message': 'Failed to track interaction'}), 500
+
+@app.route('/api/engine-stats')
+@login_required
+@engines_required
+def api_engine_stats():
+    updater = getattr(ai_ml_engine.ml_engine, 'interaction_updater', None)
+    return jsonify({
+        'success': True,
+        'response_cache': ai_ml_engine.response_cache.stats(),
+        'materialized_recommendations': recommendation_store.stats(),
+        'career_predictions': ai_ml_engine.ml_engine.career_memo_stats(),
+        'token_usage': ai_ml_engine.token_usage.snapshot(),
+        'coalesced_requests': ai_ml_engine.single_flight.stats(),
+        'gemini_resilience': ai_ml_engine.resilience_stats(),
+        'interaction_updates': updater.snapshot() if updater is not None else None,
+        'logging': structured_logging.stats()
+    })
+
+@app.before_request
+def start_request_timing():
+    g.request_started_at = time.perf_counter()
+    g.request_timing_token = metrics.start_request()
+
+@app.before_request
+def start_interaction_replay():
+    """Each worker starts replaying the shared interaction log on its first request"""
+    updater = getattr(ai_ml_engine.ml_engine, 'interaction_updater', None) if ENGINES_READY.is_set() else None
+    if updater is not None:
+        updater.ensure_running()
+
+@app.before_request
+def assign_request_id():
+    """Tag every log record of the request with the caller's X-Request-ID or a fresh id"""
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+    g.request_id_token = structured_logging.set_request_id(g.request_id)
+
+@app.after_request
+def add_server_timing(response):
+    """Report where the request's time went in a Server-Timing header and the route histogram"""
+    started_at = g.get('request_started_at')
+    if started_at is None:
+        return response
+    elapsed = time.perf_counter() - started_at
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.HTTP_REQUEST_SECONDS.observe(elapsed, route=route, method=request.method, status=response.status_code)
+    response.headers['Server-Timing'] = metrics.server_timing_header(metrics.request_timings(), elapsed)
+    response.headers['X-Request-ID'] = g.get('request_id', '')
+    return response
+
+@app.teardown_request
+def end_request_timing(error=None):
+    token = g.pop('request_timing_token', None)
+    if token is not None:
+        metrics.end_request(token)
+    request_id_token = g.pop('request_id_token', None)
+    if request_id_token is not None:
+        structured_logging.reset_request_id(request_id_token)
+
+@app.route('/api/ready')
+def api_ready():
+    """Readiness probe: 200 once the engines are built, 503 while they warm up"""
+    ready = ENGINES_READY.is_set()
+    return jsonify({'ready': ready, 'startup_phases': startup.phases()}), 200 if ready else 503
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Stage histograms and counters of this worker in the Prometheus text format"""
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+request_profiler = RequestProfiler(
+    PROFILE_DIR, keep=PROFILE_KEEP, sample_rate=PROFILE_SAMPLE_RATE, default_mode=PROFILE_DEFAULT_MODE
+)
+
+def start_request_profile():
+    requested = request.headers.get('X-Profile')
+    if requested and is_admin_request():
+        g.profile_session = request_profiler.start(requested.strip().lower())
+        if g.profile_session is None:
+            logger.info("🔬 Not profiling %s %s: another request is being profiled", request.method, request.path)
+    elif request_profiler.sampled():
+        g.profile_session = request_profiler.start()
+
+def save_request_profile(error=None):
+    profile_session = g.pop('profile_session', None)
+    if profile_session is None:
+        return
+    try:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        name = request_profiler.save(profile_session, route, request.method, request_id=g.get('request_id'))
+        logger.info("🔬 Profiled %s %s as %s", request.method, route, name)
+    except Exception as e:
+        logger.warning("⚠️ Could not save request profile: %s", e)
+
+if ADMIN_TOKEN or PROFILE_SAMPLE_RATE > 0:
+    app.before_request(start_request_profile)
+    app.teardown_request(save_request_profile)
+
+@app.route('/admin/profiles')
+@admin_required
+def list_request_profiles():
+    """Stored request profiles, newest first"""
+    return jsonify({'success': True, 'modes': list(PROFILE_MODES), 'profiles': request_profiler.list_profiles()})
+
+@app.route('/admin/profiles/<filename>')
+@admin_required
+def download_request_profile(filename):
+    path = request_profiler.file_path(filename)
+    if path is None:
+        return jsonify({'success': False, 'message': 'Profile not found'}), 404
+    return send_file(path, as_attachment=True, download_name=filename)
+
 # Error handlers
 @app.errorhandler(404)
 def not_found_error(error):
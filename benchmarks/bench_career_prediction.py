@@ -0,0 +1,109 @@
+"""Per-call latency and allocations of predict_career_path: the legacy pandas
+feature pipeline vs. the precompiled NumPy layout.
+
+    python benchmarks/bench_career_prediction.py --calls 2000
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROFILE = {
+    'education_level': 'Master',
+    'experience_years': 4,
+    'interests': 'Data Science Machine Learning Python',
+    'career_goal': 'Data Scientist',
+}
+
+
+def legacy_features(engine, user_profile):
+    """The DataFrame pipeline predict_career_path used before the precompiled layout.
+    Columns are reordered to the training order at the end, which the old code
+    omitted (scikit-learn rejected its column order)."""
+    user_data = pd.DataFrame([{
+        'education_level': user_profile.get('education_level', 'Bachelor'),
+        'experience_years': user_profile.get('experience_years', 0),
+        'interests': user_profile.get('interests', ''),
+        'career_goal': user_profile.get('career_goal', '')
+    }])
+    features = pd.get_dummies(user_data[['education_level']])
+    for level in ['Associate', 'Bachelor', 'High School', 'Master', 'PhD']:
+        col_name = f'education_level_{level}'
+        if col_name not in features.columns:
+            features[col_name] = 0
+    features['experience_years'] = user_data['experience_years']
+    user_text = user_data['interests'] + ' ' + user_data['career_goal']
+    user_tfidf = engine.tfidf_vectorizer.transform(user_text)
+    tfidf_features = pd.DataFrame(user_tfidf.toarray()[:, :50])
+    tfidf_features.columns = [f'tfidf_{i}' for i in range(tfidf_features.shape[1])]
+    final_features = pd.concat([features.reset_index(drop=True), tfidf_features], axis=1)
+    final_features.columns = final_features.columns.astype(str)
+    final_features = final_features[list(engine.scaler.feature_names_in_)]
+    return engine.scaler.transform(final_features)
+
+
+def fast_features(engine, user_profile):
+    return engine._career_feature_row(user_profile)
+
+
+def measure(fn, calls):
+    """Return (p50 us, mean us, peak KiB per call, blocks still held after each call)"""
+    for _ in range(50):
+        fn()
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1e6)
+
+    tracemalloc.start()
+    peaks, blocks = [], []
+    for _ in range(min(calls, 200)):
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        peaks.append((tracemalloc.get_traced_memory()[1] - base) / 1024)
+        after = tracemalloc.take_snapshot()
+        blocks.append(sum(max(stat.count_diff, 0) for stat in after.compare_to(before, 'lineno')))
+    tracemalloc.stop()
+    return statistics.median(timings), statistics.fmean(timings), statistics.fmean(peaks), statistics.fmean(blocks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=2000)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        from ml_models_fixed import get_ml_engine
+        engine = get_ml_engine()
+
+    legacy = legacy_features(engine, PROFILE)
+    fast = fast_features(engine, PROFILE)
+    assert np.allclose(legacy, fast), "feature paths disagree"
+
+    classifier = engine.career_classifier
+    cases = [
+        ('features  legacy pandas', lambda: legacy_features(engine, PROFILE)),
+        ('features  precompiled  ', lambda: fast_features(engine, PROFILE)),
+        ('end-to-end legacy      ', lambda: classifier.predict_proba(legacy_features(engine, PROFILE))),
+        ('end-to-end precompiled ', lambda: engine.predict_career_path(PROFILE)),
+    ]
+    print(f"{'path':<24} {'p50 us':>9} {'mean us':>9} {'peak KiB':>9} {'kept blocks':>11}")
+    for name, fn in cases:
+        p50, mean, peak, blocks = measure(fn, args.calls)
+        print(f"{name:<24} {p50:9.1f} {mean:9.1f} {peak:9.1f} {blocks:11.1f}")
+
+
+if __name__ == '__main__':
+    main()
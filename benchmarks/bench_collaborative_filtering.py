@@ -0,0 +1,61 @@
+"""Fit time and peak memory of UserNeighborModel on synthetic interactions.
+
+    python benchmarks/bench_collaborative_filtering.py --users 1000000 --items 100000
+
+Every user rates --per-user items drawn from a power-law popularity curve
+(a few items are rated by many users, most by few), as in real catalogs.
+The dense users x users similarity matrix the old pivot-table code built
+would need users^2 * 8 bytes (8 TB at 1M users).
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collaborative_filtering import UserNeighborModel
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--items', type=int, default=100_000)
+    parser.add_argument('--per-user', type=int, default=20)
+    parser.add_argument('--popularity-exponent', type=float, default=0.8)
+    parser.add_argument('--neighbors', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    popularity = 1.0 / np.arange(1, args.items + 1) ** args.popularity_exponent
+    popularity /= popularity.sum()
+    n = args.users * args.per_user
+    user_ids = np.repeat(np.arange(args.users, dtype=np.int64), args.per_user)
+    item_ids = rng.choice(args.items, size=n, p=popularity)
+    ratings = rng.integers(1, 6, size=n).astype(np.float32)
+    baseline = peak_rss_mb()
+    print(f"interactions: {n:,} ({args.users:,} users x {args.items:,} items), peak RSS {baseline:.0f} MB")
+
+    start = time.perf_counter()
+    model = UserNeighborModel(n_neighbors=args.neighbors).fit(user_ids, item_ids, ratings, n_items=args.items)
+    print(f"fit: {time.perf_counter() - start:.1f}s, peak RSS {peak_rss_mb():.0f} MB, "
+          f"neighbour lists {(model.neighbors.nbytes + model.neighbor_similarities.nbytes) / 1e6:.0f} MB")
+
+    timings = []
+    for user_id in rng.integers(0, args.users, 200):
+        start = time.perf_counter()
+        model.recommend(user_id, 10)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"recommend: p50 {timings[len(timings) // 2]:.2f} ms  p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Latency of the DL engine's two-tower preference model (NumPy inference) vs. the
+scikit-learn paths of MLRecommendationEngine, per profile and batched.
+
+    python benchmarks/bench_preference_model.py --profiles 1000
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+INTERESTS = [
+    'Data Science Machine Learning', 'Web Development JavaScript', 'Digital Marketing SEO',
+    'Cloud Computing AWS', 'Mobile Development React', 'Cybersecurity Network',
+]
+GOALS = ['Data Scientist', 'Software Engineer', 'Digital Marketer', 'Cloud Architect', 'Mobile Developer']
+EDUCATION = ['Bachelor', 'Master', 'High School', 'PhD', 'Associate']
+
+
+def make_profiles(count):
+    return [{
+        'user_id': i,
+        'interests': INTERESTS[i % len(INTERESTS)],
+        'career_goal': GOALS[i % len(GOALS)],
+        'education_level': EDUCATION[i % len(EDUCATION)],
+        'experience_years': i % 15,
+    } for i in range(count)]
+
+
+def per_call_us(fn, items):
+    """Median microseconds of fn(item) over items"""
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def batch_us(fn, items):
+    """Microseconds per item of one fn(items) call"""
+    start = time.perf_counter()
+    fn(items)
+    return (time.perf_counter() - start) * 1e6 / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    from ml_models_fixed import get_dl_engine, get_ml_engine
+    ml_engine = get_ml_engine()
+    dl_engine = get_dl_engine()
+    profiles = make_profiles(args.profiles)
+    n_courses = len(ml_engine.courses_data)
+
+    start = time.perf_counter()
+    dl_engine.predict_user_preferences(profiles[0])
+    load_ms = (time.perf_counter() - start) * 1000
+
+    user_embeddings = dl_engine.model.embed_users(dl_engine._user_features(profiles))
+    rows = [
+        ('two-tower: score all courses', per_call_us(lambda p: dl_engine.score_users([p]), profiles),
+         batch_us(dl_engine.score_users, profiles)),
+        ('two-tower: matmul only', per_call_us(lambda e: dl_engine.model.score(e, dl_engine.item_embeddings), user_embeddings),
+         batch_us(lambda e: dl_engine.model.score(e, dl_engine.item_embeddings), user_embeddings)),
+        ('sklearn: TF-IDF + cosine (all courses)',
+         per_call_us(lambda p: ml_engine.get_content_based_recommendations(p['interests'], n_courses), profiles),
+         batch_us(lambda ps: ml_engine.get_batch_content_recommendations([p['interests'] for p in ps], n_courses), profiles)),
+        ('sklearn: Random Forest predict_proba',
+         per_call_us(lambda p: ml_engine.predict_career_paths_batch([p]), profiles),
+         batch_us(ml_engine.predict_career_paths_batch, profiles)),
+    ]
+
+    print(f"profiles={args.profiles} courses={n_courses} first use (load weights, embed courses)={load_ms:.1f} ms")
+    print(f"{'path':<42} {'per profile':>14} {'batched':>14}")
+    for name, single, batched in rows:
+        print(f"{name:<42} {single:11.1f} us {batched:11.1f} us")
+
+
+if __name__ == '__main__':
+    main()
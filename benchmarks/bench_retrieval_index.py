@@ -0,0 +1,98 @@
+"""Top-k latency of the retrieval indexes on a synthetic TF-IDF catalog.
+
+    python benchmarks/bench_retrieval_index.py --items 1000000 --k 10
+
+Items get --terms-per-item Zipf-distributed terms with TfidfVectorizer-style
+IDF weights and queries 3-8 terms, so a few common, low-weight terms have very
+long postings lists, as in real course text.
+Run on one core (taskset -c 0 ...) to reproduce the single-core numbers. Fails
+when the inverted index's p95 is over --max-p95-ms.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval_index import RETRIEVAL_INDEXES, build_retrieval_index
+
+
+def zipf_terms(rng, size, vocabulary):
+    return (rng.zipf(1.3, size=size) - 1) % vocabulary
+
+
+def make_catalog(rng, items, vocabulary, terms_per_item):
+    """Term counts weighted by smoothed IDF and L2-normalized, like TfidfVectorizer"""
+    rows = np.repeat(np.arange(items), terms_per_item)
+    cols = zipf_terms(rng, items * terms_per_item, vocabulary)
+    counts = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)),
+                               shape=(items, vocabulary), dtype=np.float32)
+    counts.sum_duplicates()
+    document_frequency = np.bincount(counts.indices, minlength=vocabulary)
+    idf = (np.log((1 + items) / (1 + document_frequency)) + 1).astype(np.float32)
+    return normalize(counts @ sparse.diags(idf)).tocsr(), idf
+
+
+def make_queries(rng, count, vocabulary, idf):
+    queries = []
+    for _ in range(count):
+        terms = np.unique(zipf_terms(rng, rng.integers(3, 9), vocabulary))
+        data = idf[terms]
+        query = sparse.csr_matrix((data, (np.zeros(len(terms), dtype=int), terms)), shape=(1, vocabulary))
+        queries.append(normalize(query))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=1_000_000)
+    parser.add_argument('--vocabulary', type=int, default=50_000)
+    parser.add_argument('--terms-per-item', type=int, default=20)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--max-p95-ms', type=float, default=10.0, help='p95 budget for the inverted index')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    start = time.perf_counter()
+    catalog, idf = make_catalog(rng, args.items, args.vocabulary, args.terms_per_item)
+    queries = make_queries(rng, args.queries, args.vocabulary, idf)
+    print(f"catalog: {args.items:,} items, {catalog.nnz:,} postings ({time.perf_counter() - start:.1f}s to generate)")
+
+    # Ground truth from a full sparse product
+    catalog_t = catalog.T.tocsr()
+    truth = []
+    for query in queries[:20]:
+        scores = (query @ catalog_t).toarray().ravel()
+        truth.append(np.sort(scores)[::-1][:args.k])
+
+    for kind in RETRIEVAL_INDEXES:
+        start = time.perf_counter()
+        index = build_retrieval_index(catalog, kind)
+        build_seconds = time.perf_counter() - start
+
+        for query, expected in zip(queries[:20], truth):
+            _, scores = index.search(query, args.k)
+            assert np.allclose(scores, expected, atol=1e-5), f"{kind} returned a wrong top-k"
+
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, args.k)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{kind:<9} build {build_seconds:6.2f}s  p50 {statistics.median(timings):7.2f} ms  "
+              f"p95 {p95:7.2f} ms  max {timings[-1]:7.2f} ms")
+        if kind == 'inverted':
+            assert p95 <= args.max_p95_ms, f"inverted p95 {p95:.2f} ms is over the {args.max_p95_ms:g} ms budget"
+
+
+if __name__ == '__main__':
+    main()
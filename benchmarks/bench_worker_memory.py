@@ -0,0 +1,97 @@
+"""Compare per-worker memory of the engine deployment strategies.
+
+    python benchmarks/bench_worker_memory.py --workers 4
+
+duplicate  every worker builds the engine twice (the old app.py behaviour)
+registry   every worker builds one shared engine after fork
+preload    the master builds and freezes the engine, workers are forked from it
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE_PROFILES = [
+    {'interests': 'Data Science Machine Learning', 'career_goal': 'Data Scientist', 'education_level': 'Bachelor'},
+    {'interests': 'Web Development JavaScript', 'career_goal': 'Software Engineer', 'education_level': 'Master'},
+    {'interests': 'Cloud Computing AWS', 'career_goal': 'Cloud Architect', 'education_level': 'PhD'},
+]
+
+
+def serve_requests(engine):
+    """Exercise the engine like a worker serving traffic"""
+    for _ in range(50):
+        for profile in SAMPLE_PROFILES:
+            engine.get_hybrid_recommendations(profile, 5)
+            engine.get_user_cluster_insights(profile['interests'])
+            engine.predict_career_path(profile)
+
+
+def run_worker(mode, write_fd):
+    import contextlib
+    import io
+    with contextlib.redirect_stdout(io.StringIO()):
+        import ml_models_fixed
+        engine = ml_models_fixed.get_ml_engine()
+        if mode == 'duplicate':
+            duplicate = ml_models_fixed.MLRecommendationEngine()
+            serve_requests(duplicate)
+        serve_requests(engine)
+    report = ml_models_fixed.process_memory_report()
+    os.write(write_fd, (json.dumps(report) + '\n').encode())
+    os.close(write_fd)
+    time.sleep(2)  # stay alive so sibling measurements see the shared pages
+    os._exit(0)
+
+
+def run_mode(mode, workers):
+    if mode == 'preload':
+        import contextlib
+        import io
+        with contextlib.redirect_stdout(io.StringIO()):
+            import ml_models_fixed
+            ml_models_fixed.get_ml_engine()
+            ml_models_fixed.freeze_engines()
+
+    read_fd, write_fd = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            run_worker(mode, write_fd)
+        pids.append(pid)
+    os.close(write_fd)
+
+    with os.fdopen(read_fd) as reader:
+        reports = [json.loads(line) for line in reader]
+    for pid in pids:
+        os.waitpid(pid, 0)
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--mode', choices=['duplicate', 'registry', 'preload'])
+    args = parser.parse_args()
+
+    if args.mode is None:
+        # Run each mode in a fresh interpreter so imports do not leak between modes
+        for mode in ('duplicate', 'registry', 'preload'):
+            os.system(f'{sys.executable} {os.path.abspath(__file__)} --workers {args.workers} --mode {mode}')
+        return
+
+    reports = run_mode(args.mode, args.workers)
+    avg = lambda key: sum(r.get(key, 0) for r in reports) / max(len(reports), 1)
+    total_pss = sum(r.get('pss_mb', 0) for r in reports)
+    print(f"{args.mode:<10} workers={len(reports)}  RSS/worker={avg('rss_mb'):7.1f} MB  "
+          f"PSS/worker={avg('pss_mb'):7.1f} MB  USS/worker={avg('uss_mb'):7.1f} MB  "
+          f"total PSS={total_pss:7.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""Load-test the recommendation endpoints under gunicorn against a local LLM backend.
+
+    python benchmarks/load_test.py --workers 1,2,4 --concurrency 32 --duration 30
+
+For each worker count a gunicorn server is started with its own empty
+database and caches, synthetic users register and log in, and every client
+thread posts to /api/find-certificates, /api/suggest-courses and
+/api/find-companies with profiles drawn from a pool of --profiles distinct
+inputs (repeats hit the response cache, as real traffic would). Gemini is
+replaced by the fake backend (see llm_clients.py) or by --backend replay with
+a recording made with CAREERCOMPASS_LLM_BACKEND=record.
+"""
+import argparse
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INTERESTS = ['Python', 'Data Science', 'Machine Learning', 'Web Development', 'Cloud Computing',
+             'Cybersecurity', 'Digital Marketing', 'UI/UX Design', 'Mobile Development', 'Finance']
+GOALS = ['Data Scientist', 'Software Engineer', 'Cloud Architect', 'Security Analyst',
+         'Product Manager', 'Digital Marketer', 'AI Engineer']
+EDUCATION = ['High School', 'Associate', 'Bachelor', 'Master', 'PhD']
+CITIES = ['Bangalore', 'Hyderabad', 'Pune', 'Chennai', 'Mumbai', 'Delhi']
+
+
+def make_payload(endpoint, profile_id):
+    """Request body for one of the profile_id-th distinct inputs of endpoint"""
+    rng = random.Random(f'{endpoint}-{profile_id}')
+    if endpoint == 'find-certificates':
+        return {
+            'interests': rng.sample(INTERESTS, 2),
+            'goals': [rng.choice(GOALS)],
+            'course_preference': rng.choice(['Free', 'Paid', 'Any'])
+        }
+    if endpoint == 'suggest-courses':
+        return {
+            'learning_preferences': rng.sample(INTERESTS, 2),
+            'educational_background': [rng.choice(EDUCATION)],
+            'career_aspirations': [rng.choice(GOALS)]
+        }
+    return {'job_title': rng.choice(GOALS), 'location': rng.choice(CITIES)}
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q / 100.0), len(ordered) - 1)] if ordered else 0.0
+
+
+def start_server(workers, threads, port, workdir, args):
+    env = dict(os.environ)
+    env.update({
+        'GUNICORN_WORKERS': str(workers),
+        'GUNICORN_THREADS': str(threads),
+        'GUNICORN_BIND': f'127.0.0.1:{port}',
+        'CAREERCOMPASS_LLM_BACKEND': args.backend,
+        'CAREERCOMPASS_FAKE_LLM_LATENCY': args.latency,
+        'CAREERCOMPASS_FAKE_LLM_ERROR_RATE': str(args.error_rate),
+        'CAREERCOMPASS_DATABASE_URL': 'sqlite:///' + os.path.join(workdir, 'users.sqlite3'),
+        'CAREERCOMPASS_CACHE_PATH': os.path.join(workdir, 'gemini_responses.sqlite3'),
+        'CAREERCOMPASS_RECOMMENDATION_CACHE_PATH': os.path.join(workdir, 'materialized.sqlite3')
+    })
+    if args.recording:
+        env['CAREERCOMPASS_LLM_RECORDING'] = os.path.abspath(args.recording)
+    log = open(os.path.join(workdir, 'gunicorn.log'), 'w')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + args.startup_timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {server.returncode}, see {log.name}")
+        try:
+            # Workers serve pages while their engines warm up; measure once they are ready
+            if requests.get(base_url + '/api/ready', timeout=2).status_code == 200:
+                return server, base_url
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"gunicorn did not start within {args.startup_timeout}s, see {log.name}")
+
+
+def login_users(base_url, count):
+    """One logged-in session per synthetic user"""
+    sessions = []
+    for i in range(count):
+        email, password = f'loadtest-{i}@example.com', 'load-test-password'
+        session = requests.Session()
+        session.post(base_url + '/api/register', json={'fullName': f'Load Test {i}', 'email': email, 'password': password})
+        response = session.post(base_url + '/api/login', json={'email': email, 'password': password})
+        response.raise_for_status()
+        sessions.append(session)
+    return sessions
+
+
+def run_clients(base_url, sessions, endpoints, args):
+    """Post from args.concurrency threads until args.duration ends; samples are (endpoint, seconds, ok)"""
+    samples = []
+    lock = threading.Lock()
+    measure_from = time.time() + args.warmup
+    stop_at = measure_from + args.duration
+
+    def client(index):
+        rng = random.Random(index)
+        # requests.Session is not thread-safe, so every thread copies its user's cookies
+        session = requests.Session()
+        session.cookies.update(sessions[index % len(sessions)].cookies)
+        local = []
+        while time.time() < stop_at:
+            endpoint = rng.choice(endpoints)
+            payload = make_payload(endpoint, rng.randrange(args.profiles))
+            started = time.perf_counter()
+            try:
+                response = session.post(f'{base_url}/api/{endpoint}', json=payload, timeout=120)
+                ok = response.status_code == 200 and response.json().get('success', False)
+            except requests.RequestException:
+                ok = False
+            if time.time() >= measure_from:
+                local.append((endpoint, time.perf_counter() - started, ok))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def report(workers, samples, duration):
+    groups = {}
+    for endpoint, seconds, ok in samples:
+        groups.setdefault(endpoint, []).append((seconds, ok))
+    groups['all'] = [(seconds, ok) for _, seconds, ok in samples]
+    for endpoint, rows in groups.items():
+        latencies = [seconds * 1000 for seconds, _ in rows]
+        errors = sum(1 for _, ok in rows if not ok)
+        print(f"workers={workers:<3} {endpoint:<18} requests={len(rows):6d}  errors={errors:5d}  "
+              f"throughput={len(rows) / duration:7.1f} req/s  p50={percentile(latencies, 50):8.1f} ms  "
+              f"p95={percentile(latencies, 95):8.1f} ms  p99={percentile(latencies, 99):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', default='1,2,4', help='comma-separated gunicorn worker counts')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--concurrency', type=int, default=32, help='client threads')
+    parser.add_argument('--duration', type=float, default=30.0, help='measured seconds per worker count')
+    parser.add_argument('--warmup', type=float, default=5.0, help='unmeasured seconds before that')
+    parser.add_argument('--users', type=int, default=20, help='synthetic users to register')
+    parser.add_argument('--profiles', type=int, default=500, help='distinct inputs per endpoint')
+    parser.add_argument('--endpoints', default='find-certificates,suggest-courses,find-companies')
+    parser.add_argument('--backend', choices=['fake', 'replay'], default='fake')
+    parser.add_argument('--recording', help='JSONL recording for --backend replay')
+    parser.add_argument('--latency', default='lognormal:1.5:0.5', help='fake LLM latency spec (see llm_clients.py)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of fake LLM calls that fail')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--startup-timeout', type=float, default=300.0)
+    args = parser.parse_args()
+
+    endpoints = args.endpoints.split(',')
+    for workers in [int(count) for count in args.workers.split(',')]:
+        with tempfile.TemporaryDirectory(prefix='careercompass-load-') as workdir:
+            server, base_url = start_server(workers, args.threads, args.port, workdir, args)
+            try:
+                sessions = login_users(base_url, args.users)
+                samples = run_clients(base_url, sessions, endpoints, args)
+                report(workers, samples, args.duration)
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait(timeout=60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from retrieval_index import build_retrieval_index
+
+logger = logging.getLogger(__name__)
+
+
+# Columns every catalog row ends up with, and the value used when a source omits one
+CATALOG_COLUMNS = {
+    'title': '',
+    'description': '',
+    'category': 'General',
+    'difficulty': 'Intermediate',
+    'duration_hours': 0,
+    'rating': 0.0
+}
+
+
+def _normalize_chunk(frame):
+    """Keep the catalog columns, filling missing ones with their defaults"""
+    frame = frame.reset_index(drop=True)
+    columns = {}
+    for name, default in CATALOG_COLUMNS.items():
+        if name in frame:
+            columns[name] = frame[name].fillna(default)
+        else:
+            columns[name] = pd.Series([default] * len(frame), dtype=object if isinstance(default, str) else None)
+    chunk = pd.DataFrame(columns)
+    chunk['duration_hours'] = pd.to_numeric(chunk['duration_hours'], errors='coerce').fillna(0).astype(int)
+    chunk['rating'] = pd.to_numeric(chunk['rating'], errors='coerce').fillna(0.0).astype(float)
+    return chunk
+
+
+def iter_jsonl_chunks(path, chunk_size=10000, offset=0, digest=None):
+    """Yield (DataFrame, end offset) for the complete lines after byte offset.
+
+    A trailing line without a newline is still being written, so it is left
+    for the next call instead of being parsed half-finished. When a hashlib
+    digest is passed, every line consumed is fed into it.
+    """
+    rows = []
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            offset += len(line)
+            if digest is not None:
+                digest.update(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                logger.warning("⚠️ Skipping malformed catalog line ending at byte %s", offset)
+                continue
+            if len(rows) >= chunk_size:
+                yield _normalize_chunk(pd.DataFrame(rows)), offset
+                rows = []
+    if rows:
+        yield _normalize_chunk(pd.DataFrame(rows)), offset
+
+
+def iter_catalog_chunks(path, chunk_size=10000):
+    """Stream a CSV, JSONL or Parquet catalog as normalized DataFrame chunks"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        for chunk in pd.read_csv(path, chunksize=chunk_size):
+            yield _normalize_chunk(chunk)
+    elif extension in ('.jsonl', '.ndjson'):
+        for chunk, _ in iter_jsonl_chunks(path, chunk_size):
+            yield chunk
+    elif extension == '.parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet catalogs requires pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield _normalize_chunk(batch.to_pandas())
+    else:
+        raise ValueError(f"Unsupported catalog format '{extension}', expected .csv, .jsonl or .parquet")
+
+
+class CatalogVectorizer:
+    """Append-stable text features for catalog items.
+
+    Terms are hashed into a fixed feature space, so there is no vocabulary to
+    refit. Item vectors are L2-normalized term counts and never change once
+    indexed; IDF comes from running document frequencies and is applied to
+    the query only, so new items shift the weighting without re-vectorizing
+    the ones already in the index.
+    """
+
+    def __init__(self, n_features=2 ** 20):
+        self.hasher = HashingVectorizer(
+            n_features=n_features, stop_words='english', alternate_sign=False, norm=None, dtype=np.float32
+        )
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self.n_documents = 0
+
+    def add_documents(self, texts):
+        """Vectorize new items and fold them into the document frequencies"""
+        counts = self.hasher.transform(texts).tocsr()
+        # Build a new array rather than updating in place: searches may be reading the old one
+        self.document_frequency = self.document_frequency + np.bincount(
+            counts.indices, minlength=len(self.document_frequency)
+        )
+        self.n_documents += counts.shape[0]
+        return normalize(counts)
+
+    def transform_query(self, texts):
+        """IDF-weighted, L2-normalized query vectors"""
+        counts = self.hasher.transform(texts).tocsr()
+        idf = np.log((1 + self.n_documents) / (1 + self.document_frequency[counts.indices])) + 1
+        counts.data = (counts.data * idf).astype(np.float32)
+        return normalize(counts)
+
+
+class SegmentedIndex:
+    """Retrieval index that grows by appending segments.
+
+    Each appended chunk becomes its own segment. Whenever the newest segment
+    is at least as large as the one before it, the two are merged, so a
+    catalog of n items is spread over O(log n) segments. appended() returns a
+    new index and leaves this one untouched, so searches never see a
+    half-applied append.
+    """
+
+    def __init__(self, kind='inverted', segments=()):
+        self.kind = kind
+        # (first item, item matrix, retrieval index) per segment
+        self.segments = list(segments)
+        self.n_items = sum(matrix.shape[0] for _, matrix, _ in self.segments)
+
+    def appended(self, matrix):
+        """A new index with the rows of matrix added as items n_items, n_items + 1, ..."""
+        segments = list(self.segments)
+        start = self.n_items
+        while segments and segments[-1][1].shape[0] <= matrix.shape[0]:
+            start, older, _ = segments.pop()
+            matrix = sparse.vstack([older, matrix], format='csr')
+        segments.append((start, matrix, build_retrieval_index(matrix, self.kind)))
+        return SegmentedIndex(self.kind, segments)
+
+    def search(self, query, k):
+        """Return (item indices, scores) of the k best items across all segments"""
+        if not self.segments:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        candidates, scores = [], []
+        for start, _, index in self.segments:
+            segment_candidates, segment_scores = index.search(query, k)
+            candidates.append(segment_candidates + start)
+            scores.append(segment_scores)
+        candidates, scores = np.concatenate(candidates), np.concatenate(scores)
+        order = np.argsort(-scores, kind='stable')[:k]
+        return candidates[order], scores[order]
+
+
+class CourseCatalog:
+    """Course catalog streamed from a file, searchable by free text.
+
+    The catalog is read in chunks, so only the metadata columns and sparse
+    item vectors are kept in memory. poll() picks up changes to the source:
+    lines appended to a JSONL file whose indexed prefix still hashes the same
+    are vectorized and appended to the index, any other change (edits in
+    place, rewrites, a replaced file) rebuilds the catalog in a background
+    thread and swaps it in when it is ready. Searches always see a consistent
+    snapshot.
+    """
+
+    def __init__(self, path, chunk_size=10000, index_kind='inverted'):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.index_kind = index_kind
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self._watcher_pid = None
+        self._state = None
+
+    def _signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _prefix_unchanged(self, state, signature):
+        """Whether the bytes already indexed are still the start of the file.
+
+        Only then is growth an append: an edit in place or a rewrite that
+        happens to be longer must rebuild, or parsing would resume mid-line
+        and stale rows would stay in the index.
+        """
+        if signature[2] != state['signature'][2] or signature[1] < state['offset']:
+            return False
+        digest = hashlib.blake2b()
+        remaining = state['offset']
+        try:
+            with open(self.path, 'rb') as f:
+                while remaining:
+                    block = f.read(min(remaining, 1 << 20))
+                    if not block:
+                        return False
+                    digest.update(block)
+                    remaining -= len(block)
+        except OSError:
+            return False
+        return digest.digest() == state['digest'].digest()
+
+    @property
+    def is_jsonl(self):
+        return os.path.splitext(self.path)[1].lower() in ('.jsonl', '.ndjson')
+
+    def _build(self):
+        """Read the whole catalog into a new state"""
+        start = time.perf_counter()
+        signature = self._signature()
+        vectorizer = CatalogVectorizer()
+        index = SegmentedIndex(self.index_kind)
+        frames = []
+        offset = 0
+        digest = hashlib.blake2b()
+
+        if self.is_jsonl:
+            chunks = iter_jsonl_chunks(self.path, self.chunk_size, digest=digest)
+        else:
+            chunks = ((chunk, None) for chunk in iter_catalog_chunks(self.path, self.chunk_size))
+        for chunk, chunk_end in chunks:
+            index = index.appended(vectorizer.add_documents(chunk['title'] + ' ' + chunk['description']))
+            frames.append(chunk)
+            offset = chunk_end or offset
+
+        records = pd.concat(frames, ignore_index=True) if frames else _normalize_chunk(pd.DataFrame())
+        logger.info("📚 Loaded %d catalog courses from %s in %.1fs (%d segments)",
+                    len(records), self.path, time.perf_counter() - start, len(index.segments))
+        return {
+            'records': records,
+            'vectorizer': vectorizer,
+            'index': index,
+            'signature': signature,
+            'offset': offset,
+            'digest': digest
+        }
+
+    def load(self):
+        """Load the catalog synchronously"""
+        state = self._build()
+        with self._lock:
+            self._state = state
+        return self
+
+    def __len__(self):
+        return len(self._state['records']) if self._state else 0
+
+    def _append_tail(self, state, signature):
+        """Vectorize lines appended to a JSONL catalog since the last read"""
+        vectorizer = copy.copy(state['vectorizer'])
+        index = state['index']
+        frames = []
+        offset = state['offset']
+        digest = state['digest'].copy()
+        for chunk, offset in iter_jsonl_chunks(self.path, self.chunk_size, state['offset'], digest):
+            index = index.appended(vectorizer.add_documents(chunk['title'] + ' ' + chunk['description']))
+            frames.append(chunk)
+
+        records = pd.concat([state['records']] + frames, ignore_index=True) if frames else state['records']
+        with self._lock:
+            self._state = dict(
+                state, records=records, vectorizer=vectorizer, index=index, signature=signature,
+                offset=offset, digest=digest
+            )
+        if frames:
+            logger.info("📚 Appended %d catalog courses", sum(len(frame) for frame in frames))
+
+    def _rebuild_in_background(self):
+        def rebuild():
+            try:
+                state = self._build()
+                with self._lock:
+                    self._state = state
+            except Exception as e:
+                logger.warning("⚠️ Catalog reload failed, keeping the previous catalog: %s", e)
+            finally:
+                self._rebuilding = False
+
+        self._rebuilding = True
+        threading.Thread(target=rebuild, name='catalog-reload', daemon=True).start()
+
+    def poll(self):
+        """Pick up changes to the source file; returns True when a reload started"""
+        if self._rebuilding or self._state is None:
+            return False
+        try:
+            signature = self._signature()
+        except OSError as e:
+            logger.warning("⚠️ Catalog source unavailable: %s", e)
+            return False
+
+        state = self._state
+        if signature == state['signature']:
+            return False
+        if self.is_jsonl and self._prefix_unchanged(state, signature):
+            # Only new lines after the indexed prefix: keep the vectors of the rows already indexed
+            try:
+                self._append_tail(state, signature)
+            except Exception as e:
+                logger.warning("⚠️ Catalog append failed, rebuilding: %s", e)
+                self._rebuild_in_background()
+            return True
+        self._rebuild_in_background()
+        return True
+
+    def start_watching(self, interval=5.0):
+        """Poll the source file every interval seconds in a daemon thread.
+
+        Threads do not survive fork, so this is safe to call again in every
+        worker process; it only starts one watcher per process.
+        """
+        if self._watcher_pid == os.getpid():
+            return
+        self._watcher_pid = os.getpid()
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                self.poll()
+
+        threading.Thread(target=watch, name='catalog-watcher', daemon=True).start()
+
+    def search(self, texts, k):
+        """Top-k catalog rows for each query text: [(records, indices, scores)]"""
+        state = self._state
+        queries = state['vectorizer'].transform_query(texts)
+        return [
+            (state['records'], *state['index'].search(queries[i], k))
+            for i in range(queries.shape[0])
+        ]
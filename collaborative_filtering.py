@@ -0,0 +1,461 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+logger = logging.getLogger(__name__)
+
+
+class UserNeighborModel:
+    """User-based collaborative filtering over a sparse user x item matrix.
+
+    Ratings are kept in CSR form and each user's top-k most similar users
+    (cosine over rating rows) are precomputed. Similarities are computed a
+    block of users at a time, with blocks sized so that no block produces
+    more than max_block_pairs candidate pairs, so the users x users matrix
+    is never materialized and memory stays bounded however many users there
+    are. Recommendations are the neighbours' ratings weighted by similarity.
+
+    An item rated by m users creates m^2 candidate pairs, so items with more
+    than max_item_users raters only pair users through a fixed random sample
+    of max_item_users of them (as Mahout's item sampling does). Popular
+    items say little about taste anyway; the cap keeps the neighbour search
+    near-linear in the number of ratings.
+
+    add_interactions() applies new ratings online without refitting: they
+    go to a per-user delta overlay on top of the fitted matrix, and the
+    neighbour lists of the affected users are recomputed and stored as
+    overrides. The fitted arrays are never written, so they can stay
+    read-only and shared between forked workers.
+    """
+
+    def __init__(self, n_neighbors=20, max_item_users=500, max_block_pairs=5_000_000, random_state=42):
+        self.n_neighbors = n_neighbors
+        self.max_item_users = max_item_users
+        self.max_block_pairs = max_block_pairs
+        self.random_state = random_state
+
+    def fit(self, user_ids, item_ids, ratings, n_items=None):
+        """Build the rating matrix and neighbour lists from interaction triples.
+
+        Repeated (user, item) pairs are averaged, like a pivot table.
+        """
+        user_ids = np.asarray(user_ids)
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        ratings = np.asarray(ratings, dtype=np.float32)
+
+        self.user_ids, user_codes = np.unique(user_ids, return_inverse=True)
+        self.n_items = int(n_items if n_items is not None else item_ids.max() + 1 if len(item_ids) else 0)
+        shape = (len(self.user_ids), self.n_items)
+
+        totals = sparse.csr_matrix((ratings, (user_codes, item_ids)), shape=shape, dtype=np.float32)
+        counts = sparse.csr_matrix((np.ones_like(ratings), (user_codes, item_ids)), shape=shape, dtype=np.float32)
+        totals.sum_duplicates()
+        counts.sum_duplicates()
+        totals.data /= counts.data
+        self.ratings = totals
+        self.user_norms = np.sqrt(np.asarray(totals.multiply(totals).sum(axis=1)).ravel()).astype(np.float32)
+        # Item-major (sampled) copy, so neighbour searches only touch users who share an item
+        self.item_users = self._sample_item_users(totals.T.tocsr())
+
+        self._compute_neighbors()
+
+        # Online update overlay: user -> {item: rating}, item -> users, user -> (neighbours, similarities)
+        self.delta_rows = {}
+        self.delta_item_users = {}
+        self.neighbor_overrides = {}
+        return self
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop('_update_lock', None)
+        return state
+
+    def _user_code(self, user_id):
+        try:
+            position = np.searchsorted(self.user_ids, user_id)
+        except (TypeError, ValueError):
+            # e.g. an email address looked up among integer ids
+            return None
+        if position < len(self.user_ids) and self.user_ids[position] == user_id:
+            return int(position)
+        return None
+
+    def _blocks(self, unit, item_popularity):
+        """Split the users into row blocks of about max_block_pairs candidate pairs"""
+        # A user can pair with at most (sum of its items' popularity) other users
+        rows = np.repeat(np.arange(unit.shape[0]), np.diff(unit.indptr))
+        pairs = np.bincount(rows, weights=item_popularity[unit.indices], minlength=unit.shape[0])
+        cumulative = np.cumsum(np.minimum(pairs, unit.shape[0]))
+        if len(cumulative) == 0:
+            return []
+        limits = np.arange(self.max_block_pairs, cumulative[-1], self.max_block_pairs)
+        edges = np.unique(np.concatenate([[0], np.searchsorted(cumulative, limits, side='right'), [unit.shape[0]]]))
+        return list(zip(edges[:-1], edges[1:]))
+
+    def _sample_item_users(self, item_users):
+        """Keep at most max_item_users random raters per item (rows of an item x user CSR)"""
+        lengths = np.diff(item_users.indptr)
+        if self.max_item_users is None or lengths.max(initial=0) <= self.max_item_users:
+            return item_users
+
+        # Rank each item's raters by a random key and keep the first max_item_users
+        rng = np.random.default_rng(self.random_state)
+        items = np.repeat(np.arange(item_users.shape[0]), lengths)
+        order = np.lexsort((rng.random(item_users.nnz), items))
+        ranks = np.arange(item_users.nnz) - item_users.indptr[items[order]]
+        keep = np.sort(order[ranks < self.max_item_users])
+        indptr = np.concatenate([[0], np.cumsum(np.minimum(lengths, self.max_item_users))])
+        return sparse.csr_matrix(
+            (item_users.data[keep], item_users.indices[keep], indptr), shape=item_users.shape
+        )
+
+    @staticmethod
+    def _row_top_k(block, k, first_row, sample=256):
+        """Per-row top-k (column, value) of a duplicate-free CSR block (a sparse
+        product), excluding the diagonal"""
+        rows = np.repeat(np.arange(block.shape[0]), np.diff(block.indptr))
+        keep = (block.indices != rows + first_row) & (block.data > 0)
+        rows, columns, values = rows[keep], block.indices[keep], block.data[keep]
+
+        # The k-th best of a row's first `sample` entries is a lower bound for
+        # its k-th best overall, so everything below it can be dropped before
+        # sorting. Rows with fewer than k entries keep everything.
+        row_starts = np.searchsorted(rows, np.arange(block.shape[0]))
+        ranks = np.arange(len(rows)) - row_starts[rows]
+        if len(rows) > sample * block.shape[0] // 4 and sample > k:
+            head = ranks < sample
+            firsts = np.full((block.shape[0], sample), -np.inf, dtype=np.float32)
+            firsts[rows[head], ranks[head]] = values[head]
+            bounds = np.partition(firsts, sample - k, axis=1)[:, sample - k]
+            keep = values >= bounds[rows]
+            rows, columns, values = rows[keep], columns[keep], values[keep]
+
+        # Sort by row, then by decreasing similarity, and keep each row's first k
+        order = np.lexsort((-values, rows))
+        rows, columns, values = rows[order], columns[order], values[order]
+        row_starts = np.searchsorted(rows, np.arange(block.shape[0]))
+        ranks = np.arange(len(rows)) - row_starts[rows]
+        top = ranks < k
+        counts = np.bincount(rows[top], minlength=block.shape[0])
+        return counts, columns[top], values[top]
+
+    def _compute_neighbors(self):
+        """Top-k neighbours of every user, computed block by block"""
+        unit = normalize(self.ratings).astype(np.float32)
+        inverse_norms = 1.0 / np.maximum(self.user_norms, 1e-12)
+        unit_t = (self.item_users @ sparse.diags(inverse_norms)).tocsr().astype(np.float32)
+        item_popularity = np.diff(unit_t.indptr).astype(np.float64)
+
+        counts, neighbors, similarities = [], [], []
+        for start, end in self._blocks(unit, item_popularity):
+            block_counts, block_neighbors, block_similarities = self._row_top_k(
+                unit[start:end] @ unit_t, self.n_neighbors, start
+            )
+            counts.append(block_counts)
+            neighbors.append(block_neighbors.astype(np.int32))
+            similarities.append(block_similarities.astype(np.float32))
+
+        counts = np.concatenate(counts) if counts else np.zeros(0, dtype=np.int64)
+        self.neighbor_indptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.neighbors = np.concatenate(neighbors) if neighbors else np.zeros(0, dtype=np.int32)
+        self.neighbor_similarities = np.concatenate(similarities) if similarities else np.zeros(0, dtype=np.float32)
+
+    def _row(self, user_id):
+        """(items, ratings) of a user: the fitted row with the online updates applied"""
+        code = self._user_code(user_id)
+        if code is not None:
+            start, end = self.ratings.indptr[code], self.ratings.indptr[code + 1]
+            items, ratings = self.ratings.indices[start:end], self.ratings.data[start:end]
+        else:
+            items, ratings = np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+        delta = self.delta_rows.get(user_id)
+        if delta:
+            merged = dict(zip(items.tolist(), ratings.tolist()))
+            merged.update(delta)
+            items = np.fromiter(merged.keys(), dtype=np.int64, count=len(merged))
+            ratings = np.fromiter(merged.values(), dtype=np.float32, count=len(merged))
+        return items, ratings
+
+    def has_user(self, user_id):
+        """True for users with ratings in the model, fitted or added online"""
+        return user_id in self.delta_rows or self._user_code(user_id) is not None
+
+    def neighbors_of(self, user_id):
+        """(neighbour user ids, similarities) of a user, most similar first"""
+        override = self.neighbor_overrides.get(user_id)
+        if override is not None:
+            return override
+        code = self._user_code(user_id)
+        if code is None:
+            return self.user_ids[:0], np.zeros(0, dtype=np.float32)
+        start, end = self.neighbor_indptr[code], self.neighbor_indptr[code + 1]
+        return self.user_ids[self.neighbors[start:end]], self.neighbor_similarities[start:end]
+
+    def _score(self, neighbor_ids, similarities, seen_items, n):
+        """Similarity-weighted neighbour ratings, top n unseen items"""
+        if len(neighbor_ids) == 0 or self.n_items == 0 or similarities.sum() <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        # Normalized by the total similarity, so scores stay on the rating scale
+        weights = similarities / similarities.sum()
+        scores = np.zeros(self.n_items, dtype=np.float32)
+        for neighbor_id, weight in zip(neighbor_ids, weights):
+            items, ratings = self._row(neighbor_id)
+            scores[items] += weight * ratings
+        scores[np.asarray(seen_items, dtype=np.int64)] = 0
+        items = np.flatnonzero(scores)
+        values = scores[items]
+
+        if len(items) > n:
+            best = np.argpartition(-values, n - 1)[:n]
+            items, values = items[best], values[best]
+        order = np.argsort(-values, kind='stable')
+        return items[order].astype(np.int64), values[order].astype(np.float32)
+
+    def recommend(self, user_id, n=10):
+        """(item ids, scores) for a user; empty for users without neighbours"""
+        neighbor_ids, similarities = self.neighbors_of(user_id)
+        return self._score(neighbor_ids, similarities, self._row(user_id)[0], n)
+
+    def _similar_users(self, item_ids, ratings, exclude=None):
+        """(user ids, cosine similarities) of every user sharing an item with a rating vector"""
+        norm = float(np.linalg.norm(ratings))
+        if len(item_ids) == 0 or norm == 0:
+            return [], np.zeros(0, dtype=np.float32)
+
+        # Fitted users: one sparse product over the items' (sampled) raters
+        overlap = (sparse.csr_matrix(ratings[np.newaxis, :].astype(np.float32)) @ self.item_users[item_ids]).tocoo()
+        codes, dots = overlap.col, overlap.data
+        similarities = dots / (np.maximum(self.user_norms[codes], 1e-12) * norm)
+        user_ids = self.user_ids[codes].tolist()
+
+        # Users with online updates who share an item with the query: fitted
+        # raters of its items with a delta row, plus the items' new raters.
+        # Exact similarity against their current rows.
+        delta_rows = self.delta_rows
+        updated = {user_id for user_id in user_ids if user_id in delta_rows}
+        for item in item_ids.tolist():
+            updated.update(self.delta_item_users.get(item, ()))
+        if updated:
+            keep = [i for i, user_id in enumerate(user_ids) if user_id not in updated]
+            user_ids = [user_ids[i] for i in keep]
+            similarities = similarities[keep].tolist()
+            query = dict(zip(item_ids.tolist(), ratings.tolist()))
+            for user_id in updated:
+                items, user_ratings = self._row(user_id)
+                user_norm = float(np.linalg.norm(user_ratings))
+                dot = sum(query.get(item, 0.0) * rating for item, rating in zip(items.tolist(), user_ratings.tolist()))
+                if dot > 0 and user_norm > 0:
+                    user_ids.append(user_id)
+                    similarities.append(dot / (user_norm * norm))
+            similarities = np.asarray(similarities, dtype=np.float32)
+
+        if exclude is not None:
+            keep = [i for i, user_id in enumerate(user_ids) if user_id != exclude]
+            user_ids, similarities = [user_ids[i] for i in keep], similarities[keep]
+        return user_ids, similarities
+
+    def _top_neighbors(self, user_ids, similarities):
+        if len(user_ids) > self.n_neighbors:
+            best = np.argpartition(-similarities, self.n_neighbors - 1)[:self.n_neighbors]
+        else:
+            best = np.arange(len(user_ids))
+        best = best[np.argsort(-similarities[best], kind='stable')]
+        return np.asarray([user_ids[i] for i in best], dtype=object), similarities[best]
+
+    def recommend_for_ratings(self, item_ids, ratings, n=10):
+        """(item ids, scores) for an ad-hoc rating vector, e.g. a user not in the model"""
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        valid = (item_ids >= 0) & (item_ids < self.n_items)
+        item_ids, ratings = item_ids[valid], np.asarray(ratings, dtype=np.float32)[valid]
+        if len(item_ids) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        item_ids, positions = np.unique(item_ids, return_inverse=True)
+        ratings = np.bincount(positions, weights=ratings).astype(np.float32)
+        neighbor_ids, similarities = self._top_neighbors(*self._similar_users(item_ids, ratings))
+        return self._score(neighbor_ids, similarities, item_ids, n)
+
+    def add_interactions(self, user_ids, item_ids, ratings):
+        """Apply new ratings online; returns the number of users whose neighbours changed.
+
+        A user keeps the highest rating it gave an item. The updated users'
+        neighbour lists are recomputed, and each updated user is inserted
+        into the lists of the users it now beats (reverse neighbours). New
+        raters of an item are indexed in delta_item_users, so neighbour
+        searches only re-score online-updated users who share an item with
+        the query. Everything else stays as fitted until the next full fit.
+        """
+        lock = self.__dict__.setdefault('_update_lock', threading.Lock())
+        with lock:
+            updated = {}
+            for user_id, item, rating in zip(user_ids, item_ids, ratings):
+                item = int(item)
+                if not 0 <= item < self.n_items:
+                    continue
+                row = updated.get(user_id)
+                if row is None:
+                    row = dict(self.delta_rows.get(user_id, {}))
+                    updated[user_id] = row
+                if item not in row:
+                    items, current = self._row(user_id)
+                    previous = current[items == item]
+                    if len(previous) == 0:
+                        self.delta_item_users[item] = self.delta_item_users.get(item, frozenset()) | {user_id}
+                    row[item] = max(float(previous[0]) if len(previous) else 0.0, float(rating))
+                else:
+                    row[item] = max(row[item], float(rating))
+
+            # Publish whole new rows so concurrent readers never see a half-updated one
+            self.delta_rows.update(updated)
+            for user_id in updated:
+                self._refresh_neighbors(user_id)
+            return len(updated)
+
+    def _refresh_neighbors(self, user_id):
+        """Recompute a user's neighbours and offer the user to theirs"""
+        items, ratings = self._row(user_id)
+        candidates, similarities = self._similar_users(items, ratings, exclude=user_id)
+        self.neighbor_overrides[user_id] = self._top_neighbors(candidates, similarities)
+
+        for candidate, similarity in zip(candidates, similarities.tolist()):
+            neighbor_ids, neighbor_similarities = self.neighbors_of(candidate)
+            full = len(neighbor_ids) >= self.n_neighbors
+            if full and similarity <= neighbor_similarities[-1] and user_id not in neighbor_ids:
+                continue
+            pairs = [(n, s) for n, s in zip(neighbor_ids.tolist(), neighbor_similarities.tolist()) if n != user_id]
+            pairs.append((user_id, similarity))
+            pairs.sort(key=lambda pair: -pair[1])
+            pairs = pairs[:self.n_neighbors]
+            self.neighbor_overrides[candidate] = (
+                np.asarray([n for n, _ in pairs], dtype=object),
+                np.asarray([s for _, s in pairs], dtype=np.float32)
+            )
+
+
+class InteractionUpdater:
+    """Applies tracked interactions to a UserNeighborModel in the background.
+
+    record() only enqueues, so request handlers return immediately; a daemon
+    thread drains the queue in batches every flush_interval seconds at most.
+    The thread is started per process, so preforked workers each run one.
+
+    With replay_from(), the thread also polls a shared interaction log (e.g.
+    a database table every worker writes to) and applies the events it has
+    not seen yet, so every worker learns from interactions tracked by the
+    others. Updates keep the highest rating per (user, item), so an event
+    applied both from the local queue and from the log counts once.
+    """
+
+    def __init__(self, model, flush_interval=0.5, batch_size=256):
+        self.model = model
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._worker_pid = None
+        self._worker_lock = threading.Lock()
+        self._fetch_since = None
+        self._replay_interval = None
+        self._replay_lock = threading.Lock()
+        self.last_replayed_id = 0
+        self._stats_lock = threading.Lock()
+        self.stats = {'received': 0, 'applied': 0, 'replayed': 0, 'users_updated': 0, 'errors': 0, 'last_apply_ms': 0.0}
+
+    def record(self, user_id, item_id, rating):
+        """Queue one interaction"""
+        self.ensure_running()
+        self._queue.put((user_id, item_id, rating))
+        with self._stats_lock:
+            self.stats['received'] += 1
+
+    def replay_from(self, fetch_since, interval=1.0):
+        """Poll fetch_since(last_id) every interval seconds for new events.
+
+        fetch_since returns (id, user_id, item_id, rating) rows with ids above
+        last_id, oldest first (an empty list when there are none).
+        """
+        self._fetch_since = fetch_since
+        self._replay_interval = interval
+
+    def ensure_running(self):
+        """Start the update thread if this process has none yet (e.g. after a fork)"""
+        if self._worker_pid == os.getpid():
+            return
+        with self._worker_lock:
+            if self._worker_pid != os.getpid():
+                self._worker_pid = os.getpid()
+                threading.Thread(target=self._run, name='interaction-updater', daemon=True).start()
+
+    def _run(self):
+        next_replay = time.monotonic()
+        while True:
+            if self._fetch_since is not None and time.monotonic() >= next_replay:
+                self.replay()
+                next_replay = time.monotonic() + self._replay_interval
+            try:
+                timeout = max(next_replay - time.monotonic(), 0) if self._fetch_since is not None else None
+                batch = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self.flush(batch)
+
+    def replay(self):
+        """Apply the shared log's events this process has not applied yet; returns how many"""
+        if self._fetch_since is None:
+            return 0
+        with self._replay_lock:
+            replayed = 0
+            while True:
+                try:
+                    rows = self._fetch_since(self.last_replayed_id)
+                except Exception as e:
+                    logger.warning("⚠️ Interaction replay error: %s", e)
+                    with self._stats_lock:
+                        self.stats['errors'] += 1
+                    return replayed
+                if not rows:
+                    return replayed
+                self.flush([row[1:] for row in rows])
+                self.last_replayed_id = rows[-1][0]
+                replayed += len(rows)
+                with self._stats_lock:
+                    self.stats['replayed'] += len(rows)
+
+    def flush(self, batch):
+        """Apply a batch of (user_id, item_id, rating) events synchronously"""
+        start = time.perf_counter()
+        try:
+            user_ids, item_ids, ratings = zip(*batch)
+            users_updated = self.model.add_interactions(user_ids, item_ids, ratings)
+            with self._stats_lock:
+                self.stats['applied'] += len(batch)
+                self.stats['users_updated'] += users_updated
+                self.stats['last_apply_ms'] = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            logger.warning("⚠️ Interaction update error: %s", e)
+            with self._stats_lock:
+                self.stats['errors'] += 1
+
+    def snapshot(self):
+        """Counters for monitoring"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['pending'] = self._queue.qsize()
+        stats['last_replayed_id'] = self.last_replayed_id
+        return stats
@@ -0,0 +1,38 @@
+# Gunicorn settings for a preload-then-fork deployment:
+#   gunicorn -c gunicorn.conf.py app:app
+# The master imports app.py, waits for the engine warm-up (building the ML
+# engines once), freezes them, and forked workers share the model pages
+# copy-on-write. With GUNICORN_PRELOAD=0 every worker imports app.py itself
+# and starts serving pages while its engines warm up in the background.
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '4'))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    import app
+    from ml_models_fixed import freeze_engines, process_memory_report
+    # Workers must not fork while the warm-up thread is still building engines
+    app.wait_until_ready()
+    freeze_engines()
+    server.log.info("Master memory after preload: %s", process_memory_report())
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        return
+    from ml_models_fixed import process_memory_report
+    worker.log.info("Worker %s memory: %s", worker.pid, process_memory_report())
+
+
+def post_fork(server, worker):
+    # Each worker opens its own database connections
+    from app import app
+    import storage
+    storage.reset_connections(app)
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from prompt_templates import estimate_tokens
+
+
+# Every client exposes the part of google.generativeai.GenerativeModel the engine uses:
+#   generate_content(prompt, generation_config=None, stream=False, request_options=None)
+# returning an object with .text (and optionally .usage_metadata), or with stream=True
+# an iterable of chunks that each have .text
+LLM_BACKENDS = ('gemini', 'fake', 'record', 'replay')
+
+_ARRAY_KEY_PATTERN = re.compile(r'\{"(\w+)":\[\{(.*?)\}\]')
+_FIELD_PATTERN = re.compile(r'"(\w+)"')
+
+
+class ReplayMiss(RuntimeError):
+    """No recorded response matches the prompt"""
+
+
+def parse_latency(spec):
+    """Sampler for a latency spec, in seconds:
+
+    fixed:S, uniform:LOW:HIGH, exponential:MEAN or lognormal:MEDIAN:SIGMA
+    """
+    name, _, params = spec.partition(':')
+    values = [float(value) for value in params.split(':') if value]
+    if name == 'fixed' and len(values) == 1:
+        return lambda rng: values[0]
+    if name == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if name == 'exponential' and len(values) == 1:
+        return lambda rng: rng.expovariate(1.0 / values[0])
+    if name == 'lognormal' and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Invalid latency spec '{spec}'")
+
+
+def _api_exceptions():
+    """google.api_core.exceptions, imported on first use because it loads grpc"""
+    from google.api_core import exceptions
+    return exceptions
+
+
+def _usage(prompt, text):
+    return SimpleNamespace(prompt_token_count=estimate_tokens(prompt), candidates_token_count=estimate_tokens(text))
+
+
+def _chunks(text, count):
+    size = max(len(text) // max(count, 1), 1)
+    return [text[i:i + size] for i in range(0, len(text), size)] or ['']
+
+
+def _stream(prompt, text, chunk_count, total_seconds):
+    """Chunks of text spread over total_seconds: the first after half of it, the rest evenly after that"""
+    pieces = _chunks(text, chunk_count)
+    time.sleep(total_seconds / 2)
+    gap = total_seconds / 2 / len(pieces)
+    for index, piece in enumerate(pieces):
+        if index:
+            time.sleep(gap)
+        last = index == len(pieces) - 1
+        yield SimpleNamespace(text=piece, usage_metadata=_usage(prompt, text) if last else None)
+
+
+class FakeLLMClient:
+    """Local stand-in for Gemini that answers with generated JSON after a sampled delay.
+
+    The JSON follows the response schema in generation_config when there is
+    one, otherwise the field list in the prompt. error_rate of the calls fail
+    with ServiceUnavailable, after the sampled delay like a real outage.
+    """
+
+    def __init__(self, latency='lognormal:1.5:0.5', error_rate=0.0, stream_chunks=8, items=6, seed=None):
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.stream_chunks = stream_chunks
+        self.items = items
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self):
+        with self._lock:
+            return self.sample_latency(self._rng), self._rng.random() < self.error_rate
+
+    def _response_shape(self, prompt, generation_config):
+        schema = (generation_config or {}).get('response_schema')
+        if schema:
+            array_key = schema['required'][0]
+            item = schema['properties'][array_key]['items']['properties']
+            return array_key, {name: spec['type'] for name, spec in item.items()}
+        match = _ARRAY_KEY_PATTERN.search(prompt)
+        if match is None:
+            return 'items', {'name': 'STRING'}
+        return match.group(1), {name: 'STRING' for name in _FIELD_PATTERN.findall(match.group(2))}
+
+    def render(self, prompt, generation_config=None):
+        """The JSON text the fake answers prompt with (deterministic per prompt)"""
+        array_key, fields = self._response_shape(prompt, generation_config)
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+        values = {
+            'STRING': lambda name, i: f"Fake {name} {digest}-{i}",
+            'INTEGER': lambda name, i: 95 - 5 * i,
+            'BOOLEAN': lambda name, i: True,
+            'ARRAY': lambda name, i: [f"skill {i}", "fake"]
+        }
+        items = [
+            {name: values.get(kind, values['STRING'])(name, i) for name, kind in fields.items()}
+            for i in range(self.items)
+        ]
+        return json.dumps({array_key: items, 'ml_insights': {'source': 'fake-llm'}})
+
+    def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+        delay, fail = self._draw()
+        timeout = (request_options or {}).get('timeout')
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise _api_exceptions().DeadlineExceeded(f"Fake LLM exceeded the {timeout:.1f}s timeout")
+        text = self.render(prompt, generation_config)
+        if fail:
+            time.sleep(delay)
+            raise _api_exceptions().ServiceUnavailable('Fake LLM injected error')
+        if stream:
+            return _stream(prompt, text, self.stream_chunks, delay)
+        time.sleep(delay)
+        return SimpleNamespace(text=text, usage_metadata=_usage(prompt, text))
+
+
+def recording_key(prompt):
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+class RecordingClient:
+    """Passes calls through to another client and appends every response to a JSONL file"""
+
+    def __init__(self, client, path, model_name=None):
+        self.client = client
+        self.path = path
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _record(self, prompt, text, started_at):
+        line = json.dumps({
+            'key': recording_key(prompt),
+            'model': self.model_name,
+            'prompt': prompt,
+            'text': text,
+            'latency_ms': round((time.perf_counter() - started_at) * 1000, 1)
+        })
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as recording:
+                recording.write(line + '\n')
+
+    def _recorded_stream(self, prompt, stream, started_at):
+        pieces = []
+        for chunk in stream:
+            pieces.append(chunk.text)
+            yield chunk
+        self._record(prompt, ''.join(pieces), started_at)
+
+    def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+        started_at = time.perf_counter()
+        options = {'request_options': request_options} if request_options else {}
+        response = self.client.generate_content(prompt, generation_config=generation_config, stream=stream, **options)
+        if stream:
+            return self._recorded_stream(prompt, response, started_at)
+        self._record(prompt, response.text, started_at)
+        return response
+
+
+class ReplayClient:
+    """Serves responses captured by RecordingClient, matched on the exact prompt.
+
+    Responses are replayed after their recorded latency (scaled by
+    latency_scale). Prompts that were never recorded go to fallback, or raise
+    ReplayMiss when there is none.
+    """
+
+    def __init__(self, path, fallback=None, latency_scale=1.0, stream_chunks=8):
+        self.fallback = fallback
+        self.latency_scale = latency_scale
+        self.stream_chunks = stream_chunks
+        self.responses = {}
+        self.misses = 0
+        with open(path, encoding='utf-8') as recording:
+            for line in recording:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.responses[entry['key']] = entry
+
+    def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+        entry = self.responses.get(recording_key(prompt))
+        if entry is None:
+            self.misses += 1
+            if self.fallback is None:
+                raise ReplayMiss(f"No recorded response for prompt {recording_key(prompt)[:12]}")
+            return self.fallback.generate_content(
+                prompt, generation_config=generation_config, stream=stream, request_options=request_options
+            )
+        delay = entry.get('latency_ms', 0) / 1000.0 * self.latency_scale
+        if stream:
+            return _stream(prompt, entry['text'], self.stream_chunks, delay)
+        time.sleep(delay)
+        return SimpleNamespace(text=entry['text'], usage_metadata=_usage(prompt, entry['text']))
+
+
+def fake_client_from_env():
+    return FakeLLMClient(
+        latency=os.environ.get('CAREERCOMPASS_FAKE_LLM_LATENCY', 'lognormal:1.5:0.5'),
+        error_rate=float(os.environ.get('CAREERCOMPASS_FAKE_LLM_ERROR_RATE', 0.0)),
+        stream_chunks=int(os.environ.get('CAREERCOMPASS_FAKE_LLM_STREAM_CHUNKS', 8)),
+        seed=os.environ.get('CAREERCOMPASS_FAKE_LLM_SEED')
+    )
+
+
+def create_llm_client(backend, model_name, recording_path=None, api_key=None):
+    """Client for backend: gemini (the real API), fake (local generator), record (gemini,
+    saving responses to recording_path) or replay (recorded responses, fake for misses).
+    The Gemini SDK is only imported for the backends that call it."""
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{backend}', expected one of {list(LLM_BACKENDS)}")
+    if backend == 'fake':
+        return fake_client_from_env()
+    if backend == 'replay':
+        return ReplayClient(
+            recording_path, fallback=fake_client_from_env(),
+            latency_scale=float(os.environ.get('CAREERCOMPASS_REPLAY_LATENCY_SCALE', 1.0))
+        )
+
+    import google.generativeai as genai
+    if api_key:
+        genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(model_name)
+    if backend == 'record':
+        return RecordingClient(model, recording_path, model_name)
+    return model
@@ -0,0 +1,175 @@
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(text):
+    """json.loads, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+_FENCE_PATTERN = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$', re.IGNORECASE)
+
+
+def repair_json(text):
+    """Close a JSON document that was cut off, dropping its incomplete last element.
+
+    The text is cut back to the end of the last complete value (the last
+    closing bracket or separating comma outside a string) and the brackets
+    still open at that point are closed. Returns None when nothing complete
+    is left.
+    """
+    stack = []
+    in_string = escape = False
+    cut, cut_stack = None, None
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]':
+            if not stack:
+                break
+            stack.pop()
+            cut, cut_stack = i + 1, list(stack)
+            if not stack:
+                break
+        elif ch == ',' and stack:
+            cut, cut_stack = i, list(stack)
+    if cut is None:
+        return None
+    return text[:cut].rstrip().rstrip(',') + ''.join(reversed(cut_stack))
+
+
+def parse_llm_json(text):
+    """Parse the JSON object in a model response, repairing a truncated tail.
+
+    Accepts bare JSON, JSON in a ```json fence and JSON surrounded by prose.
+    Returns None when no object can be recovered.
+    """
+    if not text:
+        return None
+    text = _FENCE_PATTERN.sub('', text)
+    try:
+        value = loads(text)
+        return value if isinstance(value, dict) else None
+    except ValueError:
+        pass
+
+    start = text.find('{')
+    if start < 0:
+        return None
+    try:
+        # Complete object followed by trailing prose
+        value, _ = json.JSONDecoder().raw_decode(text, start)
+        return value if isinstance(value, dict) else None
+    except ValueError:
+        pass
+
+    repaired = repair_json(text[start:])
+    if repaired is None:
+        return None
+    try:
+        value = loads(repaired)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def validate_array_response(value, array_key, required_fields=()):
+    """Keep the array items that are objects with every required field.
+
+    Returns the response object with the cleaned array, or None when no
+    usable item is left.
+    """
+    if not isinstance(value, dict) or not isinstance(value.get(array_key), list):
+        return None
+    items = [
+        item for item in value[array_key]
+        if isinstance(item, dict) and all(item.get(field) not in (None, '') for field in required_fields)
+    ]
+    if not items:
+        return None
+    return dict(value, **{array_key: items})
+
+
+class JSONArrayStreamParser:
+    """Incrementally extract the objects of one JSON array from streamed LLM text.
+
+    Feed the text chunks as they arrive; each call returns the objects of the
+    array under array_key that became complete with that chunk, so callers can
+    forward results long before the whole document has been generated.
+    """
+
+    def __init__(self, array_key):
+        self.array_key = array_key
+        self.buffer = ''
+        self.finished = False
+        self._array_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(array_key))
+        self._in_array = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = None
+
+    def feed(self, text):
+        """Add a chunk of text and return the newly completed array objects"""
+        self.buffer += text
+        objects = []
+        if self.finished:
+            return objects
+
+        if not self._in_array:
+            match = self._array_pattern.search(self.buffer)
+            if match is None:
+                return objects
+            self._in_array = True
+            self._pos = match.end()
+
+        buffer = self.buffer
+        i = self._pos
+        while i < len(buffer):
+            ch = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == '{':
+                if self._depth == 0:
+                    self._object_start = i
+                self._depth += 1
+            elif ch == '}':
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    try:
+                        objects.append(json.loads(buffer[self._object_start:i + 1]))
+                    except ValueError:
+                        pass
+                    self._object_start = None
+            elif ch == ']' and self._depth == 0:
+                self.finished = True
+                i += 1
+                break
+            i += 1
+
+        self._pos = i
+        return objects
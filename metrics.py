@@ -0,0 +1,186 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Seconds; spans sub-millisecond model stages up to slow Gemini calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format(value):
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f'{self.name}{_label_text(self.labelnames, key)} {_format(value)}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination, in the Prometheus layout"""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _label_text(self.labelnames, key, [('le', _format(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _label_text(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Metrics are kept per process: behind gunicorn every worker reports its own
+# series, so scrape each worker or aggregate by instance
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'careercompass_stage_seconds', 'Time spent in each hot-path stage', ('stage',)
+)
+GEMINI_SECONDS = REGISTRY.histogram(
+    'careercompass_gemini_seconds', 'Gemini latency to the first token (ttft) and to the full response (total)',
+    ('endpoint', 'phase')
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'careercompass_http_request_seconds', 'Request handling time by route', ('route', 'method', 'status')
+)
+FALLBACKS = REGISTRY.counter(
+    'careercompass_fallbacks_total', 'Requests answered with ML-only results instead of Gemini', ('endpoint', 'reason')
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    'careercompass_cache_lookups_total', 'Cache lookups by cache and result', ('cache', 'result')
+)
+MODEL_ERRORS = REGISTRY.counter(
+    'careercompass_model_errors_total', 'ML model calls that failed and fell back', ('stage',)
+)
+
+# Stage timings of the request being handled, for its Server-Timing header
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+def start_request():
+    """Begin collecting stage timings for the current request; returns a token for end_request()"""
+    return _request_timings.set([])
+
+
+def request_timings():
+    """[(stage, seconds)] recorded so far for the current request"""
+    return list(_request_timings.get() or [])
+
+
+def end_request(token):
+    """Stop collecting and return the request's [(stage, seconds)]"""
+    timings = _request_timings.get()
+    _request_timings.reset(token)
+    return timings or []
+
+
+def record_stage(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    add_request_timing(stage, seconds)
+
+
+def add_request_timing(name, seconds):
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def timed(stage):
+    """Time the enclosed block as stage, in the histogram and the current request's timings"""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started_at)
+
+
+def submit(executor, fn, *args):
+    """executor.submit() that keeps the caller's context, so stage timings reach its request"""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def server_timing_header(timings, total_seconds):
+    """Server-Timing value: summed milliseconds per stage plus the request total"""
+    totals = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    parts = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in totals.items()]
+    parts.append(f'total;dur={total_seconds * 1000:.1f}')
+    return ', '.join(parts)
@@ -1,17 +1,62 @@
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.cluster import KMeans
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 import joblib
 import json
+import gc
+import logging
+import hashlib
+import os
+import threading
+import time
 from datetime import datetime
 import warnings
+from retrieval_index import RetrievalIndex, build_retrieval_index
+from catalog_loader import CourseCatalog
+from collaborative_filtering import InteractionUpdater, UserNeighborModel
+from preference_model import PREFERENCE_MODEL_VERSION, TwoTowerPreferenceModel
+from metrics import CACHE_LOOKUPS, MODEL_ERRORS, timed
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
+# Trained model artifacts are persisted here so workers load instead of retraining.
+# Bump MODEL_ARTIFACT_VERSION whenever the bundle layout or training code changes.
+MODEL_ARTIFACT_VERSION = 4
+MODEL_ARTIFACT_DIR = os.environ.get(
+    'CAREERCOMPASS_MODEL_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_artifacts')
+)
+MODEL_ARTIFACT_NAME = 'ml_engine'
+
+# Top-k search structure over the course TF-IDF matrix (see retrieval_index.py)
+RETRIEVAL_INDEX_KIND = os.environ.get('CAREERCOMPASS_RETRIEVAL_INDEX', 'inverted')
+
+# Share of the collaborative filtering score in get_hybrid_recommendations
+COLLABORATIVE_WEIGHT = 0.3
+
+# Implicit rating given to a course by each tracked interaction type
+INTERACTION_RATINGS = {'view': 1.0, 'save': 3.0, 'complete': 5.0}
+
+# Optional course catalog file (CSV, JSONL or Parquet) served instead of the sample courses
+CATALOG_PATH = os.environ.get('CAREERCOMPASS_CATALOG_PATH')
+CATALOG_POLL_SECONDS = float(os.environ.get('CAREERCOMPASS_CATALOG_POLL_SECONDS', '5'))
+
+# Career predictions kept per process; the oldest are dropped first once full
+CAREER_MEMO_MAX_ENTRIES = 50000
+
+# Exported NumPy weights of the DL engine's two-tower preference model
+PREFERENCE_MODEL_PATH = os.path.join(MODEL_ARTIFACT_DIR, 'preference_model.npz')
+PREFERENCE_MODEL_PARAMS = {'hidden_dim': 32, 'embedding_dim': 16, 'epochs': 400, 'learning_rate': 0.01}
+# Training positives: each sample user's top courses by TF-IDF similarity, plus courses they rated this high
+PREFERENCE_CONTENT_POSITIVES = 3
+PREFERENCE_MIN_RATING = 4
+
 class MLRecommendationEngine:
     def __init__(self):
         self.tfidf_vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
@@ -19,24 +64,41 @@ class MLRecommendationEngine:
         self.career_classifier = RandomForestClassifier(n_estimators=100, random_state=42)
         self.scaler = StandardScaler()
         self.label_encoder = LabelEncoder()
+        self.artifact_checksum = None
+        self.catalog = None
+        self.interaction_updater = None
+        self._feature_buffers = threading.local()
+        self._career_memo = (None, {})
+        self._career_memo_lock = threading.Lock()
+        self._career_memo_stats = {'hits': 0, 'misses': 0}
         
         # Initialize with sample data
         try:
             self._initialize_sample_data()
-            self._train_models()
-            print("✅ ML Recommendation Engine initialized!")
+            self.training_fingerprint = self._training_fingerprint()
+            if not self._load_artifacts():
+                self._train_models()
+                self._save_artifacts()
+            self.retrieval_index = build_retrieval_index(self.tfidf_matrix, RETRIEVAL_INDEX_KIND)
+            if self.collaborative_model is not None:
+                self.interaction_updater = InteractionUpdater(self.collaborative_model)
+            self._load_catalog()
+            logger.info("✅ ML Recommendation Engine initialized!")
         except Exception as e:
-            print(f"⚠️ ML Engine initialization error: {e}")
-            print("🔄 Using simplified ML mode...")
+            logger.warning("⚠️ ML Engine initialization error: %s", e)
+            logger.info("🔄 Using simplified ML mode...")
             self._initialize_simple_mode()
     
     def _initialize_simple_mode(self):
         """Initialize with minimal functionality if full ML fails"""
         self.simple_mode = True
-        print("✅ Simple ML mode activated!")
+        logger.info("✅ Simple ML mode activated!")
     
     def _initialize_sample_data(self):
         """Initialize with sample training data"""
+        # Seed first so the sample data (and therefore the artifact fingerprint) is reproducible
+        np.random.seed(42)
+        
         # Sample course data
         self.courses_data = pd.DataFrame({
             'title': [
@@ -106,7 +168,6 @@ class MLRecommendationEngine:
         })
         
         # Sample interaction data
-        np.random.seed(42)
         self.interactions = pd.DataFrame({
             'user_id': np.random.randint(1, 101, 500),
             'course_id': np.random.randint(0, 20, 500),
@@ -119,7 +180,7 @@ class MLRecommendationEngine:
     
     def _train_models(self):
         """Train all ML models with proper error handling"""
-        print("🤖 Training ML models...")
+        logger.info("🤖 Training ML models...")
         
         try:
             # 1. Content-based recommendation using TF-IDF
@@ -157,38 +218,261 @@ class MLRecommendationEngine:
             
             self.career_classifier.fit(X_train_scaled, y_train)
             accuracy = self.career_classifier.score(X_test_scaled, y_test)
-            print(f"✅ Career prediction model accuracy: {accuracy:.2f}")
+            logger.info("✅ Career prediction model accuracy: %.2f", accuracy)
+            self.career_feature_layout = self._compile_career_feature_layout(features.columns)
+            
+            # 4. Per-cluster statistics used by get_user_cluster_insights
+            self.cluster_stats = self._compute_cluster_stats()
             
-            # 4. Collaborative filtering similarity matrix
+            # 5. Collaborative filtering similarity matrix
             self._build_collaborative_filtering()
             
-            print("✅ All ML models trained successfully!")
+            logger.info("✅ All ML models trained successfully!")
             
         except Exception as e:
-            print(f"❌ ML training error: {e}")
+            logger.exception("❌ ML training error: %s", e)
             raise e
     
-    def _build_collaborative_filtering(self):
-        """Build collaborative filtering recommendation system"""
+    def _compile_career_feature_layout(self, columns):
+        """Fix the career classifier's input layout at training time.
+        
+        Inference then fills a NumPy row by index (education one-hot, experience,
+        a slice of the TF-IDF vector) and applies the fitted StandardScaler as
+        row * scale_mul + scale_add, without building any DataFrames.
+        """
+        columns = [str(column) for column in columns]
+        tfidf_columns = [i for i, column in enumerate(columns) if column.startswith('tfidf_')]
+        return {
+            'n_features': len(columns),
+            'education_columns': {
+                column[len('education_level_'):]: i
+                for i, column in enumerate(columns) if column.startswith('education_level_')
+            },
+            'experience_column': columns.index('experience_years'),
+            'tfidf_offset': tfidf_columns[0],
+            'tfidf_width': len(tfidf_columns),
+            'scale_mul': 1.0 / self.scaler.scale_,
+            'scale_add': -self.scaler.mean_ / self.scaler.scale_
+        }
+    
+    def _compute_cluster_stats(self):
+        """Precompute the K-Means cluster summaries served by get_user_cluster_insights"""
+        cluster_stats = {}
+        for cluster_id, cluster_users in self.user_profiles.groupby('cluster'):
+            cluster_stats[int(cluster_id)] = {
+                'cluster_size': len(cluster_users),
+                'common_career_goals': cluster_users['career_goal'].value_counts().head(3).to_dict(),
+                'average_experience': float(cluster_users['experience_years'].mean()),
+                'common_education_levels': cluster_users['education_level'].value_counts().head(3).to_dict()
+            }
+        return cluster_stats
+    
+    def _training_fingerprint(self):
+        """Hash the training inputs and model configuration to detect stale artifacts"""
+        digest = hashlib.sha256()
+        digest.update(str(MODEL_ARTIFACT_VERSION).encode())
+        for frame in (self.courses_data, self.user_profiles, self.interactions):
+            digest.update(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+        for model in (self.tfidf_vectorizer, self.kmeans_model, self.career_classifier):
+            digest.update(repr(sorted(model.get_params().items())).encode())
+        return digest.hexdigest()
+    
+    def _artifact_paths(self):
+        """Return the (bundle, manifest) file paths for the persisted models"""
+        bundle_path = os.path.join(MODEL_ARTIFACT_DIR, f'{MODEL_ARTIFACT_NAME}.joblib')
+        manifest_path = os.path.join(MODEL_ARTIFACT_DIR, f'{MODEL_ARTIFACT_NAME}.json')
+        return bundle_path, manifest_path
+    
+    @staticmethod
+    def _file_checksum(path):
+        """SHA-256 of a file, read in chunks"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _save_artifacts(self):
+        """Persist the trained models as a versioned, checksummed bundle"""
+        bundle_path, manifest_path = self._artifact_paths()
         try:
-            # Create user-item interaction matrix
-            interaction_matrix = self.interactions.pivot_table(
-                index='user_id', 
-                columns='course_id', 
-                values='rating', 
-                fill_value=0
-            )
+            os.makedirs(MODEL_ARTIFACT_DIR, exist_ok=True)
+            bundle = {
+                'version': MODEL_ARTIFACT_VERSION,
+                'fingerprint': self.training_fingerprint,
+                'tfidf_vectorizer': self.tfidf_vectorizer,
+                'tfidf_matrix': self.tfidf_matrix,
+                'kmeans_model': self.kmeans_model,
+                'user_clusters': self.user_clusters,
+                'scaler': self.scaler,
+                'career_classifier': self.career_classifier,
+                'career_feature_layout': self.career_feature_layout,
+                'cluster_stats': self.cluster_stats,
+                'collaborative_model': self.collaborative_model
+            }
             
-            # Calculate user-user similarity
-            self.user_similarity = cosine_similarity(interaction_matrix)
-            self.interaction_matrix = interaction_matrix
+            # Write to a private temp file and rename so concurrent workers never see partial files
+            tmp_suffix = f'.{os.getpid()}.tmp'
+            joblib.dump(bundle, bundle_path + tmp_suffix)
+            manifest = {
+                'version': MODEL_ARTIFACT_VERSION,
+                'fingerprint': bundle['fingerprint'],
+                'checksum': self._file_checksum(bundle_path + tmp_suffix),
+                'created_at': datetime.now().isoformat()
+            }
+            with open(manifest_path + tmp_suffix, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(bundle_path + tmp_suffix, bundle_path)
+            os.replace(manifest_path + tmp_suffix, manifest_path)
+            
+            self.artifact_checksum = manifest['checksum']
+            logger.info("💾 ML artifacts saved to %s", bundle_path)
+        except Exception as e:
+            logger.warning("⚠️ Could not save ML artifacts: %s", e)
+    
+    def _load_artifacts(self):
+        """Load the persisted models; returns False when missing, stale or corrupt"""
+        if os.environ.get('CAREERCOMPASS_RETRAIN') == '1':
+            return False
+        
+        bundle_path, manifest_path = self._artifact_paths()
+        if not (os.path.exists(bundle_path) and os.path.exists(manifest_path)):
+            return False
+        
+        try:
+            start = time.perf_counter()
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            
+            if manifest.get('version') != MODEL_ARTIFACT_VERSION:
+                logger.info("🔄 ML artifacts were built by another version, retraining...")
+                return False
+            if manifest.get('fingerprint') != self.training_fingerprint:
+                logger.info("🔄 ML artifacts are stale, retraining...")
+                return False
+            if manifest.get('checksum') != self._file_checksum(bundle_path):
+                logger.warning("⚠️ ML artifact checksum mismatch, retraining...")
+                return False
+            
+            bundle = joblib.load(bundle_path)
+            if bundle.get('fingerprint') != manifest['fingerprint']:
+                logger.warning("⚠️ ML artifact bundle does not match its manifest, retraining...")
+                return False
             
-            print("✅ Collaborative filtering model built!")
+            self.tfidf_vectorizer = bundle['tfidf_vectorizer']
+            self.tfidf_matrix = bundle['tfidf_matrix']
+            self.kmeans_model = bundle['kmeans_model']
+            self.user_clusters = bundle['user_clusters']
+            self.user_profiles['cluster'] = self.user_clusters
+            self.scaler = bundle['scaler']
+            self.career_classifier = bundle['career_classifier']
+            self.career_feature_layout = bundle['career_feature_layout']
+            self.cluster_stats = bundle['cluster_stats']
+            self.collaborative_model = bundle['collaborative_model']
+            self.artifact_checksum = manifest['checksum']
+            
+            logger.info("⚡ ML artifacts loaded in %.1f ms", (time.perf_counter() - start) * 1000)
+            return True
+        except Exception as e:
+            logger.warning("⚠️ Could not load ML artifacts: %s", e)
+            return False
+    
+    def _load_catalog(self):
+        """Stream the course catalog from CAREERCOMPASS_CATALOG_PATH, if configured"""
+        if not CATALOG_PATH:
+            return
+        try:
+            self.catalog = CourseCatalog(CATALOG_PATH, index_kind=RETRIEVAL_INDEX_KIND).load()
+        except Exception as e:
+            logger.warning("⚠️ Could not load course catalog %s: %s", CATALOG_PATH, e)
+            logger.info("🔄 Using the built-in sample courses...")
+            self.catalog = None
+    
+    def _search_courses(self, texts, num_recommendations):
+        """(course records, top indices, similarities) for each text, best match first.
+        
+        Uses the streamed catalog when one is loaded, otherwise the sample courses.
+        """
+        if self.catalog is not None and len(self.catalog):
+            self.catalog.start_watching(CATALOG_POLL_SECONDS)
+            with timed('catalog_search'):
+                return self.catalog.search(texts, num_recommendations)
+        
+        with timed('tfidf_transform'):
+            vectors = self.tfidf_vectorizer.transform(texts)
+        with timed('cosine_scoring'):
+            return [
+                (self.courses_data, top_indices, similarities)
+                for top_indices, similarities in self.retrieval_index.search_batch(vectors, num_recommendations)
+            ]
+    
+    def _build_collaborative_filtering(self):
+        """Build the sparse user-item matrix and per-user top-k neighbour lists"""
+        try:
+            self.collaborative_model = UserNeighborModel(n_neighbors=20).fit(
+                self.interactions['user_id'].to_numpy(),
+                self.interactions['course_id'].to_numpy(),
+                self.interactions['rating'].to_numpy(),
+                n_items=len(self.courses_data)
+            )
+            logger.info("✅ Collaborative filtering model built!")
         except Exception as e:
-            print(f"⚠️ Collaborative filtering error: {e}")
-            # Create dummy matrices
-            self.user_similarity = np.eye(10)
-            self.interaction_matrix = pd.DataFrame()
+            logger.warning("⚠️ Collaborative filtering error: %s", e)
+            self.collaborative_model = None
+    
+    def record_interaction(self, user_id, item_type, item_id, interaction_type):
+        """Feed a tracked interaction to the online collaborative filtering updater.
+        
+        Only course interactions map to the collaborative filtering items; the
+        update is applied in the background within about a second. Other
+        workers learn it from the shared interaction log (see
+        sync_interactions). Returns False when the interaction cannot be used.
+        """
+        rating = INTERACTION_RATINGS.get(interaction_type)
+        if self.interaction_updater is None or rating is None or item_type != 'course':
+            return False
+        if not 0 <= item_id < self.collaborative_model.n_items:
+            return False
+        self.interaction_updater.record(user_id, item_id, rating)
+        return True
+    
+    def sync_interactions(self):
+        """Apply the interactions other workers logged since the last replay (see InteractionUpdater.replay_from)"""
+        if self.interaction_updater is not None:
+            self.interaction_updater.replay()
+    
+    def has_collaborative_history(self, user_id):
+        """True when collaborative filtering can score user_id: the user has ratings in the model"""
+        model = getattr(self, 'collaborative_model', None)
+        return self.catalog is None and model is not None and user_id is not None and model.has_user(user_id)
+    
+    def get_collaborative_recommendations(self, user_id, num_recommendations=5):
+        """User-based collaborative filtering: courses rated highly by similar users"""
+        if getattr(self, 'collaborative_model', None) is None:
+            return []
+        
+        try:
+            with timed('collaborative_scoring'):
+                top_indices, scores = self.collaborative_model.recommend(user_id, num_recommendations)
+            recommendations = []
+            for idx, score in zip(top_indices, scores):
+                course = self.courses_data.iloc[idx]
+                recommendations.append({
+                    'course_id': int(idx),
+                    'title': course['title'],
+                    'category': course['category'],
+                    'difficulty': course['difficulty'],
+                    'duration_hours': int(course['duration_hours']),
+                    'rating': float(course['rating']),
+                    'predicted_rating': float(score),
+                    'ml_confidence': min(float(score / 5 * 100), 95.0),
+                    'recommendation_type': 'Collaborative ML'
+                })
+            return recommendations
+        except Exception as e:
+            logger.warning("Collaborative recommendation error: %s", e)
+            MODEL_ERRORS.inc(stage='collaborative')
+            return []
     
     def get_content_based_recommendations(self, user_interests, num_recommendations=5):
         """Content-based recommendations using TF-IDF and cosine similarity"""
@@ -196,32 +480,28 @@ class MLRecommendationEngine:
             return self._get_simple_recommendations(user_interests, num_recommendations)
         
         try:
-            # Transform user interests to TF-IDF vector
-            user_vector = self.tfidf_vectorizer.transform([user_interests])
-            
-            # Calculate similarity with all courses
-            similarities = cosine_similarity(user_vector, self.tfidf_matrix).flatten()
-            
-            # Get top recommendations
-            top_indices = similarities.argsort()[-num_recommendations-1:-1][::-1]
+            # Top-k courses by cosine similarity, best match first
+            courses, top_indices, similarities = self._search_courses([user_interests], num_recommendations)[0]
             
             recommendations = []
-            for idx in top_indices:
-                course = self.courses_data.iloc[idx]
+            for idx, similarity in zip(top_indices, similarities):
+                course = courses.iloc[idx]
                 recommendations.append({
+                    'course_id': int(idx),
                     'title': course['title'],
                     'category': course['category'],
                     'difficulty': course['difficulty'],
                     'duration_hours': int(course['duration_hours']),
                     'rating': float(course['rating']),
-                    'similarity_score': float(similarities[idx]),
-                    'ml_confidence': min(float(similarities[idx] * 100), 95.0),
+                    'similarity_score': float(similarity),
+                    'ml_confidence': min(float(similarity * 100), 95.0),
                     'recommendation_type': 'Content-Based ML'
                 })
             
             return recommendations
         except Exception as e:
-            print(f"Content-based recommendation error: {e}")
+            logger.warning("Content-based recommendation error: %s", e)
+            MODEL_ERRORS.inc(stage='content_based')
             return self._get_simple_recommendations(user_interests, num_recommendations)
     
     def _get_simple_recommendations(self, user_interests, num_recommendations=5):
@@ -251,78 +531,300 @@ class MLRecommendationEngine:
         return simple_recs[:num_recommendations]
     
     def get_hybrid_recommendations(self, user_profile, num_recommendations=8):
-        """Hybrid recommendation combining multiple ML approaches"""
+        """Hybrid recommendation blending content-based and collaborative scores.
+        
+        Content similarity (0-1) and the collaborative score (neighbour-weighted
+        rating scaled to 0-1) are mixed with COLLABORATIVE_WEIGHT. Users the
+        collaborative model has no ratings for, users without neighbours, and
+        streamed catalogs (which the interactions do not cover) get
+        content-based results only.
+        """
+        user_interests = user_profile.get('interests', '')
         try:
-            user_interests = user_profile.get('interests', '')
+            cf_indices = []
+            if self.has_collaborative_history(user_profile.get('user_id')):
+                with timed('collaborative_scoring'):
+                    cf_indices, cf_scores = self.collaborative_model.recommend(
+                        user_profile.get('user_id'), num_recommendations * 3
+                    )
+            if len(cf_indices) == 0:
+                return self.get_content_based_recommendations(user_interests, num_recommendations)
+            
+            courses, top_indices, similarities = self._search_courses([user_interests], num_recommendations * 3)[0]
             
-            # Get content-based recommendations
-            content_recs = self.get_content_based_recommendations(user_interests, num_recommendations)
+            # Content similarity of the collaborative candidates the index did not return
+            content = dict(zip(top_indices.tolist(), similarities.tolist()))
+            missing = [idx for idx in cf_indices.tolist() if idx not in content]
+            if missing:
+                with timed('tfidf_transform'):
+                    user_vector = self.tfidf_vectorizer.transform([user_interests])
+                with timed('cosine_scoring'):
+                    scores = (self.tfidf_matrix[missing] @ user_vector.T).toarray().ravel()
+                content.update(zip(missing, scores.tolist()))
+            collaborative = dict(zip(cf_indices.tolist(), (cf_scores / 5.0).tolist()))
             
-            return content_recs
+            blended = {
+                idx: (1 - COLLABORATIVE_WEIGHT) * content[idx] + COLLABORATIVE_WEIGHT * collaborative.get(idx, 0.0)
+                for idx in content
+            }
+            ranked = sorted(blended, key=blended.get, reverse=True)[:num_recommendations]
+            
+            recommendations = []
+            for idx in ranked:
+                course = courses.iloc[idx]
+                recommendations.append({
+                    'course_id': int(idx),
+                    'title': course['title'],
+                    'category': course['category'],
+                    'difficulty': course['difficulty'],
+                    'duration_hours': int(course['duration_hours']),
+                    'rating': float(course['rating']),
+                    'similarity_score': float(content[idx]),
+                    'collaborative_score': float(collaborative.get(idx, 0.0)),
+                    'ml_confidence': min(float(blended[idx] * 100), 95.0),
+                    'recommendation_type': 'Hybrid ML' if idx in collaborative else 'Content-Based ML'
+                })
+            return recommendations
         except Exception as e:
-            print(f"Hybrid recommendation error: {e}")
+            logger.warning("Hybrid recommendation error: %s", e)
+            MODEL_ERRORS.inc(stage='hybrid')
             return self._get_simple_recommendations(user_interests, num_recommendations)
     
-    def predict_career_path(self, user_profile):
-        """Predict career path using Random Forest classifier"""
+    def _career_feature_row(self, user_profile):
+        """Scaled classifier input for one profile, written into a per-thread buffer"""
+        layout = self.career_feature_layout
+        row = getattr(self._feature_buffers, 'row', None)
+        if row is None or row.shape[1] != layout['n_features']:
+            row = np.zeros((1, layout['n_features']))
+            self._feature_buffers.row = row
+        
+        values = row[0]
+        values.fill(0.0)
+        
+        col = layout['education_columns'].get(user_profile.get('education_level', 'Bachelor'))
+        if col is not None:
+            values[col] = 1.0
+        values[layout['experience_column']] = float(user_profile.get('experience_years', 0) or 0)
+        
+        # Copy only the leading TF-IDF columns straight out of the sparse vector
+        user_text = (self._profile_text(user_profile.get('interests', '')) + ' ' +
+                     self._profile_text(user_profile.get('career_goal', '')))
+        with timed('tfidf_transform'):
+            user_tfidf = self.tfidf_vectorizer.transform([user_text])
+        in_slice = user_tfidf.indices < layout['tfidf_width']
+        values[layout['tfidf_offset'] + user_tfidf.indices[in_slice]] = user_tfidf.data[in_slice]
+        
+        # StandardScaler.transform as a single multiply-add
+        values *= layout['scale_mul']
+        values += layout['scale_add']
+        return row
+    
+    def _career_memo_key(self, user_profile):
+        """Hash of the normalized classifier inputs; profiles that differ only in case or spacing share it"""
+        try:
+            experience = float(user_profile.get('experience_years', 0) or 0)
+        except (TypeError, ValueError):
+            experience = 0.0
+        canonical = '\x1f'.join([
+            str(user_profile.get('education_level', 'Bachelor')),
+            repr(experience),
+            ' '.join(self._profile_text(user_profile.get('interests', '')).lower().split()),
+            ' '.join(self._profile_text(user_profile.get('career_goal', '')).lower().split())
+        ])
+        return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).digest()
+    
+    def _career_memo_table(self):
+        """Memo table of the current classifier; loading or training another one starts an empty table"""
+        version = (MODEL_ARTIFACT_VERSION, self.artifact_checksum or id(self.career_classifier))
+        memo = self._career_memo
+        if memo[0] != version:
+            with self._career_memo_lock:
+                if self._career_memo[0] != version:
+                    self._career_memo = (version, {})
+                memo = self._career_memo
+        return memo[1]
+    
+    def predict_career_distribution(self, user_profile):
+        """Probability of every career class plus the top 3, memoized per normalized profile.
+        
+        Returns {'classes', 'probabilities', 'top_predictions'}. The result is
+        shared with later callers, so treat it as read-only.
+        """
         if hasattr(self, 'simple_mode') and self.simple_mode:
-            return self._get_simple_career_predictions()
+            top_predictions = self._get_simple_career_predictions()
+            return {
+                'classes': [p['career_path'] for p in top_predictions],
+                'probabilities': [p['probability'] for p in top_predictions],
+                'top_predictions': top_predictions
+            }
+        
+        key = self._career_memo_key(user_profile)
+        table = self._career_memo_table()
+        result = table.get(key)
+        if result is not None:
+            self._career_memo_stats['hits'] += 1
+            CACHE_LOOKUPS.inc(cache='career_predictions', result='hit')
+            return result
+        CACHE_LOOKUPS.inc(cache='career_predictions', result='miss')
         
         try:
-            # Prepare user features
-            user_data = pd.DataFrame([{
-                'education_level': user_profile.get('education_level', 'Bachelor'),
-                'experience_years': user_profile.get('experience_years', 0),
-                'interests': user_profile.get('interests', ''),
-                'career_goal': user_profile.get('career_goal', '')
-            }])
-            
-            # Create feature vector
-            features = pd.get_dummies(user_data[['education_level']])
-            
-            # Ensure all education levels are present
-            for level in ['Associate', 'Bachelor', 'High School', 'Master', 'PhD']:
-                col_name = f'education_level_{level}'
-                if col_name not in features.columns:
-                    features[col_name] = 0
-            
-            features['experience_years'] = user_data['experience_years']
-            
-            # Add TF-IDF features
-            user_text = user_data['interests'] + ' ' + user_data['career_goal']
-            user_tfidf = self.tfidf_vectorizer.transform(user_text)
-            tfidf_features = pd.DataFrame(user_tfidf.toarray()[:, :50])
-            # FIXED: Convert TF-IDF column names to strings
-            tfidf_features.columns = [f'tfidf_{i}' for i in range(tfidf_features.shape[1])]
-            
-            # Combine features and ensure all column names are strings
-            final_features = pd.concat([features.reset_index(drop=True), tfidf_features], axis=1)
-            # FIXED: Convert all column names to strings
-            final_features.columns = final_features.columns.astype(str)
-            
-            # Scale features
-            final_features_scaled = self.scaler.transform(final_features)
-            
             # Predict career paths with probabilities
-            predictions = self.career_classifier.predict_proba(final_features_scaled)[0]
+            row = self._career_feature_row(user_profile)
+            with timed('rf_predict_proba'):
+                predictions = self.career_classifier.predict_proba(row)[0]
             classes = self.career_classifier.classes_
             
             # Get top 3 predictions
             top_indices = predictions.argsort()[-3:][::-1]
             
-            career_predictions = []
-            for idx in top_indices:
-                career_predictions.append({
+            result = {
+                'classes': [str(career) for career in classes],
+                'probabilities': predictions.tolist(),
+                'top_predictions': [{
                     'career_path': classes[idx],
                     'probability': float(predictions[idx]),
                     'confidence': min(float(predictions[idx] * 100), 95.0),
                     'prediction_type': 'Random Forest ML'
-                })
+                } for idx in top_indices]
+            }
+        except Exception as e:
+            logger.warning("Career prediction error: %s", e)
+            MODEL_ERRORS.inc(stage='career_prediction')
+            top_predictions = self._get_simple_career_predictions()
+            return {
+                'classes': [p['career_path'] for p in top_predictions],
+                'probabilities': [p['probability'] for p in top_predictions],
+                'top_predictions': top_predictions
+            }
+        
+        with self._career_memo_lock:
+            self._career_memo_stats['misses'] += 1
+            if len(table) >= CAREER_MEMO_MAX_ENTRIES:
+                table.pop(next(iter(table)))
+            table[key] = result
+        return result
+    
+    def predict_career_path(self, user_profile):
+        """Predict career path using Random Forest classifier"""
+        return [dict(prediction) for prediction in self.predict_career_distribution(user_profile)['top_predictions']]
+    
+    def career_memo_stats(self):
+        """Size and hit counters of the career prediction memo table"""
+        stats = dict(self._career_memo_stats)
+        stats['entries'] = len(self._career_memo[1])
+        return stats
+    
+    @staticmethod
+    def _profile_text(value):
+        """Profile fields may arrive as a string or a list of selections"""
+        if isinstance(value, (list, tuple)):
+            return ' '.join(str(item) for item in value)
+        return str(value or '')
+    
+    def _career_feature_matrix(self, user_profiles):
+        """Scaled N-row career classifier input built from the precompiled layout"""
+        layout = self.career_feature_layout
+        features = np.zeros((len(user_profiles), layout['n_features']))
+        
+        for row, profile in enumerate(user_profiles):
+            col = layout['education_columns'].get(profile.get('education_level', 'Bachelor'))
+            if col is not None:
+                features[row, col] = 1.0
+            features[row, layout['experience_column']] = float(profile.get('experience_years', 0) or 0)
+        
+        user_text = [
+            self._profile_text(profile.get('interests', '')) + ' ' + self._profile_text(profile.get('career_goal', ''))
+            for profile in user_profiles
+        ]
+        with timed('tfidf_transform'):
+            user_tfidf = self.tfidf_vectorizer.transform(user_text)
+        offset, width = layout['tfidf_offset'], layout['tfidf_width']
+        features[:, offset:offset + width] = user_tfidf[:, :width].toarray()
+        
+        features *= layout['scale_mul']
+        features += layout['scale_add']
+        return features
+    
+    def predict_career_paths_batch(self, user_profiles):
+        """Career path predictions for many profiles with one predict_proba call"""
+        if not user_profiles:
+            return []
+        if hasattr(self, 'simple_mode') and self.simple_mode:
+            return [self._get_simple_career_predictions() for _ in user_profiles]
+        
+        try:
+            features = self._career_feature_matrix(user_profiles)
+            with timed('rf_predict_proba'):
+                probabilities = self.career_classifier.predict_proba(features)
+            classes = self.career_classifier.classes_
+            top_indices = np.argsort(-probabilities, axis=1)[:, :3]
             
-            return career_predictions
+            return [
+                [{
+                    'career_path': classes[idx],
+                    'probability': float(probabilities[row, idx]),
+                    'confidence': min(float(probabilities[row, idx] * 100), 95.0),
+                    'prediction_type': 'Random Forest ML'
+                } for idx in top_indices[row]]
+                for row in range(len(user_profiles))
+            ]
         except Exception as e:
-            print(f"Career prediction error: {e}")
-            return self._get_simple_career_predictions()
+            logger.warning("Batch career prediction error: %s", e)
+            MODEL_ERRORS.inc(stage='career_prediction')
+            return [self._get_simple_career_predictions() for _ in user_profiles]
+    
+    def get_batch_content_recommendations(self, user_interests_list, num_recommendations=5):
+        """Content-based recommendations for many users: one vectorizer transform
+        and one retrieval index pass for the whole batch"""
+        if not user_interests_list:
+            return []
+        if hasattr(self, 'simple_mode') and self.simple_mode:
+            return [self._get_simple_recommendations(text, num_recommendations) for text in user_interests_list]
+        
+        try:
+            results = self._search_courses(
+                [self._profile_text(text) for text in user_interests_list], num_recommendations
+            )
+            
+            recommendations = []
+            for courses, top_indices, similarities in results:
+                titles = courses['title'].to_numpy()
+                categories = courses['category'].to_numpy()
+                difficulties = courses['difficulty'].to_numpy()
+                durations = courses['duration_hours'].to_numpy()
+                ratings = courses['rating'].to_numpy()
+                recommendations.append([{
+                    'course_id': int(idx),
+                    'title': titles[idx],
+                    'category': categories[idx],
+                    'difficulty': difficulties[idx],
+                    'duration_hours': int(durations[idx]),
+                    'rating': float(ratings[idx]),
+                    'similarity_score': float(similarity),
+                    'ml_confidence': min(float(similarity * 100), 95.0),
+                    'recommendation_type': 'Content-Based ML'
+                } for idx, similarity in zip(top_indices, similarities)])
+            return recommendations
+        except Exception as e:
+            logger.warning("Batch recommendation error: %s", e)
+            MODEL_ERRORS.inc(stage='content_based')
+            return [self._get_simple_recommendations(text, num_recommendations) for text in user_interests_list]
+    
+    def get_batch_recommendations(self, user_profiles, num_recommendations=5):
+        """Course recommendations and career predictions for a batch of profiles"""
+        recommendations = self.get_batch_content_recommendations(
+            [profile.get('interests', '') for profile in user_profiles], num_recommendations
+        )
+        career_predictions = self.predict_career_paths_batch(user_profiles)
+        
+        return [
+            {
+                'user_id': profile.get('user_id'),
+                'recommendations': recs,
+                'career_predictions': predictions
+            }
+            for profile, recs, predictions in zip(user_profiles, recommendations, career_predictions)
+        ]
     
     def _get_simple_career_predictions(self):
         """Simple fallback career predictions"""
@@ -355,68 +857,327 @@ class MLRecommendationEngine:
         
         try:
             # Transform user interests
-            user_vector = self.tfidf_vectorizer.transform([user_interests])
-            user_cluster = self.kmeans_model.predict(user_vector.toarray())[0]
-            
-            # Get similar users in the same cluster
-            cluster_users = self.user_profiles[self.user_profiles['cluster'] == user_cluster]
+            with timed('tfidf_transform'):
+                user_vector = self.tfidf_vectorizer.transform([user_interests])
+            with timed('kmeans_predict'):
+                user_cluster = self.kmeans_model.predict(user_vector.toarray())[0]
             
-            # Analyze cluster characteristics
-            common_goals = cluster_users['career_goal'].value_counts().head(3)
-            avg_experience = cluster_users['experience_years'].mean()
-            common_education = cluster_users['education_level'].value_counts().head(3)
+            # Look up the precomputed characteristics of the user's cluster
+            cluster_stats = self.cluster_stats[int(user_cluster)]
             
             insights = {
                 'cluster_id': int(user_cluster),
-                'cluster_size': len(cluster_users),
-                'common_career_goals': common_goals.to_dict(),
-                'average_experience': float(avg_experience),
-                'common_education_levels': common_education.to_dict(),
+                'cluster_size': cluster_stats['cluster_size'],
+                'common_career_goals': dict(cluster_stats['common_career_goals']),
+                'average_experience': cluster_stats['average_experience'],
+                'common_education_levels': dict(cluster_stats['common_education_levels']),
                 'analysis_type': 'K-Means Clustering ML'
             }
             
             return insights
         except Exception as e:
-            print(f"Cluster analysis error: {e}")
+            logger.warning("Cluster analysis error: %s", e)
+            MODEL_ERRORS.inc(stage='clustering')
             return {
                 'cluster_id': 1,
                 'cluster_size': 20,
                 'analysis_type': 'Simple ML Fallback'
             }
 
-# Simplified DL Engine
+# DL Engine
 class DLRecommendationEngine:
-    def __init__(self):
+    """Course preferences from a two-tower model over the ML engine's user and course features.
+    
+    The weights live in PREFERENCE_MODEL_PATH, trained offline with
+    `python preference_model.py` (or here, when the file is missing or was
+    trained on other data). They are loaded on first use and inference is
+    NumPy only, so TensorFlow is never imported. Scores cover the sample
+    courses; a streamed catalog uses different features.
+    """
+    def __init__(self, ml_engine=None):
+        self.ml_engine = ml_engine
+        self.model = None
+        self.item_embeddings = None
+        self.feature_layout = None
+        self._load_failed = False
+        self._load_lock = threading.Lock()
+    
+    def _compile_feature_layout(self):
+        """Column positions of the one-hot fields, fixed by the training data"""
+        ml = self.ml_engine
+        index = lambda values: {value: i for i, value in enumerate(sorted(values.unique()))}
+        return {
+            'education': index(ml.user_profiles['education_level']),
+            'category': index(ml.courses_data['category']),
+            'difficulty': index(ml.courses_data['difficulty'])
+        }
+    
+    def _user_tfidf(self, user_profiles):
+        ml = self.ml_engine
+        texts = [
+            ml._profile_text(profile.get('interests', '')) + ' ' + ml._profile_text(profile.get('career_goal', ''))
+            for profile in user_profiles
+        ]
+        with timed('tfidf_transform'):
+            return ml.tfidf_vectorizer.transform(texts)
+    
+    def _user_features(self, user_profiles, user_tfidf=None):
+        """User tower input: TF-IDF of interests and goal, education one-hot, scaled experience"""
+        if user_tfidf is None:
+            user_tfidf = self._user_tfidf(user_profiles)
+        education = self.feature_layout['education']
+        extra = np.zeros((len(user_profiles), len(education) + 1), dtype=np.float32)
+        for row, profile in enumerate(user_profiles):
+            col = education.get(profile.get('education_level', 'Bachelor'))
+            if col is not None:
+                extra[row, col] = 1.0
+            extra[row, -1] = min(float(profile.get('experience_years', 0) or 0), 20.0) / 20.0
+        return np.hstack([user_tfidf.toarray().astype(np.float32), extra])
+    
+    def _item_features(self, courses):
+        """Item tower input: course TF-IDF, category and difficulty one-hot, scaled duration and rating"""
+        layout = self.feature_layout
+        extra = np.zeros((len(courses), len(layout['category']) + len(layout['difficulty']) + 2), dtype=np.float32)
+        offset = len(layout['category'])
+        for row, course in enumerate(courses.itertuples(index=False)):
+            col = layout['category'].get(course.category)
+            if col is not None:
+                extra[row, col] = 1.0
+            col = layout['difficulty'].get(course.difficulty)
+            if col is not None:
+                extra[row, offset + col] = 1.0
+            extra[row, -2] = min(float(course.duration_hours), 100.0) / 100.0
+            extra[row, -1] = float(course.rating) / 5.0
+        return np.hstack([self.ml_engine.tfidf_matrix.toarray().astype(np.float32), extra])
+    
+    def _fingerprint(self):
+        digest = hashlib.sha256()
+        digest.update(str(PREFERENCE_MODEL_VERSION).encode())
+        digest.update(str(self.ml_engine.training_fingerprint).encode())
+        digest.update(repr(sorted(PREFERENCE_MODEL_PARAMS.items())).encode())
+        digest.update(repr((PREFERENCE_CONTENT_POSITIVES, PREFERENCE_MIN_RATING)).encode())
+        return digest.hexdigest()
+    
+    def train(self):
+        """Fit the two-tower model on the ML engine's sample users and courses"""
+        ml = self.ml_engine
+        self.feature_layout = self._compile_feature_layout()
+        profiles = ml.user_profiles.to_dict('records')
+        user_tfidf = self._user_tfidf(profiles)
+        n_users, n_items = len(profiles), len(ml.courses_data)
+        
+        labels = np.zeros((n_users, n_items))
+        affinity = (user_tfidf @ ml.tfidf_matrix.T).toarray()
+        top_courses = np.argsort(-affinity, axis=1)[:, :PREFERENCE_CONTENT_POSITIVES]
+        labels[np.arange(n_users)[:, None], top_courses] = 1.0
+        
+        rows = {user_id: row for row, user_id in enumerate(ml.user_profiles['user_id'])}
+        liked = ml.interactions[ml.interactions['rating'] >= PREFERENCE_MIN_RATING]
+        for user_id, course_id in zip(liked['user_id'], liked['course_id']):
+            if user_id in rows and 0 <= course_id < n_items:
+                labels[rows[user_id], course_id] = 1.0
+        
+        # Positives are rare, so weight them up to roughly balance the loss
+        positive_weight = max((labels == 0).sum() / max(labels.sum(), 1.0), 1.0)
+        sample_weights = np.where(labels == 1, positive_weight, 1.0)
+        
+        start = time.perf_counter()
+        model = TwoTowerPreferenceModel.train(
+            self._user_features(profiles, user_tfidf), self._item_features(ml.courses_data), labels,
+            sample_weights=sample_weights, metadata={'fingerprint': self._fingerprint()}, **PREFERENCE_MODEL_PARAMS
+        )
+        logger.info("✅ Preference model trained in %.1f ms (loss %.3f)",
+                    (time.perf_counter() - start) * 1000, model.metadata['training_loss'])
+        return model
+    
+    def _load_model(self):
+        """Exported model for the current training data, or None"""
+        if os.environ.get('CAREERCOMPASS_RETRAIN') == '1' or not os.path.exists(PREFERENCE_MODEL_PATH):
+            return None
         try:
-            import tensorflow as tf
-            print("✅ TensorFlow available - Deep Learning enabled!")
-            self.tf_available = True
-        except ImportError:
-            print("⚠️ TensorFlow not available. Using ML-only mode.")
-            self.tf_available = False
+            model = TwoTowerPreferenceModel.load(PREFERENCE_MODEL_PATH)
+        except Exception as e:
+            logger.warning("⚠️ Could not load preference model: %s", e)
+            return None
+        if model.metadata.get('fingerprint') != self._fingerprint():
+            logger.info("🔄 Preference model is stale, retraining...")
+            return None
+        return model
+    
+    def _ensure_model(self):
+        """Load (or train and export) the model and embed the courses on first use"""
+        if self.item_embeddings is not None:
+            return True
+        if self._load_failed or not hasattr(self.ml_engine, 'tfidf_matrix') or getattr(self.ml_engine, 'simple_mode', False):
+            return False
+        
+        with self._load_lock:
+            if self.item_embeddings is None and not self._load_failed:
+                try:
+                    start = time.perf_counter()
+                    self.feature_layout = self._compile_feature_layout()
+                    model = self._load_model()
+                    if model is None:
+                        model = self.train()
+                        model.save(PREFERENCE_MODEL_PATH)
+                    self.model = model
+                    self.item_embeddings = model.embed_items(self._item_features(self.ml_engine.courses_data))
+                    logger.info("⚡ Preference model ready in %.1f ms", (time.perf_counter() - start) * 1000)
+                except Exception as e:
+                    logger.warning("⚠️ Preference model unavailable: %s", e)
+                    MODEL_ERRORS.inc(stage='preference_model')
+                    self._load_failed = True
+        return self.item_embeddings is not None
+    
+    def score_users(self, user_profiles):
+        """(n_profiles, n_courses) preference probabilities, or None when the model is unavailable.
+        
+        Every course is scored for all profiles with one matrix multiply
+        against the precomputed course embeddings.
+        """
+        if not user_profiles or not self._ensure_model():
+            return None
+        with timed('preference_scoring'):
+            return self.model.score(self.model.embed_users(self._user_features(user_profiles)), self.item_embeddings)
     
     def predict_user_preferences(self, user_features):
-        """Predict user preferences"""
-        if not self.tf_available:
-            return [0.8, 0.7, 0.9]  # Mock predictions
-        return [0.8, 0.7, 0.9]
-
-# Initialize engines with error handling
-try:
-    ml_engine = MLRecommendationEngine()
-    dl_engine = DLRecommendationEngine()
-    print("✅ All ML/DL engines initialized successfully!")
-except Exception as e:
-    print(f"❌ ML Engine initialization failed: {e}")
-    print("🔄 Creating fallback engines...")
-    
-    class FallbackMLEngine:
-        def get_hybrid_recommendations(self, user_profile, num_recommendations=8):
-            return []
-        def predict_career_path(self, user_profile):
+        """Preference probability of every course (in course order) for a user profile dict"""
+        scores = self.score_users([user_features])
+        return [] if scores is None else [float(score) for score in scores[0]]
+    
+    def get_recommendations(self, user_profile, num_recommendations=5):
+        """Courses the preference model ranks highest for user_profile"""
+        scores = self.score_users([user_profile])
+        if scores is None:
             return []
-        def get_user_cluster_insights(self, user_interests):
-            return {}
+        scores = scores[0]
+        top_indices = np.argsort(-scores)[:num_recommendations]
+        courses = self.ml_engine.courses_data
+        return [{
+            'course_id': int(idx),
+            'title': courses.iloc[idx]['title'],
+            'category': courses.iloc[idx]['category'],
+            'difficulty': courses.iloc[idx]['difficulty'],
+            'duration_hours': int(courses.iloc[idx]['duration_hours']),
+            'rating': float(courses.iloc[idx]['rating']),
+            'preference_score': float(scores[idx]),
+            'ml_confidence': min(float(scores[idx] * 100), 95.0),
+            'recommendation_type': 'Deep Learning (Two-Tower)'
+        } for idx in top_indices]
+
+class FallbackMLEngine:
+    """Minimal engine used when the ML stack cannot be initialized at all"""
+    def get_hybrid_recommendations(self, user_profile, num_recommendations=8):
+        return []
+    def get_content_based_recommendations(self, user_interests, num_recommendations=5):
+        return []
+    def get_collaborative_recommendations(self, user_id, num_recommendations=5):
+        return []
+    def has_collaborative_history(self, user_id):
+        return False
+    def record_interaction(self, user_id, item_type, item_id, interaction_type):
+        return False
+    def sync_interactions(self):
+        pass
+    def predict_career_path(self, user_profile):
+        return []
+    def predict_career_distribution(self, user_profile):
+        return {'classes': [], 'probabilities': [], 'top_predictions': []}
+    def career_memo_stats(self):
+        return {}
+    def get_user_cluster_insights(self, user_interests):
+        return {}
+    def get_batch_recommendations(self, user_profiles, num_recommendations=5):
+        return [{'user_id': profile.get('user_id'), 'recommendations': [], 'career_predictions': []}
+                for profile in user_profiles]
+
+# Process-wide engine registry: every caller shares one instance per engine
+_engine_registry = {}
+_engine_registry_lock = threading.Lock()
+
+def _build_ml_engine():
+    try:
+        return MLRecommendationEngine()
+    except Exception as e:
+        logger.exception("❌ ML Engine initialization failed: %s", e)
+        logger.info("🔄 Creating fallback engines...")
+        return FallbackMLEngine()
+
+def _get_engine(name, factory):
+    """Return the shared engine called name, building it on first use"""
+    engine = _engine_registry.get(name)
+    if engine is None:
+        with _engine_registry_lock:
+            engine = _engine_registry.get(name)
+            if engine is None:
+                engine = factory()
+                _engine_registry[name] = engine
+    return engine
+
+def get_ml_engine():
+    """Shared MLRecommendationEngine for this process"""
+    return _get_engine('ml', _build_ml_engine)
+
+def get_dl_engine():
+    """Shared DLRecommendationEngine for this process"""
+    # Built outside the registry lock, which is not re-entrant
+    ml_engine = get_ml_engine()
+    return _get_engine('dl', lambda: DLRecommendationEngine(ml_engine))
+
+def _make_readonly(value, seen, depth=0):
+    """Mark the NumPy buffers reachable from value as read-only"""
+    if depth > 4 or id(value) in seen:
+        return
+    seen.add(id(value))
+    
+    if isinstance(value, np.ndarray):
+        if value.dtype != object:
+            value.setflags(write=False)
+    elif sparse.issparse(value):
+        for array in (getattr(value, 'data', None), getattr(value, 'indices', None), getattr(value, 'indptr', None)):
+            if isinstance(array, np.ndarray):
+                array.setflags(write=False)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _make_readonly(item, seen, depth + 1)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _make_readonly(item, seen, depth + 1)
+    elif hasattr(value, 'get_params') or isinstance(value, (RetrievalIndex, UserNeighborModel, TwoTowerPreferenceModel)):
+        # scikit-learn estimators and our own models keep their state as plain attributes
+        for item in vars(value).values():
+            _make_readonly(item, seen, depth + 1)
+
+def freeze_engines():
+    """Prepare the shared engines for a preload-then-fork deployment.
     
-    ml_engine = FallbackMLEngine()
-    dl_engine = DLRecommendationEngine()
+    Call in the master after the engines are built and before workers fork:
+    model arrays become read-only and every live object is moved to the
+    permanent GC generation, so the collector never writes to those pages
+    and forked workers keep sharing them copy-on-write.
+    """
+    seen = set()
+    for engine in list(_engine_registry.values()):
+        for value in vars(engine).values():
+            _make_readonly(value, seen)
+    
+    gc.collect()
+    gc.freeze()
+    logger.info("🧊 Frozen %s engines (%s objects) for fork sharing", len(_engine_registry), gc.get_freeze_count())
+
+def process_memory_report(pid='self'):
+    """RSS/PSS/USS of a process in MB, read from /proc (Linux only)"""
+    report = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line and not line.startswith(' '))
+        kb = lambda key: int(fields.get(key, '0 kB').split()[0])
+        report = {
+            'rss_mb': kb('Rss') / 1024,
+            'pss_mb': kb('Pss') / 1024,
+            'uss_mb': (kb('Private_Clean') + kb('Private_Dirty')) / 1024,
+            'shared_mb': (kb('Shared_Clean') + kb('Shared_Dirty')) / 1024
+        }
+    except (OSError, ValueError):
+        pass
+    return report
@@ -0,0 +1,160 @@
+import os
+
+import numpy as np
+
+
+# Bump when the weight layout or the training procedure changes so exported weights are retrained
+PREFERENCE_MODEL_VERSION = 1
+
+_LAYERS = ('user_w1', 'user_b1', 'user_w2', 'user_b2', 'item_w1', 'item_b1', 'item_w2', 'item_b2', 'bias')
+
+
+def _sigmoid(x):
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+class TwoTowerPreferenceModel:
+    """Two-tower preference model whose inference is plain NumPy.
+
+    Each tower is a one-hidden-layer MLP (ReLU) mapping user or item
+    features to an embedding; the preference of a user for an item is
+    sigmoid(user_embedding . item_embedding + bias). Item embeddings are
+    computed once, so scoring every item for a batch of users is a single
+    matrix multiply.
+    """
+
+    def __init__(self, weights, metadata=None):
+        self.weights = {name: np.ascontiguousarray(weights[name], dtype=np.float32) for name in _LAYERS}
+        self.metadata = dict(metadata or {})
+
+    @property
+    def embedding_dim(self):
+        return self.weights['user_w2'].shape[1]
+
+    def _tower(self, features, prefix):
+        w = self.weights
+        hidden = features @ w[prefix + '_w1']
+        hidden += w[prefix + '_b1']
+        np.maximum(hidden, 0.0, out=hidden)
+        embedding = hidden @ w[prefix + '_w2']
+        embedding += w[prefix + '_b2']
+        return embedding
+
+    def embed_users(self, features):
+        """(n_users, embedding_dim) float32 embeddings of the user feature rows"""
+        return self._tower(np.asarray(features, dtype=np.float32), 'user')
+
+    def embed_items(self, features):
+        """(n_items, embedding_dim) float32 embeddings of the item feature rows"""
+        return self._tower(np.asarray(features, dtype=np.float32), 'item')
+
+    def score(self, user_embeddings, item_embeddings):
+        """(n_users, n_items) preference probabilities"""
+        logits = np.atleast_2d(user_embeddings) @ item_embeddings.T
+        logits += self.weights['bias']
+        return _sigmoid(logits)
+
+    def save(self, path):
+        """Export the weights and metadata as one .npz file (written atomically)"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        arrays = dict(self.weights)
+        arrays.update({f'meta_{key}': np.asarray(value) for key, value in self.metadata.items()})
+        tmp_path = f'{path}.{os.getpid()}.tmp.npz'
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            weights = {name: arrays[name] for name in _LAYERS}
+            metadata = {
+                key[len('meta_'):]: arrays[key].item() if arrays[key].ndim == 0 else arrays[key]
+                for key in arrays.files if key.startswith('meta_')
+            }
+        return cls(weights, metadata)
+
+    @classmethod
+    def train(cls, user_features, item_features, labels, sample_weights=None, hidden_dim=32, embedding_dim=16,
+              epochs=400, learning_rate=0.01, l2=1e-4, seed=42, metadata=None):
+        """Fit both towers on a full user x item label grid with Adam and binary cross-entropy.
+
+        labels[u, i] is 1 when user u prefers item i and 0 otherwise;
+        sample_weights (same shape) can up-weight observed pairs. The grid is
+        small (users x catalog items), so every epoch is one full batch.
+        """
+        rng = np.random.default_rng(seed)
+        user_x = np.asarray(user_features, dtype=np.float64)
+        item_x = np.asarray(item_features, dtype=np.float64)
+        y = np.asarray(labels, dtype=np.float64)
+        sample_w = np.ones_like(y) if sample_weights is None else np.asarray(sample_weights, dtype=np.float64)
+        sample_w = sample_w / sample_w.sum()
+
+        def init(fan_in, fan_out):
+            return rng.normal(0.0, np.sqrt(2.0 / fan_in), size=(fan_in, fan_out))
+
+        params = {
+            'user_w1': init(user_x.shape[1], hidden_dim), 'user_b1': np.zeros(hidden_dim),
+            'user_w2': init(hidden_dim, embedding_dim), 'user_b2': np.zeros(embedding_dim),
+            'item_w1': init(item_x.shape[1], hidden_dim), 'item_b1': np.zeros(hidden_dim),
+            'item_w2': init(hidden_dim, embedding_dim), 'item_b2': np.zeros(embedding_dim),
+            'bias': np.zeros(1)
+        }
+        moments = {name: (np.zeros_like(value), np.zeros_like(value)) for name, value in params.items()}
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+
+        for step in range(1, epochs + 1):
+            user_hidden = np.maximum(user_x @ params['user_w1'] + params['user_b1'], 0.0)
+            user_emb = user_hidden @ params['user_w2'] + params['user_b2']
+            item_hidden = np.maximum(item_x @ params['item_w1'] + params['item_b1'], 0.0)
+            item_emb = item_hidden @ params['item_w2'] + params['item_b2']
+            probabilities = _sigmoid(user_emb @ item_emb.T + params['bias'])
+
+            # d(weighted BCE)/d(logits)
+            d_logits = sample_w * (probabilities - y)
+            d_user_emb = d_logits @ item_emb
+            d_item_emb = d_logits.T @ user_emb
+            d_user_hidden = (d_user_emb @ params['user_w2'].T) * (user_hidden > 0)
+            d_item_hidden = (d_item_emb @ params['item_w2'].T) * (item_hidden > 0)
+            grads = {
+                'user_w2': user_hidden.T @ d_user_emb, 'user_b2': d_user_emb.sum(axis=0),
+                'user_w1': user_x.T @ d_user_hidden, 'user_b1': d_user_hidden.sum(axis=0),
+                'item_w2': item_hidden.T @ d_item_emb, 'item_b2': d_item_emb.sum(axis=0),
+                'item_w1': item_x.T @ d_item_hidden, 'item_b1': d_item_hidden.sum(axis=0),
+                'bias': np.array([d_logits.sum()])
+            }
+
+            for name, grad in grads.items():
+                if name.endswith(('_w1', '_w2')):
+                    grad = grad + l2 * params[name]
+                first, second = moments[name]
+                first *= beta1
+                first += (1 - beta1) * grad
+                second *= beta2
+                second += (1 - beta2) * grad * grad
+                corrected_first = first / (1 - beta1 ** step)
+                corrected_second = second / (1 - beta2 ** step)
+                params[name] -= learning_rate * corrected_first / (np.sqrt(corrected_second) + eps)
+
+        eps_log = 1e-7
+        loss = -float(np.sum(sample_w * (y * np.log(probabilities + eps_log) +
+                                         (1 - y) * np.log(1 - probabilities + eps_log))))
+        metadata = dict(metadata or {})
+        metadata.update({'version': PREFERENCE_MODEL_VERSION, 'training_loss': loss, 'epochs': epochs})
+        return cls(params, metadata)
+
+
+def main():
+    """Train the DL engine's model on the current ML training data and export it:
+
+        python preference_model.py
+    """
+    import logging
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    from ml_models_fixed import PREFERENCE_MODEL_PATH, get_dl_engine
+    model = get_dl_engine().train()
+    model.save(PREFERENCE_MODEL_PATH)
+    print(f"💾 Preference model exported to {PREFERENCE_MODEL_PATH}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+
+
+# sampling - a background thread records the request thread's stack every interval
+#            (low overhead, flamegraph-ready collapsed stacks)
+# cprofile - deterministic cProfile of the request thread (exact call counts, slows the
+#            request down); also writes collapsed stacks from the sampler
+PROFILE_MODES = ('sampling', 'cprofile')
+
+PROFILE_EXTENSIONS = ('.collapsed', '.pstats', '.json')
+
+_UNSAFE_NAME_CHARACTERS = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Counts the stacks one thread is in, sampled every interval seconds"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                key = ';'.join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+                self.samples += 1
+
+    def collapsed(self):
+        """Stacks in the collapsed format read by flamegraph.pl and speedscope: 'root;...;leaf count'"""
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(self.counts.items()))
+
+
+class ProfileSession:
+    """Profiling of one request, started on the thread that handles it"""
+
+    def __init__(self, mode, interval):
+        self.mode = mode
+        self.started_at = time.perf_counter()
+        self.sampler = StackSampler(threading.get_ident(), interval)
+        self.profile = cProfile.Profile() if mode == 'cprofile' else None
+        self.sampler.start()
+        if self.profile is not None:
+            self.profile.enable()
+
+    def stop(self):
+        if self.profile is not None:
+            self.profile.disable()
+        self.sampler.stop()
+        return time.perf_counter() - self.started_at
+
+
+class RequestProfiler:
+    """Profiles single requests on demand and keeps the newest keep profiles in directory.
+
+    A profile is <name>.collapsed (sampled stacks), <name>.pstats (cProfile
+    mode only, open with pstats or snakeviz) and <name>.json (what was
+    profiled). Only the thread handling the request is profiled: work it
+    hands to the engine pool shows up as time spent waiting on the result,
+    and a streamed body is produced after the profile ends.
+
+    One request per process is profiled at a time: cProfile allows a single
+    active profiler (Python 3.12+ raises ValueError for a second one), so
+    start() returns None while another session runs and the request goes
+    unprofiled.
+    """
+
+    def __init__(self, directory, keep=50, sample_rate=0.0, interval=0.005, default_mode='sampling'):
+        if default_mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{default_mode}', expected one of {list(PROFILE_MODES)}")
+        self.directory = directory
+        self.keep = keep
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.default_mode = default_mode
+        self._lock = threading.Lock()
+        self._active = threading.Lock()
+
+    def sampled(self):
+        """True for the sample_rate share of requests chosen for profiling"""
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self, mode=None):
+        """A running ProfileSession, or None while another request is being profiled"""
+        if not self._active.acquire(blocking=False):
+            return None
+        mode = mode if mode in PROFILE_MODES else self.default_mode
+        try:
+            return ProfileSession(mode, self.interval)
+        except Exception:
+            self._active.release()
+            raise
+
+    def save(self, session, route, method, request_id=None):
+        """Stop session and write its files; returns the profile name"""
+        try:
+            elapsed = session.stop()
+        finally:
+            self._active.release()
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.gmtime())
+        slug = _UNSAFE_NAME_CHARACTERS.sub('_', f'{method}-{route}').strip('_')[:60]
+        name = f'{stamp}-{slug}-{(request_id or os.urandom(4).hex())[:16]}'
+        name = _UNSAFE_NAME_CHARACTERS.sub('_', name)
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, name)
+
+        with open(base + '.collapsed', 'w', encoding='utf-8') as collapsed:
+            collapsed.write(session.sampler.collapsed())
+        if session.profile is not None:
+            pstats.Stats(session.profile).dump_stats(base + '.pstats')
+        with open(base + '.json', 'w', encoding='utf-8') as meta:
+            json.dump({
+                'name': name,
+                'route': route,
+                'method': method,
+                'request_id': request_id,
+                'mode': session.mode,
+                'duration_ms': round(elapsed * 1000, 1),
+                'samples': session.sampler.samples,
+                'created_at': time.time()
+            }, meta)
+        self._rotate()
+        return name
+
+    def _rotate(self):
+        with self._lock:
+            profiles = sorted(self._metadata_files(), key=os.path.getmtime, reverse=True)
+            for path in profiles[self.keep:]:
+                base = path[:-len('.json')]
+                for extension in PROFILE_EXTENSIONS:
+                    try:
+                        os.remove(base + extension)
+                    except FileNotFoundError:
+                        pass
+
+    def _metadata_files(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.json')]
+
+    def list_profiles(self):
+        """Metadata of the stored profiles, newest first, with the files each one has"""
+        profiles = []
+        for path in self._metadata_files():
+            try:
+                with open(path, encoding='utf-8') as meta:
+                    entry = json.load(meta)
+            except (OSError, ValueError):
+                continue
+            base = path[:-len('.json')]
+            entry['files'] = [
+                os.path.basename(base + extension) for extension in PROFILE_EXTENSIONS
+                if os.path.exists(base + extension)
+            ]
+            profiles.append(entry)
+        return sorted(profiles, key=lambda entry: entry.get('created_at', 0), reverse=True)
+
+    def file_path(self, filename):
+        """Path of a stored profile file, or None for names that are not one"""
+        if filename != os.path.basename(filename) or not filename.endswith(PROFILE_EXTENSIONS):
+            return None
+        path = os.path.join(self.directory, filename)
+        return path if os.path.isfile(path) else None
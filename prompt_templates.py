@@ -0,0 +1,116 @@
+import string
+import threading
+
+
+def estimate_tokens(text):
+    """Rough token count for Gemini models (about 4 characters per token)"""
+    return (len(text) + 3) // 4 if text else 0
+
+
+class PromptTemplate:
+    """A str.format template split into literal text and field names once, at import.
+
+    render() only joins the pieces, and the token cost of the fixed text is
+    known up front, so callers can see how much of a prompt is boilerplate.
+    """
+
+    def __init__(self, name, template):
+        self.name = name
+        self.parts = []
+        for literal, field, _, _ in string.Formatter().parse(' '.join(template.split())):
+            if literal:
+                self.parts.append((literal, None))
+            if field is not None:
+                self.parts.append((None, field))
+        self.fields = {field for _, field in self.parts if field is not None}
+        self.fixed_tokens = estimate_tokens(''.join(literal for literal, _ in self.parts if literal))
+
+    def render(self, **values):
+        return ''.join(literal if field is None else str(values[field]) for literal, field in self.parts)
+
+
+def budget_context(facts, max_tokens):
+    """Join ML context facts, most important first, until max_tokens is used up.
+
+    A fact that does not fit whole is dropped along with everything after
+    it, so the model never sees a fact cut off mid-sentence.
+    """
+    kept = []
+    used = 0
+    for fact in facts:
+        if not fact:
+            continue
+        cost = estimate_tokens(fact) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(fact)
+        used += cost
+    return ' '.join(kept)
+
+
+def percent_list(pairs, limit):
+    """'A 37%, B 16%' from (label, percent) pairs"""
+    return ', '.join(f"{label} {percent:.0f}%" for label, percent in pairs[:limit])
+
+
+# Whitespace in the templates is collapsed at import, so they can be laid out readably here.
+# The JSON field lists only name the keys: the response schema sent with each request enforces types.
+CERTIFICATE_PROMPT = PromptTemplate('certificates', """
+    Recommend 6-8 real, currently offered certificates (Google, Microsoft, AWS, IBM, Meta, Coursera,
+    Salesforce) for this learner. Interests: {interests}. Goals: {goals}. Course preference: {course_preference}.
+    {ml_context}
+    Reply with JSON: {{"certificates":[{{"name","provider","description":"why it fits",
+    "relevance_score":0-100,"ml_enhanced":bool,"cost","duration","skills":[],"url"}}],
+    "ml_insights":{{"user_cluster","predicted_careers","confidence_boost"}}}}
+""")
+
+COURSE_PROMPT = PromptTemplate('courses', """
+    Recommend 7-10 real courses (Coursera, Udemy, edX, Khan Academy, ...) for this learner.
+    Learning preferences: {learning_prefs}. Education: {education_bg}. Career aspirations: {career_aspirations}.
+    {ml_context}
+    Reply with JSON: {{"courses":[{{"title","provider","description":"why it fits","relevance_score":0-100,
+    "ml_enhanced":bool,"difficulty","duration","price","skills":[],"url"}}],
+    "ml_insights":{{"content_similarity","career_alignment","ml_boost"}}}}
+""")
+
+COMPANY_PROMPT = PromptTemplate('companies', """
+    List 10-12 real companies that operate in {location}, India and hire for "{job_title}" roles.
+    {ml_context}
+    Reply with JSON: {{"companies":[{{"name","industry","description":"{location} presence",
+    "why_relevant","ml_match_score":0-100,"search_query","company_size"}}],
+    "ml_insights":{{"cluster_match","market_analysis","success_probability"}}}}
+""")
+
+
+class TokenUsage:
+    """Prompt and completion token totals per endpoint.
+
+    Counts come from the API's usage metadata when the response carries it,
+    and from estimate_tokens() otherwise.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, prompt_tokens, completion_tokens, estimated=False):
+        with self._lock:
+            totals = self._endpoints.setdefault(endpoint, {
+                'requests': 0,
+                'prompt_tokens': 0,
+                'completion_tokens': 0,
+                'estimated_requests': 0
+            })
+            totals['requests'] += 1
+            totals['prompt_tokens'] += prompt_tokens
+            totals['completion_tokens'] += completion_tokens
+            totals['estimated_requests'] += int(estimated)
+
+    def snapshot(self):
+        """Totals and per-request averages for every endpoint"""
+        with self._lock:
+            endpoints = {name: dict(totals) for name, totals in self._endpoints.items()}
+        for totals in endpoints.values():
+            totals['avg_prompt_tokens'] = round(totals['prompt_tokens'] / totals['requests'], 1)
+            totals['avg_completion_tokens'] = round(totals['completion_tokens'] / totals['requests'], 1)
+        return endpoints
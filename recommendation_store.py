@@ -0,0 +1,290 @@
+import base64
+import json
+import logging
+import threading
+import time
+from urllib.parse import quote_plus
+
+from response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+
+# Bump when the shape of materialized items changes so stored lists are rebuilt
+MATERIALIZED_VERSION = 1
+
+RECOMMENDATION_TYPES = ('courses', 'certificates', 'jobs')
+
+EDUCATION_LEVELS = ('High School', 'Associate', 'Bachelor', 'Master', 'PhD')
+
+
+def recommendation_inputs(profile, saved_items, interaction_version=0):
+    """The stored user fields a materialized recommendation list depends on"""
+    return {
+        'interactions': interaction_version,
+        'education': profile.get('education', ''),
+        'skills': profile.get('skills', ''),
+        'aspirations': profile.get('aspirations', ''),
+        'saved_courses': [item.get('title', '') for item in saved_items.get('courses', [])],
+        'saved_certificates': [item.get('name', '') for item in saved_items.get('certificates', [])],
+        'saved_jobs': [item.get('name', '') for item in saved_items.get('jobs', [])]
+    }
+
+
+def education_level(education):
+    """Map free-text education (e.g. "Master's in CS") to a level the career classifier knows"""
+    for level in EDUCATION_LEVELS:
+        if level.lower() in str(education or '').lower():
+            return level
+    return 'Bachelor'
+
+
+def encode_cursor(fingerprint, offset):
+    """Opaque cursor for the page starting at offset of the list built from fingerprint"""
+    payload = json.dumps({'f': fingerprint, 'o': offset}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(fingerprint, offset) of a cursor; raises ValueError when it is malformed"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        fingerprint, offset = str(payload['f']), int(payload['o'])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError('Invalid cursor')
+    if offset < 0:
+        raise ValueError('Invalid cursor')
+    return fingerprint, offset
+
+
+class RecommendationBuilder:
+    """Builds the course, certificate and job lists for one user from the ML engine.
+
+    Only the ML models are used, never Gemini, so a build costs a few
+    milliseconds of CPU and no API quota.
+    """
+
+    def __init__(self, ml_engine, depth=50):
+        self.ml_engine = ml_engine
+        self.depth = depth
+
+    def engine_version(self):
+        """Changes whenever the engine is retrained, so stored lists follow the model"""
+        return getattr(self.ml_engine, 'artifact_checksum', None) or 'untracked'
+
+    def _ml_profile(self, user_id, inputs):
+        interests = ' '.join(
+            [str(inputs['skills'] or ''), str(inputs['aspirations'] or '')] + inputs['saved_courses']
+        ).strip()
+        return {
+            'user_id': user_id,
+            'interests': interests,
+            'career_goal': inputs['aspirations'],
+            'education_level': education_level(inputs['education'])
+        }
+
+    def build(self, kind, user_id, inputs):
+        """(items, ai_insights) for one recommendation type"""
+        if inputs.get('interactions'):
+            # The list is fingerprinted with the user's latest interaction; make sure the model has it
+            self.ml_engine.sync_interactions()
+        profile = self._ml_profile(user_id, inputs)
+        if not profile['interests']:
+            return [], None
+        return getattr(self, f'_build_{kind}')(profile, inputs)
+
+    def _build_courses(self, profile, inputs):
+        saved = {title.lower() for title in inputs['saved_courses']}
+        recs = self.ml_engine.get_hybrid_recommendations(profile, self.depth + len(saved))
+        items = []
+        for rec in recs:
+            if rec['title'].lower() in saved:
+                continue
+            items.append({
+                'id': rec.get('course_id'),
+                'title': rec['title'],
+                'provider': 'ML-Curated Platform',
+                'description': f"{rec['difficulty']} {rec['category']} course, selected by "
+                               f"{rec['recommendation_type']} with {rec['ml_confidence']:.1f}% match",
+                'category': rec['category'],
+                'difficulty': rec['difficulty'],
+                'duration': f"{rec['duration_hours']} hours",
+                'rating': rec['rating'],
+                'relevance_score': int(rec['ml_confidence']),
+                'recommendation_type': rec['recommendation_type'],
+                'url': f"https://www.coursera.org/search?query={quote_plus(rec['title'])}"
+            })
+        items = items[:self.depth]
+        return items, self._insights(items, profile, 'Hybrid ML (Content-Based + Collaborative)')
+
+    def _build_certificates(self, profile, inputs):
+        saved = {name.lower() for name in inputs['saved_certificates']}
+        recs = self.ml_engine.get_hybrid_recommendations(profile, self.depth + len(saved))
+        items = []
+        for rec in recs:
+            name = f"{rec['title']} Professional Certificate"
+            if name.lower() in saved:
+                continue
+            items.append({
+                'id': rec.get('course_id'),
+                'title': name,
+                'provider': 'ML-Recommended Provider',
+                'description': f"{rec['category']} certificate, selected by {rec['recommendation_type']} "
+                               f"with {rec['ml_confidence']:.1f}% confidence",
+                'category': rec['category'],
+                'duration': f"{rec['duration_hours']} hours",
+                'relevance_score': int(rec['ml_confidence']),
+                'recommendation_type': rec['recommendation_type'],
+                'url': f"https://www.coursera.org/search?query={quote_plus(rec['title'] + ' certificate')}"
+            })
+        items = items[:self.depth]
+        return items, self._insights(items, profile, 'Hybrid ML (Content-Based + Collaborative)')
+
+    def _build_jobs(self, profile, inputs):
+        predictions = self.ml_engine.predict_career_path(profile)
+        cluster = self.ml_engine.get_user_cluster_insights(profile['interests'])
+
+        # Predicted careers first, then the goals common in the user's cluster
+        careers = [(p['career_path'], p['confidence'], p['prediction_type']) for p in predictions]
+        seen = {career for career, _, _ in careers}
+        cluster_size = max(cluster.get('cluster_size', 0), 1)
+        for career, count in (cluster.get('common_career_goals') or {}).items():
+            if career not in seen:
+                careers.append((career, min(100.0 * count / cluster_size, 95.0), cluster.get('analysis_type')))
+                seen.add(career)
+
+        items = []
+        for career, confidence, source in careers[:self.depth]:
+            items.append({
+                'id': None,
+                'title': career,
+                'provider': f"Matched by {source}",
+                'description': f"{career} roles match your profile with {confidence:.1f}% ML confidence",
+                'location': 'Remote / Various',
+                'experience_level': 'Entry to mid level' if profile['education_level'] in ('High School', 'Associate')
+                                    else 'Mid to senior level',
+                'relevance_score': int(confidence),
+                'url': f"https://www.linkedin.com/jobs/search/?keywords={quote_plus(career)}"
+            })
+        return items, self._insights(items, profile, 'Random Forest + K-Means Clustering')
+
+    @staticmethod
+    def _insights(items, profile, engine):
+        """ai_insights payload summarizing a list, built from the ML results alone"""
+        if not items:
+            return None
+        categories = []
+        for item in items:
+            category = item.get('category')
+            if category and category not in categories:
+                categories.append(category)
+        interests = profile['interests'].lower()
+        return {
+            'recommendations': [item['title'] for item in items[:3]],
+            'reasoning': f"Ranked by {engine} from your skills, aspirations and saved items",
+            'skills_gap': [category for category in categories if category.lower() not in interests][:3],
+            'career_advice': f"Start with {items[0]['title']} ({items[0]['relevance_score']}% match)"
+        }
+
+
+class MaterializedRecommendations:
+    """Per-user recommendation lists computed in the background and served from a cache.
+
+    Each (user, type) entry records the fingerprint of the inputs it was built
+    from: the stored profile fields, the saved items, the user's latest
+    tracked interaction and the model version.
+    get() never computes anything itself. When the stored fingerprint matches
+    it returns the list; otherwise it schedules a rebuild on the executor and
+    reports the entry as pending, together with the previous list if there is
+    one. Entries live in a ResponseCache, so every worker on the host shares
+    them and they survive restarts; entries are rewritten in place, so the
+    cache should read them from its shared disk tier (memory_ttl_seconds=0)
+    for every worker to see the same list.
+    """
+
+    def __init__(self, builder, cache, executor):
+        self.builder = builder
+        self.cache = cache
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._building = set()
+        self._stats = {
+            'builds': 0,
+            'build_errors': 0,
+            'ready': 0,
+            'stale': 0,
+            'pending': 0,
+            'last_build_ms': None
+        }
+
+    @staticmethod
+    def _key(user_id, kind):
+        return ResponseCache.make_key('materialized-recommendations', kind, MATERIALIZED_VERSION, user_id=user_id)
+
+    def fingerprint(self, kind, inputs):
+        """Hash of everything a list depends on; equal inputs in any order or case match"""
+        return ResponseCache.make_key(
+            'recommendation-inputs', kind, MATERIALIZED_VERSION, engine=self.builder.engine_version(), **inputs
+        )
+
+    def get(self, user_id, kind, inputs):
+        """(status, entry): 'ready', 'stale' (previous list, rebuild queued) or 'pending' (entry is None)"""
+        fingerprint = self.fingerprint(kind, inputs)
+        entry = self.cache.get(self._key(user_id, kind))
+        if entry is not None and entry['fingerprint'] == fingerprint:
+            status = 'ready'
+        else:
+            self._schedule(user_id, kind, inputs, fingerprint)
+            status = 'stale' if entry is not None else 'pending'
+        with self._lock:
+            self._stats[status] += 1
+        return status, entry
+
+    def refresh(self, user_id, inputs, kinds=RECOMMENDATION_TYPES):
+        """Queue rebuilds for lists whose inputs changed (call after the inputs are saved)"""
+        for kind in kinds:
+            fingerprint = self.fingerprint(kind, inputs)
+            entry = self.cache.get(self._key(user_id, kind))
+            if entry is None or entry['fingerprint'] != fingerprint:
+                self._schedule(user_id, kind, inputs, fingerprint)
+
+    def _schedule(self, user_id, kind, inputs, fingerprint):
+        job = (self._key(user_id, kind), fingerprint)
+        with self._lock:
+            if job in self._building:
+                return
+            self._building.add(job)
+        try:
+            self.executor.submit(self._build, job, user_id, kind, dict(inputs), fingerprint)
+        except RuntimeError as e:
+            logger.warning("⚠️ Could not queue %s recommendations for %s: %s", kind, user_id, e)
+            with self._lock:
+                self._building.discard(job)
+
+    def _build(self, job, user_id, kind, inputs, fingerprint):
+        start = time.perf_counter()
+        try:
+            items, insights = self.builder.build(kind, user_id, inputs)
+            self.cache.set(job[0], {
+                'fingerprint': fingerprint,
+                'items': items,
+                'ai_insights': insights,
+                'computed_at': time.time()
+            })
+            with self._lock:
+                self._stats['builds'] += 1
+                self._stats['last_build_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        except Exception as e:
+            logger.exception("❌ Materializing %s recommendations for %s failed: %s", kind, user_id, e)
+            with self._lock:
+                self._stats['build_errors'] += 1
+        finally:
+            with self._lock:
+                self._building.discard(job)
+
+    def stats(self):
+        """Build counters and how often each status was served"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['building'] = len(self._building)
+        return stats
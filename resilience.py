@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import deque
+
+
+class DeadlineExceeded(TimeoutError):
+    """The upstream call did not answer within its latency budget"""
+
+
+class CircuitOpenError(RuntimeError):
+    """The upstream is being skipped until the circuit breaker's cool-down ends"""
+
+
+class CircuitBreaker:
+    """Stops calling an upstream after repeated failures.
+
+    After failure_threshold consecutive failures (errors or timeouts) the
+    circuit opens and allow() refuses calls for cooldown_seconds. Then one
+    trial call is let through (half-open): success closes the circuit, a
+    failure opens it for another cool-down.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown_seconds=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._stats = {
+            'successes': 0,
+            'failures': 0,
+            'rejected': 0,
+            'opened': 0
+        }
+
+    def allow(self):
+        """True when a call may be made now"""
+        with self._lock:
+            if self._state == 'open' and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+                self._state = 'half_open'
+                self._trial_in_flight = False
+            if self._state == 'closed':
+                return True
+            if self._state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._stats['rejected'] += 1
+            return False
+
+    def is_closed(self):
+        """True while calls flow normally (does not use up a half-open trial)"""
+        with self._lock:
+            return self._state == 'closed'
+
+    def release(self):
+        """End a call allowed by allow() without judging the upstream (e.g. the caller gave up first)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._stats['successes'] += 1
+            self._failures = 0
+            self._state = 'closed'
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._stats['failures'] += 1
+            self._failures += 1
+            if self._state == 'half_open' or self._failures >= self.failure_threshold:
+                if self._state != 'open':
+                    self._stats['opened'] += 1
+                self._state = 'open'
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['state'] = self._state
+            stats['consecutive_failures'] = self._failures
+            if self._state == 'open':
+                stats['retry_in_seconds'] = round(
+                    max(self.cooldown_seconds - (time.monotonic() - self._opened_at), 0.0), 1
+                )
+        return stats
+
+
+class LatencyWindow:
+    """The latest max_samples latencies of successful calls, for percentile estimates"""
+
+    def __init__(self, max_samples=200, min_samples=20):
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=max_samples)
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q):
+        """q-th percentile in seconds, or None until min_samples calls were seen"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(int(len(samples) * q / 100.0), len(samples) - 1)]
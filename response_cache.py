@@ -0,0 +1,202 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Two-tier LRU/TTL cache for generated AI responses.
+
+    Tier 1 is an in-process LRU dict; tier 2 is a SQLite file shared by every
+    worker on the host. Both tiers expire entries after ttl_seconds and evict
+    the least recently used entries once they exceed their size limit.
+
+    A worker's memory tier does not see entries other workers overwrite, so
+    for values that change in place memory_ttl_seconds bounds how long it
+    keeps a copy; 0 turns the memory tier off and every read goes to disk.
+    """
+
+    def __init__(self, db_path, ttl_seconds=86400, max_memory_entries=512, max_disk_entries=50000,
+                 memory_ttl_seconds=None):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.memory_ttl_seconds = memory_ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes_since_prune = 0
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'evictions': 0,
+            'errors': 0
+        }
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            conn = self._connection()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_expires ON responses (expires_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses (last_access)")
+            conn.commit()
+            self.disk_enabled = True
+        except sqlite3.Error as e:
+            logger.warning("⚠️ Response cache disk tier disabled: %s", e)
+            self.disk_enabled = False
+
+    @staticmethod
+    def _normalize(value):
+        """Collapse whitespace and case so equivalent form values share a key"""
+        if isinstance(value, (list, tuple, set)):
+            return sorted({ResponseCache._normalize(item) for item in value})
+        if isinstance(value, str):
+            return ' '.join(value.split()).lower()
+        return value
+
+    @staticmethod
+    def make_key(endpoint, model_name, template_version, **fields):
+        """Canonical cache key for a request: order, case and duplicates in the inputs do not matter"""
+        canonical = {
+            'endpoint': endpoint,
+            'model': model_name,
+            'template_version': template_version,
+            'fields': {name: ResponseCache._normalize(value) for name, value in fields.items()}
+        }
+        payload = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _connection(self):
+        """One SQLite connection per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key, value, expires_at):
+        """Insert into the memory tier, evicting the least recently used entries"""
+        if self.memory_ttl_seconds is not None:
+            if self.memory_ttl_seconds <= 0:
+                return
+            expires_at = min(expires_at, time.time() + self.memory_ttl_seconds)
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def get(self, key):
+        """Return the cached value for key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return entry[1]
+                del self._memory[key]
+
+        if self.disk_enabled:
+            try:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?",
+                    (key, now)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                    conn.commit()
+                    value = json.loads(row[0])
+                    self._remember(key, value, row[1])
+                    with self._lock:
+                        self._stats['disk_hits'] += 1
+                    return value
+            except sqlite3.Error as e:
+                logger.warning("⚠️ Response cache read error: %s", e)
+                with self._lock:
+                    self._stats['errors'] += 1
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def set(self, key, value):
+        """Store value under key in both tiers"""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        self._remember(key, value, expires_at)
+
+        with self._lock:
+            self._stats['sets'] += 1
+            self._writes_since_prune += 1
+            prune = self._writes_since_prune >= 100
+            if prune:
+                self._writes_since_prune = 0
+
+        if self.disk_enabled:
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), expires_at, now)
+                )
+                conn.commit()
+                if prune:
+                    self.prune()
+            except sqlite3.Error as e:
+                logger.warning("⚠️ Response cache write error: %s", e)
+                with self._lock:
+                    self._stats['errors'] += 1
+
+    def prune(self):
+        """Drop expired disk entries and trim the disk tier to max_disk_entries"""
+        conn = self._connection()
+        removed = conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+        removed += conn.execute("""
+            DELETE FROM responses WHERE key IN (
+                SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_disk_entries,)).rowcount
+        conn.commit()
+        with self._lock:
+            self._stats['evictions'] += removed
+
+    def clear(self):
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+        if self.disk_enabled:
+            conn = self._connection()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def stats(self):
+        """Hit/miss counters for both tiers"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,330 @@
+import numpy as np
+from scipy import sparse
+
+# Row v holds the bits of the byte v, lowest first
+_BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1, bitorder='little').astype(np.float32)
+
+
+class RetrievalIndex:
+    """Exact top-k search over the rows of an L2-normalized sparse matrix.
+
+    Rows are catalog items (e.g. the course TF-IDF matrix) and queries are
+    sparse vectors in the same feature space, so the dot product is the cosine
+    similarity. Subclasses choose how candidates are scored and pruned.
+    """
+
+    def __init__(self, matrix):
+        self.n_items, self.n_features = matrix.shape
+
+    def search(self, query, k):
+        """Return (item indices, scores) of the k best items, best first"""
+        raise NotImplementedError
+
+    def search_batch(self, queries, k):
+        """search() for every row of a sparse query matrix"""
+        queries = sparse.csr_matrix(queries)
+        return [self.search(queries[i], k) for i in range(queries.shape[0])]
+
+    def _finalize(self, candidates, scores, k):
+        """Order the k best candidates and pad with zero-score items if needed"""
+        k = min(k, self.n_items)
+        if len(candidates) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[best], scores[best]
+        order = np.argsort(-scores, kind='stable')
+        candidates, scores = candidates[order], scores[order]
+
+        if len(candidates) < k:
+            # Every item scores at least 0, so fill up with the first unscored items
+            taken = set(candidates.tolist())
+            padding = []
+            item = 0
+            while len(candidates) + len(padding) < k:
+                if item not in taken:
+                    padding.append(item)
+                item += 1
+            candidates = np.concatenate([candidates, np.asarray(padding, dtype=candidates.dtype)])
+            scores = np.concatenate([scores, np.zeros(len(padding), dtype=scores.dtype)])
+        return candidates, scores
+
+
+class ExactBlockIndex(RetrievalIndex):
+    """Brute-force scoring in row blocks with argpartition top-k per block.
+
+    Memory stays bounded by block_size x queries, and every block only keeps
+    its own k best rows before the final merge.
+    """
+
+    def __init__(self, matrix, block_size=65536):
+        super().__init__(matrix)
+        matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+        self.blocks = [
+            (start, matrix[start:start + block_size].T.tocsr())
+            for start in range(0, self.n_items, block_size)
+        ]
+
+    def search(self, query, k):
+        return self.search_batch(query, k)[0]
+
+    def search_batch(self, queries, k):
+        queries = sparse.csr_matrix(queries, dtype=np.float32)
+        n_queries = queries.shape[0]
+        block_candidates = [[] for _ in range(n_queries)]
+        block_scores = [[] for _ in range(n_queries)]
+
+        for start, block_t in self.blocks:
+            scores = (queries @ block_t).toarray()
+            kk = min(k, scores.shape[1])
+            top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            for i in range(n_queries):
+                block_candidates[i].append(top[i] + start)
+                block_scores[i].append(top_scores[i])
+
+        return [
+            self._finalize(np.concatenate(block_candidates[i]), np.concatenate(block_scores[i]), k)
+            for i in range(n_queries)
+        ]
+
+
+class InvertedIndex(RetrievalIndex):
+    """Term-at-a-time inverted index with MaxScore pruning over impact layers.
+
+    Postings are the columns of the item matrix (CSC). The postings of a
+    term with more than layer_postings items are split by weight into impact
+    layers: the layer_postings highest weights, then layers layer_ratio
+    times larger each, every layer sorted by item. A layer's maximum weight
+    bounds the score of its items, so a common term contributes a small
+    bound for most of its items instead of its single largest weight.
+
+    Layers are processed in decreasing order of their score bound. Once a
+    lower bound for the k-th best score (from exactly scoring the items with
+    the best partial scores) beats the best that the remaining layers can add
+    (per term, the bound of its next layer), those layers can no longer add
+    new items to the top k. From then on they only update surviving
+    candidates, looked up by binary search in their sorted postings, until
+    scoring the few that are left exactly from their rows is cheaper.
+
+    Batches against catalogs of up to dense_batch_items items skip the pruning
+    and score query chunks with one sparse product over the postings.
+    """
+
+    # Scoring one item exactly from its row costs about as much as adding this many postings
+    exact_score_cost = 25
+    # and looking one item up in a layer by binary search about as much as this many
+    lookup_cost = 4
+
+    def __init__(self, matrix, dense_batch_items=65536, layer_postings=2048, layer_ratio=4):
+        super().__init__(matrix)
+        self.dense_batch_items = dense_batch_items
+        # Item rows, to score the candidates that survive pruning exactly
+        self.items = sparse.csr_matrix(matrix, dtype=np.float32)
+        postings = self.items.tocsc()
+        postings.sort_indices()
+        self.indptr = postings.indptr
+        self.rows = postings.indices
+        self.weights = postings.data
+        self._build_layers(layer_postings, layer_ratio)
+
+    def _build_layers(self, layer_postings, layer_ratio):
+        """Reorder long postings lists into impact layers and record each layer's bounds"""
+        lengths = np.diff(self.indptr)
+        # One layer per non-empty term, plus the extra layers of the long ones
+        layer_starts = [self.indptr[:-1][lengths > 0]]
+        layer_terms = [np.flatnonzero(lengths > 0)]
+        for term in np.flatnonzero(lengths > layer_postings):
+            start, end = self.indptr[term], self.indptr[term + 1]
+            weights = self.weights[start:end]
+            # Weight thresholds at ranks layer_postings, layer_postings * layer_ratio, ...
+            ranks = []
+            rank = layer_postings
+            while rank < len(weights):
+                ranks.append(rank)
+                rank *= layer_ratio
+            thresholds = -np.partition(-weights, ranks)[ranks]
+            layers = np.searchsorted(-thresholds, -weights, side='right').astype(np.uint8)
+            # Stable, so every layer stays sorted by item
+            order = np.argsort(layers, kind='stable')
+            self.rows[start:end] = self.rows[start:end][order]
+            self.weights[start:end] = weights[order]
+            sizes = np.bincount(layers, minlength=len(thresholds) + 1)
+            sizes = sizes[sizes > 0]
+            layer_starts.append(start + np.cumsum(sizes)[:-1])
+            layer_terms.append(np.full(len(sizes) - 1, term))
+
+        layer_starts = np.concatenate(layer_starts)
+        layer_terms = np.concatenate(layer_terms)
+        order = np.argsort(layer_starts, kind='stable')
+        self.layer_bounds = np.concatenate([layer_starts[order], [self.indptr[-1]]]).astype(np.int64)
+        self.term_layers = np.searchsorted(layer_terms[order], np.arange(self.n_features + 1)).astype(np.int64)
+        self.layer_max = np.zeros(len(self.layer_bounds) - 1, dtype=np.float32)
+        if len(self.layer_max):
+            self.layer_max[:] = np.maximum.reduceat(self.weights, self.layer_bounds[:-1])
+
+    def search_batch(self, queries, k):
+        if self.n_items > self.dense_batch_items:
+            return super().search_batch(queries, k)
+
+        # The CSC postings are the CSR layout of the transposed item matrix
+        postings_t = sparse.csr_matrix((self.weights, self.rows, self.indptr), shape=(self.n_features, self.n_items))
+        queries = sparse.csr_matrix(queries, dtype=np.float32)
+        chunk = max(1, (1 << 22) // max(self.n_items, 1))
+        items = np.arange(self.n_items)
+        results = []
+        for start in range(0, queries.shape[0], chunk):
+            scores = (queries[start:start + chunk] @ postings_t).toarray()
+            results.extend(self._finalize(items, row, k) for row in scores)
+        return results
+
+    def _layer(self, layer):
+        start, end = self.layer_bounds[layer], self.layer_bounds[layer + 1]
+        return self.rows[start:end], self.weights[start:end]
+
+    def search(self, query, k):
+        query = sparse.csr_matrix(query, dtype=np.float32)
+        query.sum_duplicates()
+        terms, query_weights = query.indices, query.data
+        first, last = self.term_layers[terms], self.term_layers[terms + 1]
+        counts = last - first
+        # The query terms' layers, grouped by term with the highest weights first
+        group_starts = np.cumsum(counts) - counts
+        layers = np.repeat(first - group_starts, counts) + np.arange(counts.sum())
+        layer_terms = np.repeat(np.arange(len(terms)), counts)
+        bounds = query_weights[layer_terms] * self.layer_max[layers]
+        # What a term can still add once a layer is done: the bound of its next layer
+        next_bounds = np.append(bounds[1:], 0.0).astype(np.float32)
+        next_bounds[np.cumsum(counts)[counts > 0] - 1] = 0.0
+        useful = bounds > 0
+        layers, layer_terms, bounds, next_bounds = (
+            layers[useful], layer_terms[useful], bounds[useful], next_bounds[useful]
+        )
+        if len(layers) == 0:
+            return self._finalize(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), k)
+
+        order = np.argsort(-bounds, kind='stable')
+        layers, layer_terms, bounds, next_bounds = layers[order], layer_terms[order], bounds[order], next_bounds[order]
+        term_bounds = np.zeros(len(terms), dtype=np.float32)
+        np.maximum.at(term_bounds, layer_terms, bounds)
+        remaining_bounds = term_bounds.sum() - np.cumsum(bounds - next_bounds)
+        sizes = self.layer_bounds[layers + 1] - self.layer_bounds[layers]
+
+        # Layers are accumulated into a dense score array, best bound first. Weights
+        # are positive, so an item is a candidate iff its score is non-zero. matched
+        # flags the (first 32) query terms whose weight an item already has.
+        accumulator = np.zeros(self.n_items, dtype=np.float32)
+        matched = np.zeros(self.n_items, dtype=np.min_scalar_type((1 << min(len(terms), 32)) - 1))
+        touched = []
+        n_candidates = 0
+        threshold = floor = 0.0
+        unchecked = 0
+        closed = False
+        for processed, (layer, term) in enumerate(zip(layers, layer_terms), start=1):
+            rows, values = self._layer(layer)
+            if not closed:
+                new_rows = rows[accumulator[rows] == 0]
+                touched.append(new_rows)
+                n_candidates += len(new_rows)
+                unchecked += len(rows)
+            elif len(rows) > self.lookup_cost * n_candidates:
+                # Only the survivors' postings matter, so find them instead of reading the layer
+                positions = np.minimum(np.searchsorted(rows, survivors), len(rows) - 1)
+                positions = positions[rows[positions] == survivors]
+                rows, values = rows[positions], values[positions]
+                unchecked += self.lookup_cost * n_candidates
+                spent += self.lookup_cost * n_candidates
+            else:
+                unchecked += len(rows)
+                spent += len(rows)
+            np.add.at(accumulator, rows, query_weights[term] * values)
+            if term < 32:
+                matched[rows] |= matched.dtype.type(1 << int(term))
+            term_bounds[term] = next_bounds[processed - 1]
+            if processed == len(layers) or n_candidates < k:
+                continue
+            # A check costs O(candidates): check before the layers add as much work as that
+            next_cost = min(sizes[processed], self.lookup_cost * n_candidates) if closed else sizes[processed]
+            if unchecked + next_cost < n_candidates:
+                continue
+            unchecked = 0
+            candidates = np.concatenate(touched)
+            touched = [candidates]
+
+            # The k-th best exact score among the best partial scores is a lower
+            # bound for the final k-th score. Once no unseen item can reach it the
+            # candidates are closed, and only those whose partial score plus the
+            # bounds of the terms they have not matched yet reaches it are kept.
+            partial = accumulator[candidates]
+            if not closed:
+                score, floor = self._kth_best_score(candidates, partial, query, k, floor)
+                threshold = max(threshold, score)
+            # Partial and exact scores are float32 sums in different orders, so prune with some slack
+            cutoff = threshold * (1 - 1e-5)
+            remaining = remaining_bounds[processed - 1]
+            if remaining >= cutoff:
+                continue
+            alive = partial + remaining >= cutoff
+            survivors = candidates[alive]
+            upper_bounds = partial[alive] + remaining
+            # The bounds of the matched terms, summed a byte of flags at a time
+            flag_bytes = matched[survivors].astype('<u4').view(np.uint8).reshape(-1, 4)
+            flag_bounds = np.zeros(32, dtype=np.float32)
+            flag_bounds[:min(len(terms), 32)] = term_bounds[:32]
+            byte_bounds = _BYTE_BITS @ flag_bounds.reshape(4, 8).T
+            for byte in range(min(4, (len(terms) + 7) // 8)):
+                upper_bounds -= byte_bounds[flag_bytes[:, byte], byte]
+            survivors = survivors[upper_bounds >= cutoff]
+            if not closed:
+                closed = True
+                spent = 0
+                survivors = np.sort(survivors)
+            touched = [survivors]
+            n_candidates = len(survivors)
+            # Survivors drop out as the bounds shrink, so how much work the rest would
+            # take is unknown: score them exactly once that costs no more than the next
+            # layer, or than the work already spent on them since they were closed
+            if n_candidates * self.exact_score_cost <= max(next_cost, spent):
+                return self._finalize(survivors, self._item_scores(survivors, query), k)
+
+        candidates = np.concatenate(touched)
+        return self._finalize(candidates, accumulator[candidates], k)
+
+    def _kth_best_score(self, candidates, partial, query, k, floor):
+        """k-th best exact score among the candidates with the best partial scores,
+        and the lowest of those partial scores. Partial scores only grow, so the
+        floor a previous call returned still keeps at least as many candidates."""
+        count = min(len(candidates), max(16 * k, 256))
+        best = partial >= floor
+        candidates, partial = candidates[best], partial[best]
+        if count < len(candidates):
+            top = np.argpartition(-partial, count - 1)[:count]
+            candidates, partial = candidates[top], partial[top]
+        scores = self._item_scores(candidates, query)
+        return np.partition(scores, len(scores) - k)[len(scores) - k], partial.min()
+
+    def _item_scores(self, items, query):
+        """Exact scores of items: the dot products of their rows with the query"""
+        starts = self.items.indptr[items]
+        lengths = self.items.indptr[items + 1] - starts
+        offsets = np.cumsum(lengths) - lengths
+        positions = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+        features = self.items.indices[positions]
+        # Query terms are sorted, so each row entry finds its query weight by binary search
+        matches = np.minimum(np.searchsorted(query.indices, features), len(query.indices) - 1)
+        products = np.where(query.indices[matches] == features, query.data[matches], 0) * self.items.data[positions]
+        scores = np.zeros(len(items), dtype=np.float32)
+        nonempty = lengths > 0
+        scores[nonempty] = np.add.reduceat(products, offsets[nonempty]) if len(products) else 0
+        return scores
+
+
+RETRIEVAL_INDEXES = {
+    'exact': ExactBlockIndex,
+    'inverted': InvertedIndex,
+}
+
+
+def build_retrieval_index(matrix, kind='inverted'):
+    """Build the retrieval index registered under kind"""
+    if kind not in RETRIEVAL_INDEXES:
+        raise ValueError(f"Unknown retrieval index '{kind}', expected one of {sorted(RETRIEVAL_INDEXES)}")
+    return RETRIEVAL_INDEXES[kind](matrix)
@@ -0,0 +1,102 @@
+"""Startup timing: named init phases, and the --startup-report breakdown.
+
+    python app.py --startup-report
+
+runs a fresh interpreter with -X importtime that imports app.py and waits
+for the engine warm-up, then prints where the time went: import time per
+top-level package and the duration of each init phase.
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_PHASE_MARKER = 'STARTUP_PHASES '
+
+_process_started_at = time.perf_counter()
+_phases = []
+_phases_lock = threading.Lock()
+
+
+@contextmanager
+def phase(name):
+    """Time the enclosed block as init phase name"""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _phases_lock:
+            _phases.append({
+                'phase': name,
+                'started_ms': round((started_at - _process_started_at) * 1000, 1),
+                'duration_ms': round((time.perf_counter() - started_at) * 1000, 1)
+            })
+
+
+def phases():
+    """Init phases recorded so far, in the order they finished"""
+    with _phases_lock:
+        return list(_phases)
+
+
+def import_times(importtime_lines):
+    """{top-level package: seconds} from -X importtime output, by summed self time"""
+    totals = {}
+    for line in importtime_lines:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        totals[package] = totals.get(package, 0.0) + int(self_us) / 1e6
+    return totals
+
+
+def _child_code():
+    return (
+        "import json, time\n"
+        "started_at = time.perf_counter()\n"
+        "import app\n"
+        "imported_at = time.perf_counter()\n"
+        "app.wait_until_ready()\n"
+        "import startup\n"
+        "print(" + repr(_PHASE_MARKER) + " + json.dumps({'import_s': imported_at - started_at, "
+        "'ready_s': time.perf_counter() - started_at, 'phases': startup.phases()}), flush=True)\n"
+    )
+
+
+def run_report(top=15):
+    """Measure a cold start of app.py in a child interpreter and print the breakdown"""
+    env = dict(os.environ)
+    env.setdefault('CAREERCOMPASS_LOG_LEVEL', 'WARNING')
+    child = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _child_code()],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    summary = None
+    for line in child.stdout.splitlines():
+        if line.startswith(_PHASE_MARKER):
+            summary = json.loads(line[len(_PHASE_MARKER):])
+    if child.returncode != 0 or summary is None:
+        sys.stderr.write(child.stderr[-4000:])
+        print(f"❌ Startup report failed (exit code {child.returncode})")
+        return 1
+
+    # app.py's own entry is skewed by the warm-up thread importing at the same time; its total is shown above
+    totals = import_times(child.stderr.splitlines())
+    totals.pop('app', None)
+    packages = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    print("⏱️  CareerCompass startup report")
+    print(f"   import app.py (serving starts here): {summary['import_s'] * 1000:8.1f} ms")
+    print(f"   engines ready:                       {summary['ready_s'] * 1000:8.1f} ms")
+    print(f"📦 Import time by package (top {top}, self time):")
+    for package, seconds in packages[:top]:
+        print(f"   {package:<36} {seconds * 1000:8.1f} ms")
+    print("🔧 Init phases:")
+    for entry in summary['phases']:
+        print(f"   {entry['phase']:<36} {entry['duration_ms']:8.1f} ms  (at {entry['started_ms']:.1f} ms)")
+    return 0
@@ -24,20 +24,27 @@ async function handleCertificateSearch(event) {
   window.setLoading(submitButton, true)
 
   try {
-    const response = await window.apiRequest("/api/find-certificates", {
-      method: "POST",
-      body: JSON.stringify({
-        interests,
-        goals,
-        course_preference: coursePreference,
-      }),
+    const payload = {
+      interests,
+      goals,
+      course_preference: coursePreference,
+    }
+    const resultsContainer = document.getElementById("certificateResults")
+    const response = await window.streamRequest("/api/find-certificates/stream", payload, (eventName, data) => {
+      if (eventName === "ml_results") {
+        // ML-only results arrive immediately; AI cards replace them as they stream in
+        delete resultsContainer.dataset.streaming
+        displayCertificateResults(data)
+        document.getElementById("resultsSection").style.display = "block"
+        document.getElementById("resultsSection").scrollIntoView({ behavior: "smooth" })
+      } else if (eventName === "item") {
+        window.appendStreamedCard(resultsContainer, renderCertificateCard(data))
+      } else if (eventName === "error") {
+        window.showNotification(data.message, "info")
+      }
     })
 
-    if (response.success) {
-      displayCertificateResults(response.data.data)
-      document.getElementById("resultsSection").style.display = "block"
-      document.getElementById("resultsSection").scrollIntoView({ behavior: "smooth" })
-    } else {
+    if (!response.success) {
       window.showNotification("Error finding certificates: " + response.data.error, "error")
     }
   } catch (error) {
@@ -71,9 +78,11 @@ function displayCertificateResults(aiResponse) {
     return
   }
 
-  resultsContainer.innerHTML = certificates
-    .map(
-      (cert) => `
+  resultsContainer.innerHTML = certificates.map(renderCertificateCard).join("")
+}
+
+function renderCertificateCard(cert) {
+  return `
         <div class="result-card">
             <h3>${cert.name}</h3>
             <div class="provider">${cert.provider}</div>
@@ -84,7 +93,7 @@ function displayCertificateResults(aiResponse) {
                 <span class="detail-item">Duration: ${cert.duration}</span>
             </div>
             <div class="skills">
-                ${cert.skills.map((skill) => `<span class="skill-tag">${skill}</span>`).join("")}
+                ${(cert.skills || []).map((skill) => `<span class="skill-tag">${skill}</span>`).join("")}
             </div>
             <div class="actions">
                 <a href="${cert.url}" target="_blank" class="btn btn-primary btn-small">
@@ -99,7 +108,5 @@ function displayCertificateResults(aiResponse) {
                 </button>
             </div>
         </div>
-    `,
-    )
-    .join("")
+    `
 }
@@ -24,20 +24,27 @@ async function handleCourseSearch(event) {
   window.setLoading(submitButton, true)
 
   try {
-    const response = await window.apiRequest("/api/suggest-courses", {
-      method: "POST",
-      body: JSON.stringify({
-        learning_preferences: learningPreferences,
-        educational_background: educationalBackground,
-        career_aspirations: careerAspirations,
-      }),
+    const payload = {
+      learning_preferences: learningPreferences,
+      educational_background: educationalBackground,
+      career_aspirations: careerAspirations,
+    }
+    const resultsContainer = document.getElementById("courseResults")
+    const response = await window.streamRequest("/api/suggest-courses/stream", payload, (eventName, data) => {
+      if (eventName === "ml_results") {
+        // ML-only results arrive immediately; AI cards replace them as they stream in
+        delete resultsContainer.dataset.streaming
+        displayCourseResults(data)
+        document.getElementById("resultsSection").style.display = "block"
+        document.getElementById("resultsSection").scrollIntoView({ behavior: "smooth" })
+      } else if (eventName === "item") {
+        window.appendStreamedCard(resultsContainer, renderCourseCard(data))
+      } else if (eventName === "error") {
+        window.showNotification(data.message, "info")
+      }
     })
 
-    if (response.success) {
-      displayCourseResults(response.data.data)
-      document.getElementById("resultsSection").style.display = "block"
-      document.getElementById("resultsSection").scrollIntoView({ behavior: "smooth" })
-    } else {
+    if (!response.success) {
       window.showNotification("Error suggesting courses: " + response.data.error, "error")
     }
   } catch (error) {
@@ -71,9 +78,11 @@ function displayCourseResults(aiResponse) {
     return
   }
 
-  resultsContainer.innerHTML = courses
-    .map(
-      (course) => `
+  resultsContainer.innerHTML = courses.map(renderCourseCard).join("")
+}
+
+function renderCourseCard(course) {
+  return `
         <div class="result-card">
             <h3>${course.title}</h3>
             <div class="provider">${course.provider}</div>
@@ -85,7 +94,7 @@ function displayCourseResults(aiResponse) {
                 <span class="detail-item">Price: ${course.price}</span>
             </div>
             <div class="skills">
-                ${course.skills.map((skill) => `<span class="skill-tag">${skill}</span>`).join("")}
+                ${(course.skills || []).map((skill) => `<span class="skill-tag">${skill}</span>`).join("")}
             </div>
             <div class="actions">
                 <a href="${course.url}" target="_blank" class="btn btn-primary btn-small">
@@ -100,7 +109,5 @@ function displayCourseResults(aiResponse) {
                 </button>
             </div>
         </div>
-    `,
-    )
-    .join("")
+    `
 }
@@ -24,10 +24,20 @@ async function loadDashboardData() {
   }
 }
 
+// Recommendations are computed in the background; poll while the server reports them as pending
+async function fetchRecommendations(type, attempts = 10) {
+  const response = await fetch(`/api/recommendations/${type}`)
+  const data = await response.json()
+  if (data.status === "pending" && attempts > 1) {
+    await new Promise((resolve) => setTimeout(resolve, (data.retry_after || 1) * 1000))
+    return fetchRecommendations(type, attempts - 1)
+  }
+  return data
+}
+
 async function loadCoursesPreview() {
   try {
-    const response = await fetch("/api/recommendations/courses")
-    const data = await response.json()
+    const data = await fetchRecommendations("courses")
 
     const container = document.getElementById("coursesPreview")
     if (data.recommendations && data.recommendations.length > 0) {
@@ -63,8 +73,7 @@ async function loadCoursesPreview() {
 
 async function loadCertificatesPreview() {
   try {
-    const response = await fetch("/api/recommendations/certificates")
-    const data = await response.json()
+    const data = await fetchRecommendations("certificates")
 
     const container = document.getElementById("certificatesPreview")
     if (data.recommendations && data.recommendations.length > 0) {
@@ -100,8 +109,7 @@ async function loadCertificatesPreview() {
 
 async function loadJobsPreview() {
   try {
-    const response = await fetch("/api/recommendations/jobs")
-    const data = await response.json()
+    const data = await fetchRecommendations("jobs")
 
     const container = document.getElementById("jobsPreview")
     if (data.recommendations && data.recommendations.length > 0) {
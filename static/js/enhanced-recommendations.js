@@ -251,9 +251,9 @@ function initializeTracking() {
 async function exploreCareerPath(pathName) {
   try {
     const response = await fetch("/api/career-path-prediction")
-    const careerPaths = await response.json()
+    const data = await response.json()
 
-    const selectedPath = careerPaths.find((path) => path.name === pathName)
+    const selectedPath = (data.career_paths || []).find((path) => path.name === pathName)
 
     if (selectedPath) {
       showCareerPathModal(selectedPath)
@@ -274,21 +274,31 @@ function showCareerPathModal(careerPath) {
         <h2>${careerPath.name}</h2>
         <div class="path-stats">
           <div class="stat-item">
-            <i class="fas fa-dollar-sign"></i>
-            <span>${careerPath.average_salary}</span>
-          </div>
-          <div class="stat-item">
-            <i class="fas fa-chart-line"></i>
-            <span>${careerPath.growth_rate} growth</span>
-          </div>
-          <div class="stat-item">
-            <i class="fas fa-industry"></i>
-            <span>${careerPath.industry}</span>
+            <i class="fas fa-brain"></i>
+            <span>${careerPath.confidence.toFixed(1)}% match</span>
           </div>
+          ${
+            careerPath.average_salary
+              ? `<div class="stat-item"><i class="fas fa-dollar-sign"></i><span>${careerPath.average_salary}</span></div>`
+              : ""
+          }
+          ${
+            careerPath.growth_rate
+              ? `<div class="stat-item"><i class="fas fa-chart-line"></i><span>${careerPath.growth_rate} growth</span></div>`
+              : ""
+          }
+          ${
+            careerPath.industry
+              ? `<div class="stat-item"><i class="fas fa-industry"></i><span>${careerPath.industry}</span></div>`
+              : ""
+          }
         </div>
       </div>
       <div class="career-path-body">
         <p>${careerPath.description}</p>
+        ${
+          careerPath.required_skills
+            ? `
         <div class="required-skills">
           <h4>Required Skills:</h4>
           <div class="skills-tags">
@@ -297,7 +307,9 @@ function showCareerPathModal(careerPath) {
               .map((skill) => `<span class="skill-tag">${skill}</span>`)
               .join("")}
           </div>
-        </div>
+        </div>`
+            : ""
+        }
         <div class="path-actions">
           <button class="btn btn-primary" onclick="getPathRecommendations('${careerPath.name}')">
             <i class="fas fa-route"></i>
@@ -23,19 +23,26 @@ async function handleJobSearch(event) {
   window.setLoading(submitButton, true)
 
   try {
-    const response = await window.apiRequest("/api/find-companies", {
-      method: "POST",
-      body: JSON.stringify({
-        job_title: jobTitle,
-        location: location,
-      }),
+    const payload = {
+      job_title: jobTitle,
+      location: location,
+    }
+    const resultsContainer = document.getElementById("companyResults")
+    const response = await window.streamRequest("/api/find-companies/stream", payload, (eventName, data) => {
+      if (eventName === "ml_results") {
+        // ML-only results arrive immediately; AI cards replace them as they stream in
+        delete resultsContainer.dataset.streaming
+        displayCompanyResults(data)
+        document.getElementById("resultsSection").style.display = "block"
+        document.getElementById("resultsSection").scrollIntoView({ behavior: "smooth" })
+      } else if (eventName === "item") {
+        window.appendStreamedCard(resultsContainer, renderCompanyCard(data))
+      } else if (eventName === "error") {
+        window.showNotification(data.message, "info")
+      }
     })
 
-    if (response.success) {
-      displayCompanyResults(response.data.data)
-      document.getElementById("resultsSection").style.display = "block"
-      document.getElementById("resultsSection").scrollIntoView({ behavior: "smooth" })
-    } else {
+    if (!response.success) {
       window.showNotification("Error finding companies: " + response.data.error, "error")
     }
   } catch (error) {
@@ -69,9 +76,11 @@ function displayCompanyResults(aiResponse) {
     return
   }
 
-  resultsContainer.innerHTML = companies
-    .map(
-      (company) => `
+  resultsContainer.innerHTML = companies.map(renderCompanyCard).join("")
+}
+
+function renderCompanyCard(company) {
+  return `
         <div class="result-card">
             <h3>${company.name}</h3>
             <div class="provider">${company.industry}</div>
@@ -97,7 +106,5 @@ function displayCompanyResults(aiResponse) {
                 </button>
             </div>
         </div>
-    `,
-    )
-    .join("")
+    `
 }
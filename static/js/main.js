@@ -77,16 +77,14 @@ function showLoadingAnimations() {
 
 async function loadUserSavedItems() {
   try {
-    // Load all saved items to check save states
-    const [certificates, courses, jobs] = await Promise.all([
-      fetch("/api/get-saved-items/certificate").then((r) => r.json()),
-      fetch("/api/get-saved-items/course").then((r) => r.json()),
-      fetch("/api/get-saved-items/job").then((r) => r.json()),
-    ])
+    // Load all saved items in one request; the browser revalidates it with the ETag
+    const data = await fetch("/api/saved-items").then((r) => r.json())
 
-    if (certificates.success) userSavedItems.certificates = certificates.items
-    if (courses.success) userSavedItems.courses = courses.items
-    if (jobs.success) userSavedItems.jobs = jobs.items
+    if (data.success) {
+      userSavedItems.certificates = data.items.certificates
+      userSavedItems.courses = data.items.courses
+      userSavedItems.jobs = data.items.jobs
+    }
 
     // Update save button states
     updateSaveButtonStates()
@@ -307,6 +305,63 @@ async function apiRequest(url, options = {}) {
   }
 }
 
+// Stream Server-Sent Events from a POST endpoint, calling onEvent(name, data) per event
+async function streamRequest(url, payload, onEvent) {
+  const response = await fetch(url, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Accept: "text/event-stream",
+    },
+    credentials: "same-origin",
+    body: JSON.stringify(payload),
+  })
+
+  if (!response.ok || !response.body) {
+    const data = await response.json().catch(() => ({}))
+    return { success: false, data }
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ""
+
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    let boundary
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const rawEvent = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+
+      let eventName = "message"
+      const dataLines = []
+      rawEvent.split("\n").forEach((line) => {
+        if (line.startsWith("event:")) eventName = line.slice(6).trim()
+        else if (line.startsWith("data:")) dataLines.push(line.slice(5).trim())
+      })
+
+      if (dataLines.length > 0) {
+        onEvent(eventName, JSON.parse(dataLines.join("\n")))
+      }
+    }
+  }
+
+  return { success: true }
+}
+
+// The first streamed AI card replaces the ML preview, later cards are appended
+function appendStreamedCard(container, cardHtml) {
+  if (!container.dataset.streaming) {
+    container.innerHTML = ""
+    container.dataset.streaming = "true"
+  }
+  container.insertAdjacentHTML("beforeend", cardHtml)
+  updateSaveButtonStates()
+}
+
 // Form validation
 function validateForm(formElement) {
   const checkboxGroups = formElement.querySelectorAll('input[type="checkbox"]')
@@ -378,6 +433,10 @@ function setLoading(element, isLoading) {
 
 // Parse AI response
 function parseAIResponse(responseText) {
+  if (responseText && typeof responseText === "object") {
+    return responseText
+  }
+
   try {
     // Try to extract JSON from the response
     const jsonMatch = responseText.match(/\{[\s\S]*\}/)
@@ -396,6 +455,8 @@ function parseAIResponse(responseText) {
 // Export utility functions
 window.showNotification = showNotification
 window.apiRequest = apiRequest
+window.streamRequest = streamRequest
+window.appendStreamedCard = appendStreamedCard
 window.validateForm = validateForm
 window.setLoading = setLoading
 window.parseAIResponse = parseAIResponse
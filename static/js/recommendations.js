@@ -22,11 +22,22 @@ function initializeTabs() {
   })
 }
 
+// Recommendations are computed in the background; poll while the server reports them as pending
+async function fetchRecommendations(type, attempts = 10) {
+  const response = await fetch(`/api/recommendations/${type}`)
+  const data = await response.json()
+  if (data.status === "pending" && attempts > 1) {
+    await new Promise((resolve) => setTimeout(resolve, (data.retry_after || 1) * 1000))
+    return fetchRecommendations(type, attempts - 1)
+  }
+  return data
+}
+
 // Function to refresh recommendations
 async function refreshRecommendations(type) {
   try {
-    const response = await fetch(`/api/recommendations/${type}`)
-    const recommendations = await response.json()
+    const data = await fetchRecommendations(type)
+    const recommendations = data.recommendations || []
 
     const container = document.getElementById(`${type}Grid`)
 
@@ -0,0 +1,341 @@
+import json
+import os
+import uuid
+from datetime import datetime
+
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+
+
+db = SQLAlchemy()
+
+SAVED_ITEM_TYPES = ('certificate', 'course', 'job')
+
+# Fields that identify a saved item: saving a second item with the same values is rejected
+DUPLICATE_FIELDS = {
+    'certificate': ('name', 'provider'),
+    'course': ('title', 'provider'),
+    'job': ('name', 'industry')
+}
+
+USER_FIELDS = ('name', 'email', 'password', 'education', 'skills', 'aspirations', 'created_at', 'updated_at')
+
+
+class User(db.Model):
+    __tablename__ = 'users'
+
+    user_id = db.Column(db.String(320), primary_key=True)
+    name = db.Column(db.String(200))
+    email = db.Column(db.String(320))
+    password = db.Column(db.String(200))
+    education = db.Column(db.Text)
+    skills = db.Column(db.Text)
+    aspirations = db.Column(db.Text)
+    created_at = db.Column(db.String(32))
+    updated_at = db.Column(db.String(32))
+    # Any other profile fields, as a JSON object
+    extra = db.Column(db.Text, nullable=False, default='{}')
+
+
+class SavedItem(db.Model):
+    """A saved certificate, course or job search.
+
+    The item itself is kept as JSON; match_primary/match_secondary hold the
+    DUPLICATE_FIELDS values so the unique index rejects duplicates. version is
+    the user's saved-items version at which the item was saved.
+    """
+    __tablename__ = 'saved_items'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'item_type', 'match_primary', 'match_secondary', name='uq_saved_items_match'),
+        db.Index('ix_saved_items_user_type_saved_at', 'user_id', 'item_type', 'saved_at'),
+        db.Index('ix_saved_items_user_version', 'user_id', 'version')
+    )
+
+    id = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.String(320), nullable=False)
+    item_type = db.Column(db.String(16), nullable=False)
+    match_primary = db.Column(db.Text, nullable=False)
+    match_secondary = db.Column(db.Text, nullable=False)
+    saved_at = db.Column(db.String(32), nullable=False)
+    data = db.Column(db.Text, nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class SavedItemVersion(db.Model):
+    """Per-user counter, bumped by every save or delete that changes the user's saved items"""
+    __tablename__ = 'saved_item_versions'
+
+    user_id = db.Column(db.String(320), primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+
+
+class SavedItemTombstone(db.Model):
+    """Record of a deleted saved item, so delta syncs can report the deletion"""
+    __tablename__ = 'saved_item_tombstones'
+    __table_args__ = (
+        db.Index('ix_saved_item_tombstones_user_version', 'user_id', 'version'),
+    )
+
+    id = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.String(320), nullable=False)
+    item_type = db.Column(db.String(16), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+
+
+class Interaction(db.Model):
+    """A tracked interaction (view, save, completion) with its implicit rating.
+
+    The table is an append-only log shared by every worker: ids only grow,
+    so each worker replays the events after the last id it applied.
+    """
+    __tablename__ = 'interactions'
+    __table_args__ = (
+        db.Index('ix_interactions_user_id', 'user_id', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.String(320), nullable=False)
+    item_type = db.Column(db.String(16), nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    interaction_type = db.Column(db.String(16), nullable=False)
+    rating = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.String(32), nullable=False)
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    """WAL lets readers in every worker run alongside a writer; writers wait instead of failing"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=30000")
+    cursor.close()
+
+
+def _upgrade_schema():
+    """Add columns that create_all() does not add to tables from an older release"""
+    columns = {column['name'] for column in inspect(db.engine).get_columns('saved_items')}
+    if 'version' not in columns:
+        with db.engine.begin() as conn:
+            conn.execute(text("ALTER TABLE saved_items ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_saved_items_user_version ON saved_items (user_id, version)"))
+
+
+def init_app(app, database_url=None):
+    """Bind the database to app and create the tables.
+
+    Defaults to a SQLite file in the app's instance folder, shared by every
+    worker on the host. Connections opened here are closed again so a
+    preloading gunicorn master does not hand open SQLite handles to its
+    forked workers.
+    """
+    if database_url is None:
+        os.makedirs(app.instance_path, exist_ok=True)
+        database_url = 'sqlite:///' + os.path.join(app.instance_path, 'careercompass.sqlite3')
+    app.config.setdefault('SQLALCHEMY_DATABASE_URI', database_url)
+    db.init_app(app)
+
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', _configure_sqlite)
+        try:
+            db.create_all()
+        except OperationalError:
+            # Workers started without preload create the tables at the same time;
+            # whichever lost the race finds them on the second pass
+            db.create_all()
+        _upgrade_schema()
+        db.engine.dispose()
+
+
+def reset_connections(app):
+    """Drop pooled connections inherited from a parent process (call after fork)"""
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def get_user(user_id):
+    """Stored fields of a user, or {} when the user does not exist"""
+    user = db.session.get(User, user_id)
+    if user is None:
+        return {}
+    data = json.loads(user.extra)
+    data.update({field: getattr(user, field) for field in USER_FIELDS if getattr(user, field) is not None})
+    return data
+
+
+def save_user(user_id, data):
+    """Create the user or update the given fields"""
+    user = db.session.get(User, user_id)
+    if user is None:
+        user = User(user_id=user_id, extra='{}')
+        db.session.add(user)
+    extra = json.loads(user.extra)
+    for field, value in data.items():
+        if field in USER_FIELDS:
+            setattr(user, field, value)
+        else:
+            extra[field] = value
+    user.extra = json.dumps(extra)
+    db.session.commit()
+
+
+def get_saved_items(user_id):
+    """The user's saved items grouped by type, oldest first"""
+    saved_items = {f'{item_type}s': [] for item_type in SAVED_ITEM_TYPES}
+    rows = db.session.execute(
+        select(SavedItem.item_type, SavedItem.data)
+        .where(SavedItem.user_id == user_id)
+        .order_by(SavedItem.saved_at)
+    )
+    for item_type, data in rows:
+        saved_items[f'{item_type}s'].append(json.loads(data))
+    return saved_items
+
+
+def _insert(model):
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql_insert(model)
+    return sqlite_insert(model)
+
+
+def _bump_version(user_id):
+    """Increment the user's saved-items version inside the current transaction.
+
+    The upsert takes the database write lock, so concurrent writers in other
+    workers are serialized and every change gets its own version.
+    """
+    statement = _insert(SavedItemVersion).values(user_id=user_id, version=1)
+    statement = statement.on_conflict_do_update(
+        index_elements=['user_id'], set_={'version': SavedItemVersion.version + 1}
+    ).returning(SavedItemVersion.version)
+    return db.session.execute(statement).scalar_one()
+
+
+def get_saved_items_version(user_id):
+    """The user's saved-items version; 0 before anything was saved"""
+    version = db.session.scalar(select(SavedItemVersion.version).where(SavedItemVersion.user_id == user_id))
+    return version or 0
+
+
+def export_saved_items(user_id, item_types=SAVED_ITEM_TYPES, since=None):
+    """Saved items of the given types as stored JSON strings, for building a response without re-encoding.
+
+    Returns (version, items, deleted): items maps each type to the JSON of
+    its items (oldest first) and deleted maps it to deleted item ids. With
+    since, only items saved and deleted after that version are included;
+    otherwise everything is and deleted is empty.
+    """
+    # Read the version first: a change committed in between is then sent again
+    # with the next delta instead of being skipped
+    version = get_saved_items_version(user_id)
+    items = {item_type: [] for item_type in item_types}
+    deleted = {item_type: [] for item_type in item_types}
+
+    query = select(SavedItem.item_type, SavedItem.data).where(
+        SavedItem.user_id == user_id, SavedItem.item_type.in_(item_types)
+    )
+    if since is not None:
+        query = query.where(SavedItem.version > since)
+    for item_type, data in db.session.execute(query.order_by(SavedItem.saved_at)):
+        items[item_type].append(data)
+
+    if since is not None:
+        tombstones = db.session.execute(
+            select(SavedItemTombstone.item_type, SavedItemTombstone.id).where(
+                SavedItemTombstone.user_id == user_id,
+                SavedItemTombstone.version > since,
+                SavedItemTombstone.item_type.in_(item_types)
+            )
+        )
+        for item_type, item_id in tombstones:
+            deleted[item_type].append(item_id)
+    return version, items, deleted
+
+
+def save_items(user_id, item_type, items):
+    """Save several items of one type in a single transaction.
+
+    Returns the new item id for each item, or None where it duplicates an
+    item that is already saved (or an earlier item in the same batch).
+    """
+    if item_type not in DUPLICATE_FIELDS:
+        raise ValueError(f"Unknown item type '{item_type}', expected one of {list(SAVED_ITEM_TYPES)}")
+    if not items:
+        return []
+
+    primary, secondary = DUPLICATE_FIELDS[item_type]
+    version = _bump_version(user_id)
+    rows = []
+    for item in items:
+        item = dict(item)
+        item['id'] = str(uuid.uuid4())
+        item['saved_at'] = datetime.now().isoformat()
+        rows.append({
+            'id': item['id'],
+            'user_id': user_id,
+            'item_type': item_type,
+            'match_primary': str(item.get(primary) or ''),
+            'match_secondary': str(item.get(secondary) or ''),
+            'saved_at': item['saved_at'],
+            'data': json.dumps(item),
+            'version': version
+        })
+
+    db.session.execute(_insert(SavedItem).on_conflict_do_nothing(), rows)
+    ids = [row['id'] for row in rows]
+    inserted = set(db.session.scalars(select(SavedItem.id).where(SavedItem.id.in_(ids))))
+    if inserted:
+        db.session.commit()
+    else:
+        # Nothing new, so leave the version where it was
+        db.session.rollback()
+    return [item_id if item_id in inserted else None for item_id in ids]
+
+
+def save_item(user_id, item_type, item):
+    """Save one item; returns its id, or None when it is already saved"""
+    return save_items(user_id, item_type, [item])[0]
+
+
+def delete_item(user_id, item_type, item_id):
+    """Delete a saved item by id, leaving a tombstone; returns False when the user has no such item"""
+    version = _bump_version(user_id)
+    deleted = db.session.query(SavedItem).filter_by(
+        id=item_id, user_id=user_id, item_type=item_type
+    ).delete(synchronize_session=False)
+    if not deleted:
+        db.session.rollback()
+        return False
+    db.session.add(SavedItemTombstone(id=item_id, user_id=user_id, item_type=item_type, version=version))
+    db.session.commit()
+    return True
+
+
+def record_interaction(user_id, item_type, item_id, interaction_type, rating):
+    """Append an interaction to the shared log; returns its id"""
+    interaction = Interaction(
+        user_id=user_id, item_type=item_type, item_id=item_id, interaction_type=interaction_type,
+        rating=rating, created_at=datetime.now().isoformat()
+    )
+    db.session.add(interaction)
+    db.session.commit()
+    return interaction.id
+
+
+def get_interactions_since(last_id, item_type=None, limit=1000):
+    """(id, user_id, item_id, rating) of up to limit interactions logged after last_id, oldest first"""
+    query = select(Interaction.id, Interaction.user_id, Interaction.item_id, Interaction.rating).where(
+        Interaction.id > last_id
+    )
+    if item_type is not None:
+        query = query.where(Interaction.item_type == item_type)
+    return [tuple(row) for row in db.session.execute(query.order_by(Interaction.id).limit(limit))]
+
+
+def get_interaction_version(user_id):
+    """Id of the user's latest interaction; 0 before the first one"""
+    version = db.session.scalar(select(func.max(Interaction.id)).where(Interaction.user_id == user_id))
+    return version or 0
@@ -0,0 +1,181 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+
+# Id of the request being handled, added to every record logged while handling it
+_request_id = contextvars.ContextVar('request_id', default=None)
+
+# Attributes every LogRecord has; anything else was passed with extra= and goes into the JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+_state = {'listener': None, 'handler': None, 'config': None}
+
+
+def set_request_id(request_id):
+    """Tag records logged in the current context with request_id; returns a token for reset_request_id()"""
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token):
+    _request_id.reset(token)
+
+
+def get_request_id():
+    return _request_id.get()
+
+
+def sampled(rate):
+    """extra= for a high-volume message: only about rate of its records (1 in round(1 / rate)) are kept"""
+    return {'sample_rate': rate}
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds request_id to records and drops the unsampled share of sampled messages.
+
+    Sampling counts per message template, so each sampled message keeps a
+    steady 1-in-N share no matter how the others are distributed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._seen = {}
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        rate = getattr(record, 'sample_rate', None)
+        if rate is None or rate >= 1:
+            return True
+        every = max(int(round(1 / rate)), 1) if rate > 0 else 0
+        key = (record.name, record.msg)
+        with self._lock:
+            count = self._seen.get(key, 0)
+            self._seen[key] = count + 1
+        return every > 0 and count % every == 0
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request_id and any extra= fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None)
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key != 'sample_rate':
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread without formatting them and never waits.
+
+    When the queue is full the record is dropped and counted, so a slow
+    sink cannot stall request threads.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting happens on the writer thread; arguments logged with a record are not copied
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _text_formatter():
+    return logging.Formatter('%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s')
+
+
+def _start(config):
+    log_queue = queue.Queue(maxsize=config['queue_size'])
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter())
+
+    sink = logging.StreamHandler(config['stream'])
+    sink.setFormatter(JSONFormatter() if config['format'] == 'json' else _text_formatter())
+    listener = logging.handlers.QueueListener(log_queue, sink, respect_handler_level=False)
+    listener.start()
+
+    root = logging.getLogger()
+    if _state['handler'] is not None:
+        root.removeHandler(_state['handler'])
+    root.addHandler(handler)
+    root.setLevel(config['level'])
+    _state.update(listener=listener, handler=handler)
+
+
+def configure(level='INFO', fmt='json', stream=None, queue_size=10000):
+    """Send all logging through a bounded queue to a background writer thread.
+
+    Call once at startup. Records at a disabled level are discarded by the
+    logger before their message is formatted, so log with %-style arguments
+    rather than f-strings. Forked children (gunicorn workers) get their own
+    queue and writer thread automatically.
+    """
+    if _state['config'] is not None:
+        return
+    _state['config'] = {
+        'level': getattr(logging, str(level).upper(), logging.INFO),
+        'format': fmt,
+        'stream': stream or sys.stdout,
+        'queue_size': queue_size
+    }
+    _start(_state['config'])
+    atexit.register(_stop)
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def _restart_after_fork():
+    # The parent's writer thread does not exist in the child
+    _start(_state['config'])
+
+
+def _stop():
+    # Writes out whatever is still queued
+    listener = _state['listener']
+    if listener is not None and listener._thread is not None:
+        try:
+            listener.stop()
+        except queue.Full:
+            pass
+
+
+def flush(timeout=2.0):
+    """Wait until queued records are written (e.g. before exit)"""
+    listener = _state['listener']
+    if listener is None:
+        return
+    deadline = time.monotonic() + timeout
+    while not listener.queue.empty() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def stats():
+    handler = _state['handler']
+    listener = _state['listener']
+    return {
+        'queued': listener.queue.qsize() if listener is not None else 0,
+        'dropped': handler.dropped if handler is not None else 0
+    }
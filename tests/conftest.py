@@ -0,0 +1,45 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# app.py reads its paths and backends at import time: keep the test run's
+# databases and caches out of the working tree and never call Gemini
+_TMP_DIR = tempfile.mkdtemp(prefix='careercompass-tests-')
+atexit.register(shutil.rmtree, _TMP_DIR, ignore_errors=True)
+os.environ.setdefault('CAREERCOMPASS_CACHE_PATH', os.path.join(_TMP_DIR, 'gemini_responses.sqlite3'))
+os.environ.setdefault('CAREERCOMPASS_RECOMMENDATION_CACHE_PATH', os.path.join(_TMP_DIR, 'materialized.sqlite3'))
+os.environ.setdefault('CAREERCOMPASS_DATABASE_URL', 'sqlite:///' + os.path.join(_TMP_DIR, 'careercompass.sqlite3'))
+os.environ.setdefault('CAREERCOMPASS_PROFILE_DIR', os.path.join(_TMP_DIR, 'profiles'))
+os.environ.setdefault('CAREERCOMPASS_LLM_BACKEND', 'fake')
+os.environ.setdefault('CAREERCOMPASS_FAKE_LLM_LATENCY', 'fixed:0.01')
+os.environ.setdefault('CAREERCOMPASS_LOG_LEVEL', 'WARNING')
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    """app.py with its engines warmed up"""
+    import app
+    assert app.wait_until_ready(timeout=300), 'engine warm-up failed'
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    """Test client logged in as a freshly registered user (client.user_id)"""
+    client = app_module.app.test_client()
+    client.user_id = f'{uuid.uuid4().hex[:12]}@example.com'
+    response = client.post('/api/register', json={
+        'fullName': 'Test User',
+        'email': client.user_id,
+        'password': 'correct-horse-battery'
+    })
+    assert response.status_code == 200, response.get_json()
+    return client
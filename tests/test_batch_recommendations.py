@@ -0,0 +1,66 @@
+import pytest
+
+PROFILE = {'user_id': 'a@example.com', 'interests': 'Data Science Python', 'career_goal': 'Data Scientist'}
+
+
+@pytest.mark.parametrize('body', [
+    [PROFILE],
+    {'profiles': [PROFILE], 'num_recommendations': 'five'},
+    {'profiles': [PROFILE], 'num_recommendations': None},
+    {'profiles': [PROFILE, 'Data Science']},
+    {'profiles': PROFILE},
+    {'profiles': []},
+])
+def test_invalid_requests_are_400(client, body):
+    response = client.post('/api/batch-recommendations', json=body)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_profile_count_is_capped(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'BATCH_MAX_PROFILES', 2)
+
+    response = client.post('/api/batch-recommendations', json={'profiles': [PROFILE] * 3})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('requested, expected', [(0, 1), (-5, 1), (3, 3), (10 ** 9, 20)])
+def test_num_recommendations_is_clamped(client, requested, expected):
+    response = client.post('/api/batch-recommendations', json={
+        'profiles': [PROFILE, dict(PROFILE, user_id='b@example.com')], 'num_recommendations': requested
+    })
+
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [result['user_id'] for result in results] == ['a@example.com', 'b@example.com']
+    # The sample catalog has 20 courses, below the cap of 50
+    assert all(len(result['recommendations']) == expected for result in results)
+
+
+@pytest.mark.parametrize('experience', ['five', [3], {'years': 3}, 'nan', 'inf'])
+def test_unusable_experience_is_400_naming_the_profile(client, app_module, monkeypatch, experience):
+    batch_calls = []
+    monkeypatch.setattr(app_module.ai_ml_engine.ml_engine, 'get_batch_recommendations',
+                        lambda *args: batch_calls.append(args))
+
+    response = client.post('/api/batch-recommendations', json={
+        'profiles': [PROFILE, dict(PROFILE, experience_years=experience)]
+    })
+
+    assert response.status_code == 400
+    assert 'profiles[1].experience_years' in response.get_json()['error']
+    assert batch_calls == []
+
+
+def test_numeric_experience_strings_are_accepted(client):
+    response = client.post('/api/batch-recommendations', json={
+        'profiles': [dict(PROFILE, experience_years='4.5'), dict(PROFILE, experience_years=None)]
+    })
+
+    assert response.status_code == 200
+    assert all(
+        prediction['prediction_type'] == 'Random Forest ML'
+        for result in response.get_json()['results'] for prediction in result['career_predictions']
+    )
@@ -0,0 +1,56 @@
+import pytest
+
+PROFILE = {
+    'interests': 'Machine Learning, Python',
+    'career_goal': 'Data Scientist',
+    'education_level': 'Master',
+    'experience_years': 3
+}
+
+
+@pytest.fixture
+def engine(app_module, monkeypatch):
+    """The warmed-up ML engine with an empty career memo of its own"""
+    engine = app_module.ai_ml_engine.ml_engine
+    monkeypatch.setattr(engine, '_career_memo', (None, {}))
+    monkeypatch.setattr(engine, '_career_memo_stats', {'hits': 0, 'misses': 0})
+    return engine
+
+
+@pytest.mark.parametrize('variant', [
+    dict(PROFILE, interests='  machine   learning,\tPYTHON '),
+    dict(PROFILE, career_goal='data scientist\n'),
+    dict(PROFILE, interests=['Machine', 'Learning,', 'Python']),
+    dict(PROFILE, experience_years='3.0'),
+], ids=['interests-spacing-and-case', 'goal-case', 'interests-list', 'experience-string'])
+def test_equivalent_profiles_hit_the_memo(engine, variant):
+    first = engine.predict_career_distribution(PROFILE)
+    second = engine.predict_career_distribution(variant)
+
+    assert engine._career_memo_key(variant) == engine._career_memo_key(PROFILE)
+    assert second is first
+    assert engine.career_memo_stats() == {'hits': 1, 'misses': 1, 'entries': 1}
+
+
+@pytest.mark.parametrize('change', [
+    {'education_level': 'PhD'}, {'experience_years': 4}, {'interests': 'Machine Learning, Java'}
+])
+def test_different_inputs_get_their_own_entry(engine, change):
+    engine.predict_career_distribution(PROFILE)
+    engine.predict_career_distribution(dict(PROFILE, **change))
+
+    assert engine._career_memo_key(dict(PROFILE, **change)) != engine._career_memo_key(PROFILE)
+    assert engine.career_memo_stats() == {'hits': 0, 'misses': 2, 'entries': 2}
+
+
+def test_new_artifact_checksum_starts_an_empty_memo(engine, monkeypatch):
+    monkeypatch.setattr(engine, 'artifact_checksum', 'checksum-a')
+    first = engine.predict_career_distribution(PROFILE)
+    assert engine.predict_career_distribution(PROFILE) is first
+
+    monkeypatch.setattr(engine, 'artifact_checksum', 'checksum-b')
+    reloaded = engine.predict_career_distribution(PROFILE)
+
+    assert reloaded is not first
+    assert reloaded['probabilities'] == first['probabilities']
+    assert engine.career_memo_stats() == {'hits': 1, 'misses': 2, 'entries': 1}
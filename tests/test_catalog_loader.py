@@ -0,0 +1,128 @@
+import json
+import os
+import time
+
+import pytest
+
+from catalog_loader import CourseCatalog, iter_catalog_chunks
+
+
+def write_catalog(path, titles, mode='w'):
+    with open(path, mode) as f:
+        for title in titles:
+            f.write(json.dumps({'title': title, 'description': f'{title} course', 'rating': 4.5}) + '\n')
+    # Make sure the change is visible even on filesystems with coarse mtimes
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def titles(catalog):
+    return sorted(catalog._state['records']['title'])
+
+
+def wait_for_rebuild(catalog, timeout=10):
+    deadline = time.monotonic() + timeout
+    while catalog._rebuilding and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not catalog._rebuilding, 'catalog rebuild did not finish'
+
+
+def top_title(catalog, text):
+    records, indices, _ = catalog.search([text], 1)[0]
+    return records['title'].iloc[indices[0]]
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / 'catalog.jsonl')
+    write_catalog(path, ['Python Basics', 'Cloud Security', 'Data Visualization'])
+    return path
+
+
+def test_load_and_search(path):
+    catalog = CourseCatalog(path, chunk_size=2).load()
+
+    assert len(catalog) == 3
+    assert top_title(catalog, 'security in the cloud') == 'Cloud Security'
+
+
+def test_appended_lines_are_tailed(path, monkeypatch):
+    catalog = CourseCatalog(path, chunk_size=2).load()
+    monkeypatch.setattr(catalog, '_rebuild_in_background', lambda: pytest.fail('append rebuilt the catalog'))
+
+    write_catalog(path, ['Kubernetes Operations'], mode='a')
+    assert catalog.poll()
+
+    assert titles(catalog) == ['Cloud Security', 'Data Visualization', 'Kubernetes Operations', 'Python Basics']
+    assert top_title(catalog, 'kubernetes') == 'Kubernetes Operations'
+    assert not catalog.poll()
+
+
+def test_incomplete_last_line_waits_for_its_newline(path, monkeypatch):
+    catalog = CourseCatalog(path).load()
+    monkeypatch.setattr(catalog, '_rebuild_in_background', lambda: pytest.fail('append rebuilt the catalog'))
+    with open(path, 'a') as f:
+        f.write('{"title": "Half Wr')
+
+    catalog.poll()
+    assert len(catalog) == 3
+
+    with open(path, 'a') as f:
+        f.write('itten"}\n')
+    catalog.poll()
+    assert 'Half Written' in titles(catalog)
+
+
+def test_same_size_edit_in_place_rebuilds(path):
+    catalog = CourseCatalog(path).load()
+    size = os.path.getsize(path)
+
+    write_catalog(path, ['Rusty Basics!', 'Cloud Security', 'Data Visualization'])
+    assert os.path.getsize(path) == size
+    assert catalog.poll()
+    wait_for_rebuild(catalog)
+
+    assert titles(catalog) == ['Cloud Security', 'Data Visualization', 'Rusty Basics!']
+    assert top_title(catalog, 'rusty') == 'Rusty Basics!'
+
+
+def test_rewrite_that_grows_rebuilds(path):
+    catalog = CourseCatalog(path).load()
+    offset = catalog._state['offset']
+
+    write_catalog(path, ['Introduction to Statistics', 'Machine Learning Engineering', 'Deep Learning'])
+    assert os.path.getsize(path) > offset
+    assert catalog.poll()
+    wait_for_rebuild(catalog)
+
+    assert titles(catalog) == ['Deep Learning', 'Introduction to Statistics', 'Machine Learning Engineering']
+    assert catalog._state['offset'] == os.path.getsize(path)
+
+
+def test_replaced_file_rebuilds(path, tmp_path):
+    catalog = CourseCatalog(path).load()
+    replacement = str(tmp_path / 'replacement.jsonl')
+    with open(path, 'rb') as f:
+        prefix = f.read()
+    with open(replacement, 'wb') as f:
+        f.write(prefix)
+    write_catalog(replacement, ['Kubernetes Operations'], mode='a')
+    os.replace(replacement, path)
+
+    assert catalog.poll()
+    wait_for_rebuild(catalog)
+
+    assert len(catalog) == 4
+
+
+def test_csv_and_missing_columns(tmp_path):
+    path = str(tmp_path / 'catalog.csv')
+    with open(path, 'w') as f:
+        f.write('title,rating\nPython Basics,4.5\nCloud Security,oops\n')
+
+    chunk = next(iter_catalog_chunks(path))
+
+    assert chunk['rating'].tolist() == [4.5, 0.0]
+    assert chunk['category'].tolist() == ['General', 'General']
+    with pytest.raises(ValueError):
+        next(iter_catalog_chunks(str(tmp_path / 'catalog.xml')))
@@ -0,0 +1,95 @@
+import uuid
+
+import numpy as np
+import pytest
+
+from collaborative_filtering import UserNeighborModel
+
+
+def small_model():
+    # Users 1 and 2 share courses 0 and 1; user 2 also liked course 2, user 3 only rated course 3
+    return UserNeighborModel(n_neighbors=5).fit(
+        [1, 1, 2, 2, 2, 3],
+        [0, 1, 0, 1, 2, 3],
+        [5, 4, 5, 4, 5, 3],
+        n_items=5
+    )
+
+
+def test_known_user_gets_neighbour_courses():
+    model = small_model()
+
+    items, scores = model.recommend(1, 3)
+
+    assert model.has_user(1)
+    assert items.tolist() == [2]
+    assert scores[0] == pytest.approx(5.0)
+
+
+@pytest.mark.parametrize('user_id', [99, 'someone@example.com', None])
+def test_unknown_user_gets_nothing(user_id):
+    model = small_model()
+
+    items, scores = model.recommend(user_id, 3)
+
+    assert not model.has_user(user_id)
+    assert len(items) == 0 and len(scores) == 0
+
+
+def test_online_interactions_make_a_user_known():
+    model = small_model()
+
+    model.add_interactions(['new@example.com'], [0], [5.0])
+    items, _ = model.recommend('new@example.com', 3)
+
+    assert model.has_user('new@example.com')
+    assert 2 in items.tolist()
+    assert 0 not in items.tolist()
+
+
+def test_neighbour_refresh_only_rescores_overlapping_online_users(monkeypatch):
+    model = small_model()
+    # Many online users who only rated course 4, which nobody else shares
+    model.add_interactions([f'other{i}' for i in range(50)], [4] * 50, [5.0] * 50)
+    model.add_interactions([3], [0], [4.0])
+    rescored = []
+    row = model._row
+    monkeypatch.setattr(model, '_row', lambda user_id: rescored.append(user_id) or row(user_id))
+
+    users, similarities = model._similar_users(np.array([0, 1]), np.array([5.0, 4.0], dtype=np.float32))
+
+    assert sorted(rescored) == [3]
+    assert sorted(users) == [1, 2, 3]
+    # User 3 now rates course 0 with 4 (shared) and course 3 with 3
+    assert similarities[users.index(3)] == pytest.approx(5.0 * 4.0 / (np.hypot(5.0, 4.0) * np.hypot(4.0, 3.0)))
+
+
+@pytest.fixture(scope='module')
+def ml_engine(app_module):
+    return app_module.ai_ml_engine.ml_engine
+
+
+def test_hybrid_skips_collaborative_term_for_unknown_user(ml_engine):
+    profile = {'interests': 'Python Data Science Machine Learning', 'user_id': f'{uuid.uuid4().hex}@example.com'}
+
+    recommendations = ml_engine.get_hybrid_recommendations(profile, 5)
+
+    assert not ml_engine.has_collaborative_history(profile['user_id'])
+    assert recommendations == ml_engine.get_content_based_recommendations(profile['interests'], 5)
+    assert all(rec['recommendation_type'] == 'Content-Based ML' for rec in recommendations)
+
+
+def test_hybrid_blends_collaborative_term_for_known_user(ml_engine):
+    known_user = int(ml_engine.interactions['user_id'].iloc[0])
+    cf_items, _ = ml_engine.collaborative_model.recommend(known_user, 15)
+    assert len(cf_items) > 0
+
+    recommendations = ml_engine.get_hybrid_recommendations(
+        {'interests': 'Python Data Science Machine Learning', 'user_id': known_user}, 5
+    )
+
+    assert ml_engine.has_collaborative_history(known_user)
+    assert any(rec['collaborative_score'] > 0 for rec in recommendations)
+    assert {rec['course_id'] for rec in recommendations if rec['recommendation_type'] == 'Hybrid ML'} <= set(
+        np.asarray(cf_items).tolist()
+    )
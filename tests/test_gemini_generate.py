@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import pytest
+
+
+class SchemaRejectingClient:
+    """Like an SDK that predates response_schema: it rejects the argument, not the call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+        self.calls.append((dict(generation_config or {}), request_options))
+        if 'response_schema' in (generation_config or {}):
+            raise ValueError('Unknown field for GenerationConfig: response_schema')
+        return SimpleNamespace(text='{"certificates": []}', usage_metadata=None)
+
+
+class NoRequestOptionsClient:
+    """Like an SDK whose generate_content has no request_options parameter"""
+
+    def __init__(self):
+        self.calls = []
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        self.calls.append(dict(generation_config or {}))
+        return SimpleNamespace(text='{"certificates": []}', usage_metadata=None)
+
+
+@pytest.fixture
+def engine(app_module, monkeypatch):
+    engine = app_module.ai_ml_engine
+    monkeypatch.setattr(engine, 'structured_output', True)
+    monkeypatch.setattr(engine, 'request_timeouts', True)
+    return engine
+
+
+def test_rejected_schema_retries_without_json_mode_and_keeps_the_timeout(engine):
+    client = SchemaRejectingClient()
+
+    response = engine._generate('prompt', 'certificates', model=client, timeout=5)
+    engine._generate('prompt', 'certificates', model=client, timeout=5)
+
+    assert response.text == '{"certificates": []}'
+    assert not engine.structured_output and engine.request_timeouts
+    (first_config, first_options), (retry_config, retry_options), (later_config, _) = client.calls
+    assert 'response_schema' in first_config
+    assert 'response_schema' not in retry_config and 'response_mime_type' not in retry_config
+    assert retry_config['max_output_tokens'] == first_config['max_output_tokens']
+    assert retry_options == first_options == {'timeout': 5}
+    assert later_config == retry_config
+
+
+def test_rejected_request_options_retries_without_them_and_keeps_json_mode(engine):
+    client = NoRequestOptionsClient()
+
+    response = engine._generate('prompt', 'certificates', model=client, timeout=5)
+    engine._generate('prompt', 'certificates', model=client, timeout=5)
+
+    assert response.text == '{"certificates": []}'
+    assert engine.structured_output and not engine.request_timeouts
+    assert len(client.calls) == 2
+    assert all('response_schema' in config for config in client.calls)
+
+
+def test_unrelated_errors_are_raised_once_nothing_is_left_to_drop(engine):
+    class Broken:
+        def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+            raise ValueError('bad prompt')
+
+    with pytest.raises(ValueError):
+        engine._generate('prompt', 'certificates', model=Broken(), timeout=5)
+    assert not engine.structured_output
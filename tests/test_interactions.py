@@ -0,0 +1,97 @@
+import threading
+import time
+
+import storage
+from collaborative_filtering import InteractionUpdater, UserNeighborModel
+
+
+def small_model():
+    return UserNeighborModel(n_neighbors=5).fit([1, 1, 2, 2, 2], [0, 1, 0, 1, 2], [5, 4, 5, 4, 5], n_items=3)
+
+
+class SharedLog:
+    """In-memory stand-in for the interactions table"""
+
+    def __init__(self):
+        self.rows = []
+
+    def append(self, user_id, item_id, rating):
+        self.rows.append((len(self.rows) + 1, user_id, item_id, rating))
+
+    def fetch_since(self, last_id, limit=2):
+        return [row for row in self.rows if row[0] > last_id][:limit]
+
+
+def test_replay_applies_every_logged_event_once():
+    log = SharedLog()
+    updater = InteractionUpdater(small_model())
+    updater.replay_from(log.fetch_since, interval=60)
+    log.append('a@example.com', 0, 5.0)
+    log.append('b@example.com', 1, 3.0)
+    log.append('a@example.com', 0, 1.0)
+
+    assert updater.replay() == 3
+    assert updater.replay() == 0
+    assert updater.last_replayed_id == 3
+    # The highest rating per (user, item) wins, whatever order the events arrive in
+    assert updater.model.delta_rows['a@example.com'] == {0: 5.0}
+    assert updater.model.has_user('b@example.com')
+    assert updater.snapshot()['replayed'] == 3
+
+
+def test_replay_without_a_log_is_a_no_op():
+    updater = InteractionUpdater(small_model())
+
+    assert updater.replay() == 0
+
+
+def test_background_thread_polls_the_log():
+    log = SharedLog()
+    updater = InteractionUpdater(small_model())
+    updater.replay_from(log.fetch_since, interval=0.05)
+    updater.ensure_running()
+    log.append('c@example.com', 2, 5.0)
+
+    deadline = time.monotonic() + 5
+    while not updater.model.has_user('c@example.com') and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    assert updater.model.has_user('c@example.com')
+
+
+def test_concurrent_first_records_start_one_thread():
+    updater = InteractionUpdater(small_model())
+    started = []
+    original_run = updater._run
+    updater._run = lambda: (started.append(1), original_run())
+    barrier = threading.Barrier(8)
+
+    def record(i):
+        barrier.wait()
+        updater.record(f'user{i}@example.com', 0, 1.0)
+
+    threads = [threading.Thread(target=record, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    time.sleep(0.1)
+
+    assert len(started) == 1
+
+
+def test_tracked_interactions_are_logged_and_versioned(app_module, client):
+    user_id = client.user_id
+    with app_module.app.app_context():
+        before = storage.get_interactions_since(0)
+        assert storage.get_interaction_version(user_id) == 0
+
+    response = client.post('/api/track-interaction', json={
+        'item_type': 'course', 'item_id': 3, 'interaction_type': 'complete'
+    })
+
+    assert response.status_code == 202
+    with app_module.app.app_context():
+        logged = storage.get_interactions_since(before[-1][0] if before else 0)
+        assert [row[1:] for row in logged] == [(user_id, 3, 5.0)]
+        assert storage.get_interaction_version(user_id) == logged[0][0]
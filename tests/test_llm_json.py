@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+from llm_json import JSONArrayStreamParser, parse_llm_json, repair_json, validate_array_response
+
+DOCUMENT = {
+    'courses': [
+        {'title': 'Python {Basics}', 'provider': 'Coursera', 'skills': ['python', 'sql']},
+        {'title': 'Say "hi" \\o/', 'provider': 'edX', 'meta': {'level': 'intro'}}
+    ],
+    'ml_insights': {'source': 'test'}
+}
+TEXT = json.dumps(DOCUMENT)
+
+
+@pytest.mark.parametrize('text', [
+    TEXT,
+    f'```json\n{TEXT}\n```',
+    f'```JSON {TEXT}```',
+    f'```\n{TEXT}\n```\n',
+    f'Here are your courses:\n{TEXT}',
+    f'{TEXT}\n\nLet me know if you need anything else!',
+    f'```json\n{TEXT}\n```\nThese match your interests.',
+], ids=['bare', 'json-fence', 'upper-fence', 'plain-fence', 'leading-prose', 'trailing-prose', 'fence-and-prose'])
+def test_complete_documents(text):
+    assert parse_llm_json(text) == DOCUMENT
+
+
+def test_truncated_tail_drops_the_incomplete_item():
+    cut = TEXT.index('Say') + 3
+
+    value = parse_llm_json(TEXT[:cut])
+
+    assert value == {'courses': [DOCUMENT['courses'][0]]}
+
+
+def is_truncation(value, original):
+    """value is original with a cut-off tail: complete leading members, the last possibly truncated"""
+    if isinstance(original, dict):
+        keys = list(value) if isinstance(value, dict) else None
+        return keys == list(original)[:len(keys)] and all(
+            value[key] == original[key] if key != keys[-1] else is_truncation(value[key], original[key])
+            for key in keys
+        )
+    if isinstance(original, list):
+        return isinstance(value, list) and len(value) <= len(original) and all(
+            item == original[i] if i < len(value) - 1 else is_truncation(item, original[i])
+            for i, item in enumerate(value)
+        )
+    return value == original
+
+
+@pytest.mark.parametrize('cut', range(1, len(TEXT)))
+def test_every_truncation_parses_to_a_prefix_or_nothing(cut):
+    value = parse_llm_json(TEXT[:cut])
+
+    assert value is None or is_truncation(value, DOCUMENT)
+
+
+@pytest.mark.parametrize('text', [
+    None, '', 'no json here', '```json\n```', '[1, 2, 3]', '{"courses": [', '{"title": "unterminated',
+    '"just a string"', '}{'
+])
+def test_unrecoverable_text_is_none(text):
+    assert parse_llm_json(text) is None
+
+
+@pytest.mark.parametrize('text, repaired', [
+    ('{"a": [1, 2, 3', '{"a": [1, 2]}'),
+    ('{"a": [1, 2],', '{"a": [1, 2]}'),
+    ('{"a": {"b": "x, y', None),
+    ('{"a": {"b": 1, "c": "x, y', '{"a": {"b": 1}}'),
+    ('{"a": "}]", "b": [{"c": 1}, {"c"', '{"a": "}]", "b": [{"c": 1}]}'),
+    ('{"a": 1} trailing', '{"a": 1}'),
+    ('{"a', None),
+    ('', None),
+])
+def test_repair_json(text, repaired):
+    assert repair_json(text) == repaired
+    if repaired is not None:
+        json.loads(repaired)
+
+
+def test_validate_array_response_keeps_complete_items():
+    value = {'courses': [{'title': 'A', 'url': 'x'}, {'title': ''}, 'junk', {'url': 'y'}], 'extra': 1}
+
+    assert validate_array_response(value, 'courses', ('title',)) == {
+        'courses': [{'title': 'A', 'url': 'x'}], 'extra': 1
+    }
+    assert validate_array_response({'courses': [{'url': 'y'}]}, 'courses', ('title',)) is None
+    assert validate_array_response({'courses': 'nope'}, 'courses') is None
+    assert validate_array_response(None, 'courses') is None
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, len(TEXT)])
+def test_stream_parser_yields_each_object_once_complete(chunk_size):
+    parser = JSONArrayStreamParser('courses')
+    emitted = []
+    for start in range(0, len(TEXT), chunk_size):
+        chunk = TEXT[start:start + chunk_size]
+        for item in parser.feed(chunk):
+            # An object is emitted with the chunk that closes it, never later
+            assert TEXT.index(json.dumps(item)) + len(json.dumps(item)) <= start + len(chunk)
+            emitted.append(item)
+
+    assert emitted == DOCUMENT['courses']
+    assert parser.finished
+
+
+def test_stream_parser_ignores_text_outside_the_array():
+    parser = JSONArrayStreamParser('courses')
+    text = '```json\n{"intro": {"title": "not me"}, "courses": [{"title": "A"}, {"title": "B"}], "more": [{"x": 1}]}'
+
+    assert parser.feed(text[:30]) == []
+    assert parser.feed(text[30:]) == [{'title': 'A'}, {'title': 'B'}]
+    assert parser.feed('{"title": "C"}') == []
+
+
+def test_stream_parser_on_a_truncated_stream_keeps_the_complete_objects():
+    parser = JSONArrayStreamParser('courses')
+    cut = TEXT.index('Say')
+
+    assert parser.feed(TEXT[:cut]) == [DOCUMENT['courses'][0]]
+    assert not parser.finished
+
+
+def test_stream_parser_skips_malformed_objects():
+    parser = JSONArrayStreamParser('courses')
+
+    assert parser.feed('{"courses": [{"title": "A",}, {"title": "B"}]}') == [{'title': 'B'}]
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from preference_model import PREFERENCE_MODEL_VERSION, TwoTowerPreferenceModel
+
+
+@pytest.fixture(scope='module')
+def training_data():
+    rng = np.random.default_rng(7)
+    user_features = rng.random((30, 6))
+    item_features = rng.random((12, 5))
+    # Users prefer the items whose first feature matches their own first feature
+    labels = (np.abs(user_features[:, :1] - item_features[:, 0]) < 0.3).astype(float)
+    return user_features, item_features, labels
+
+
+@pytest.fixture(scope='module')
+def model(training_data):
+    return TwoTowerPreferenceModel.train(
+        *training_data, hidden_dim=16, embedding_dim=8, epochs=300, metadata={'fingerprint': 'abc123'}
+    )
+
+
+def test_save_load_round_trip(model, training_data, tmp_path):
+    user_features, item_features, _ = training_data
+    path = str(tmp_path / 'nested' / 'preference_model.npz')
+
+    model.save(path)
+    loaded = TwoTowerPreferenceModel.load(path)
+
+    assert set(loaded.weights) == set(model.weights)
+    for name, weights in model.weights.items():
+        assert loaded.weights[name].dtype == np.float32
+        np.testing.assert_array_equal(loaded.weights[name], weights)
+    assert loaded.metadata == pytest.approx(model.metadata)
+    assert loaded.metadata['fingerprint'] == 'abc123'
+    assert loaded.metadata['version'] == PREFERENCE_MODEL_VERSION
+    np.testing.assert_array_equal(
+        loaded.score(loaded.embed_users(user_features), loaded.embed_items(item_features)),
+        model.score(model.embed_users(user_features), model.embed_items(item_features))
+    )
+
+
+def test_save_replaces_the_file_atomically(model, tmp_path):
+    path = str(tmp_path / 'preference_model.npz')
+
+    model.save(path)
+    model.save(path)
+
+    assert [p.name for p in tmp_path.iterdir()] == ['preference_model.npz']
+
+
+def test_array_metadata_round_trips(model, tmp_path):
+    path = str(tmp_path / 'preference_model.npz')
+    TwoTowerPreferenceModel(model.weights, {'feature_names': np.array(['a', 'b'])}).save(path)
+
+    loaded = TwoTowerPreferenceModel.load(path)
+
+    assert loaded.metadata['feature_names'].tolist() == ['a', 'b']
+
+
+def test_training_ranks_preferred_items_first(model, training_data):
+    user_features, item_features, labels = training_data
+
+    scores = model.score(model.embed_users(user_features), model.embed_items(item_features))
+
+    assert scores.shape == labels.shape
+    assert np.all((scores >= 0) & (scores <= 1))
+    assert scores[labels == 1].mean() > scores[labels == 0].mean() + 0.2
+    assert model.metadata['training_loss'] < np.log(2)
+
+
+def test_dl_engine_only_loads_weights_for_its_training_data(app_module, model, tmp_path, monkeypatch):
+    import ml_models_fixed
+    dl_engine = ml_models_fixed.get_dl_engine()
+    path = str(tmp_path / 'preference_model.npz')
+    monkeypatch.setattr(ml_models_fixed, 'PREFERENCE_MODEL_PATH', path)
+
+    assert dl_engine._load_model() is None
+
+    TwoTowerPreferenceModel(model.weights, {'fingerprint': 'stale'}).save(path)
+    assert dl_engine._load_model() is None
+
+    TwoTowerPreferenceModel(model.weights, {'fingerprint': dl_engine._fingerprint()}).save(path)
+    loaded = dl_engine._load_model()
+    assert loaded is not None
+    np.testing.assert_array_equal(loaded.weights['user_w1'], model.weights['user_w1'])
@@ -0,0 +1,66 @@
+import json
+import os
+import threading
+
+from profiling import RequestProfiler
+
+
+def test_one_profile_at_a_time(tmp_path):
+    profiler = RequestProfiler(str(tmp_path))
+
+    first = profiler.start('cprofile')
+    assert first is not None
+    assert profiler.start('cprofile') is None
+    assert profiler.start('sampling') is None
+
+    profiler.save(first, '/api/ready', 'GET', request_id='req-1')
+    second = profiler.start('cprofile')
+
+    assert second is not None
+    profiler.save(second, '/api/ready', 'GET', request_id='req-2')
+    assert sorted(entry['request_id'] for entry in profiler.list_profiles()) == ['req-1', 'req-2']
+
+
+def test_concurrent_requests_do_not_raise(tmp_path):
+    profiler = RequestProfiler(str(tmp_path))
+    barrier = threading.Barrier(6)
+    errors, sessions = [], []
+
+    def handle_request(i):
+        barrier.wait()
+        try:
+            session = profiler.start('cprofile')
+            sessions.append(session)
+            sum(range(20000))
+            if session is not None:
+                profiler.save(session, '/work', 'GET', request_id=f'req-{i}')
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=handle_request, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert any(session is not None for session in sessions)
+    assert len(profiler.list_profiles()) == sum(session is not None for session in sessions)
+    # Every session released the lock
+    last = profiler.start()
+    assert last is not None
+    profiler.save(last, '/work', 'GET')
+
+
+def test_saved_profile_files(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), keep=1)
+
+    for request_id in ('req-1', 'req-2'):
+        profiler.save(profiler.start('cprofile'), '/api/ready', 'GET', request_id=request_id)
+
+    (entry,) = profiler.list_profiles()
+    assert entry['request_id'] == 'req-2'
+    assert sorted(os.path.splitext(name)[1] for name in entry['files']) == ['.collapsed', '.json', '.pstats']
+    with open(profiler.file_path(entry['name'] + '.json'), encoding='utf-8') as meta:
+        assert json.load(meta)['mode'] == 'cprofile'
+    assert profiler.file_path('../secrets.json') is None
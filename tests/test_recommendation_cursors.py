@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from recommendation_store import decode_cursor, encode_cursor
+
+PROFILE = {'fullName': 'Test User', 'education': "Master's", 'skills': 'Python, SQL', 'aspirations': 'Data Scientist'}
+
+
+def ready_page(client, path):
+    """First page once the materialized list is ready"""
+    deadline = time.monotonic() + 30
+    while True:
+        response = client.get(path)
+        body = response.get_json()
+        if response.status_code == 200 and body['status'] == 'ready':
+            return body
+        assert time.monotonic() < deadline, body
+        time.sleep(0.05)
+
+
+def test_cursor_round_trip():
+    fingerprint = 'f' * 64
+
+    assert decode_cursor(encode_cursor(fingerprint, 20)) == (fingerprint, 20)
+
+
+@pytest.mark.parametrize('cursor', ['not-base64!', encode_cursor('f' * 64, -1)])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_next_cursor_pages_through_the_list(client):
+    client.post('/api/save-profile', json=PROFILE)
+    first = ready_page(client, '/api/recommendations/courses?limit=3')
+
+    second = client.get(f"/api/recommendations/courses?limit=3&cursor={first['next_cursor']}")
+
+    assert second.status_code == 200
+    titles = [item['title'] for item in first['recommendations'] + second.get_json()['recommendations']]
+    assert len(titles) == 6 and len(set(titles)) == 6
+
+
+@pytest.mark.parametrize('fingerprint', ['', 'f'])
+def test_cursor_with_a_foreign_fingerprint_is_409(client, fingerprint):
+    client.post('/api/save-profile', json=PROFILE)
+    ready_page(client, '/api/recommendations/courses?limit=3')
+
+    response = client.get(f"/api/recommendations/courses?limit=3&cursor={encode_cursor(fingerprint, 3)}")
+
+    assert response.status_code == 409
+
+
+def test_cursor_prefix_of_the_fingerprint_is_409(client):
+    client.post('/api/save-profile', json=PROFILE)
+    first = ready_page(client, '/api/recommendations/courses?limit=3')
+    fingerprint, offset = decode_cursor(first['next_cursor'])
+
+    response = client.get(f"/api/recommendations/courses?limit=3&cursor={encode_cursor(fingerprint[:16], offset)}")
+
+    assert response.status_code == 409
+
+
+def test_cursor_of_a_rebuilt_list_is_409(client):
+    client.post('/api/save-profile', json=PROFILE)
+    first = ready_page(client, '/api/recommendations/courses?limit=3')
+
+    client.post('/api/save-profile', json=dict(PROFILE, skills='JavaScript, React', aspirations='Web Developer'))
+    ready_page(client, '/api/recommendations/courses?limit=3')
+    response = client.get(f"/api/recommendations/courses?limit=3&cursor={first['next_cursor']}")
+
+    assert response.status_code == 409
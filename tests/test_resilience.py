@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import pytest
+
+import resilience
+from resilience import CircuitBreaker, LatencyWindow
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience, 'time', SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_closed_until_the_failure_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=10)
+
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+
+    assert breaker.is_closed()
+    assert breaker.stats()['consecutive_failures'] == 2
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=10)
+    breaker.record_failure()
+    breaker.record_failure()
+
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+
+    assert breaker.is_closed()
+
+
+def test_opens_and_rejects_during_the_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=10)
+
+    open_breaker(breaker)
+    clock.now += 9.9
+
+    assert not breaker.allow()
+    stats = breaker.stats()
+    assert stats['state'] == 'open'
+    assert stats['opened'] == 1 and stats['rejected'] == 1
+    assert stats['retry_in_seconds'] == pytest.approx(0.1)
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=10)
+    open_breaker(breaker)
+    clock.now += 10
+
+    assert breaker.allow()
+    assert breaker.stats()['state'] == 'half_open'
+    assert not breaker.allow()
+    assert not breaker.is_closed()
+
+
+def test_successful_trial_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=10)
+    open_breaker(breaker)
+    clock.now += 10
+    assert breaker.allow()
+
+    breaker.record_success()
+
+    assert breaker.is_closed()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_trial_reopens_for_another_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=10)
+    open_breaker(breaker)
+    clock.now += 10
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.stats()['state'] == 'open'
+    assert breaker.stats()['opened'] == 2
+    assert not breaker.allow()
+    clock.now += 10
+    assert breaker.allow()
+
+
+def test_released_trial_frees_the_half_open_slot(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=10)
+    open_breaker(breaker)
+    clock.now += 10
+    assert breaker.allow()
+
+    breaker.release()
+
+    assert breaker.stats()['state'] == 'half_open'
+    assert breaker.allow()
+
+
+def test_latency_window_percentiles():
+    window = LatencyWindow(max_samples=100, min_samples=10)
+    for i in range(9):
+        window.record(i / 100)
+    assert window.percentile(95) is None
+
+    for i in range(9, 200):
+        window.record(i / 100)
+
+    # Only the latest 100 samples (1.00 .. 1.99 s) count
+    assert window.percentile(0) == pytest.approx(1.0)
+    assert window.percentile(95) == pytest.approx(1.95)
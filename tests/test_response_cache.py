@@ -0,0 +1,127 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import response_cache
+from response_cache import ResponseCache
+
+
+def test_memory_tier_hides_other_workers_writes(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    worker_a, worker_b = ResponseCache(path), ResponseCache(path)
+    worker_a.set('key', {'version': 1})
+    assert worker_a.get('key') == {'version': 1}
+
+    worker_b.set('key', {'version': 2})
+
+    assert worker_a.get('key') == {'version': 1}
+
+
+def test_memory_ttl_zero_reads_the_shared_disk_tier(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    worker_a, worker_b = ResponseCache(path, memory_ttl_seconds=0), ResponseCache(path, memory_ttl_seconds=0)
+    worker_a.set('key', {'version': 1})
+    assert worker_a.get('key') == {'version': 1}
+
+    worker_b.set('key', {'version': 2})
+
+    assert worker_a.get('key') == {'version': 2}
+    assert worker_a.stats()['memory_entries'] == 0
+
+
+def test_short_memory_ttl_expires_memory_copies(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cache.sqlite3')
+    worker_a, worker_b = ResponseCache(path, memory_ttl_seconds=5), ResponseCache(path)
+    worker_a.set('key', {'version': 1})
+    worker_b.set('key', {'version': 2})
+    assert worker_a.get('key') == {'version': 1}
+
+    now = time.time()
+    monkeypatch.setattr(response_cache, 'time', SimpleNamespace(time=lambda: now + 6))
+
+    assert worker_a.get('key') == {'version': 2}
+
+
+def test_make_key_ignores_order_case_spacing_and_duplicates():
+    key = ResponseCache.make_key('courses', 'model', 'v1', learning_prefs=['Python', 'Data Science'], level='Beginner')
+
+    assert ResponseCache.make_key(
+        'courses', 'model', 'v1', level='  beginner ', learning_prefs=['data   science', 'PYTHON', 'python']
+    ) == key
+    assert ResponseCache.make_key('courses', 'model', 'v1', learning_prefs=['Python'], level='Beginner') != key
+    assert ResponseCache.make_key('courses', 'model', 'v2', learning_prefs=['Python', 'Data Science'],
+                                  level='Beginner') != key
+    assert ResponseCache.make_key('certificates', 'model', 'v1', learning_prefs=['Python', 'Data Science'],
+                                  level='Beginner') != key
+
+
+# (engine method, fetch it coalesces into, arguments, equivalent arguments)
+ENDPOINTS = {
+    'certificates': (
+        'find_certificates_with_ml', '_fetch_certificates',
+        (['Machine Learning', 'Cloud'], ['Data Scientist'], ['Online']),
+        ([' cloud', 'machine learning', 'Cloud'], ['DATA  scientist'], ['online'])
+    ),
+    'courses': (
+        'suggest_courses_with_ml', '_fetch_courses',
+        (['Python', 'Statistics'], ['Bachelor'], ['Data Analyst']),
+        (['statistics ', 'PYTHON'], ['bachelor', 'Bachelor'], [' data analyst'])
+    ),
+    'companies': (
+        'find_companies_with_ml', '_fetch_companies',
+        ('Data Engineer', 'Berlin'),
+        ('  data engineer', 'BERLIN ')
+    ),
+}
+
+
+@pytest.fixture
+def engine(app_module, monkeypatch, tmp_path):
+    """The AI engine with an empty response cache of its own"""
+    engine = app_module.ai_ml_engine
+    monkeypatch.setattr(engine, 'response_cache', ResponseCache(str(tmp_path / 'responses.sqlite3')))
+    return engine
+
+
+def count_calls(monkeypatch, engine, name, replacement=None):
+    calls = []
+    original = replacement or getattr(engine, name)
+
+    def counted(*args):
+        calls.append(args)
+        return original(*args)
+    monkeypatch.setattr(engine, name, counted)
+    return calls
+
+
+@pytest.mark.parametrize('endpoint', sorted(ENDPOINTS))
+def test_equivalent_inputs_share_a_cached_response(engine, monkeypatch, endpoint):
+    method, fetch, arguments, equivalent = ENDPOINTS[endpoint]
+    fetches = count_calls(monkeypatch, engine, fetch)
+
+    first = getattr(engine, method)(*arguments)
+    second = getattr(engine, method)(*equivalent)
+
+    assert len(fetches) == 1
+    assert second == first
+    assert engine.response_cache.stats()['memory_entries'] == 1
+
+
+@pytest.mark.parametrize('endpoint', sorted(ENDPOINTS))
+def test_ml_fallbacks_are_not_cached(engine, monkeypatch, endpoint):
+    method, fetch, arguments, _ = ENDPOINTS[endpoint]
+    working = getattr(engine, fetch)
+
+    def unavailable(*args):
+        raise ConnectionError('Gemini is unavailable')
+    failed = count_calls(monkeypatch, engine, fetch, unavailable)
+
+    fallback = getattr(engine, method)(*arguments)
+
+    assert len(failed) == 1 and fallback
+    assert engine.response_cache.stats()['memory_entries'] == 0
+    # Once Gemini is back the next request fetches instead of replaying the fallback
+    fetches = count_calls(monkeypatch, engine, fetch, working)
+    getattr(engine, method)(*arguments)
+    assert len(fetches) == 1
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from retrieval_index import ExactBlockIndex, InvertedIndex, build_retrieval_index
+
+
+def random_matrix(rng, rows, columns, density):
+    matrix = sparse.random(rows, columns, density=density, format='csr', dtype=np.float32, random_state=rng)
+    return normalize(matrix).astype(np.float32)
+
+
+def assert_matches_brute_force(matrix, query, k, items, scores):
+    """items/scores must be a top k of the exact scores (ties may be broken either way)"""
+    exact = (matrix @ query.T).toarray().ravel()
+    k = min(k, matrix.shape[0])
+    assert len(items) == k
+    assert len(set(items.tolist())) == k
+    np.testing.assert_allclose(scores, exact[items], rtol=1e-5, atol=1e-6)
+    assert np.all(np.diff(scores) <= 1e-6), 'scores are not best first'
+    np.testing.assert_allclose(scores, np.sort(exact)[::-1][:k], rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('make_index', [
+    lambda matrix: ExactBlockIndex(matrix, block_size=37),
+    lambda matrix: InvertedIndex(matrix),
+    lambda matrix: InvertedIndex(matrix, dense_batch_items=0),
+], ids=['exact-blocks', 'inverted-dense-batch', 'inverted-maxscore'])
+def test_search_batch_matches_brute_force(seed, make_index):
+    rng = np.random.default_rng(seed)
+    matrix = random_matrix(rng, rows=int(rng.integers(50, 400)), columns=120, density=0.05)
+    queries = random_matrix(rng, rows=20, columns=120, density=0.08)
+    index = make_index(matrix)
+
+    for k in (1, 5, 25):
+        for query, (items, scores) in zip(queries, index.search_batch(queries, k)):
+            assert_matches_brute_force(matrix, query, k, items, scores)
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('kind', ['exact', 'inverted'])
+def test_search_matches_brute_force(seed, kind):
+    rng = np.random.default_rng(100 + seed)
+    matrix = random_matrix(rng, rows=300, columns=80, density=0.1)
+    index = build_retrieval_index(matrix, kind)
+
+    for query in random_matrix(rng, rows=10, columns=80, density=0.15):
+        items, scores = index.search(query, 10)
+        assert_matches_brute_force(matrix, query, 10, items, scores)
+
+
+@pytest.mark.parametrize('kind', ['exact', 'inverted'])
+def test_k_larger_than_matches_pads_with_zero_scores(kind):
+    matrix = sparse.csr_matrix(np.eye(6, dtype=np.float32))
+    query = sparse.csr_matrix(np.array([[0, 0, 1, 0, 0, 0]], dtype=np.float32))
+
+    items, scores = build_retrieval_index(matrix, kind).search(query, 10)
+
+    assert items[0] == 2 and scores[0] == pytest.approx(1.0)
+    assert sorted(items.tolist()) == list(range(6))
+    assert np.all(scores[1:] == 0)
+
+
+def test_unknown_index_kind():
+    with pytest.raises(ValueError):
+        build_retrieval_index(sparse.csr_matrix((3, 3), dtype=np.float32), 'annoy')
+
+
+def skewed_matrix(rng, rows, columns, terms_per_row):
+    """Zipf-distributed terms, so the common ones have long postings lists"""
+    cols = (rng.zipf(1.3, size=rows * terms_per_row) - 1) % columns
+    matrix = sparse.csr_matrix(
+        (rng.random(len(cols)).astype(np.float32) + 0.1, (np.repeat(np.arange(rows), terms_per_row), cols)),
+        shape=(rows, columns)
+    )
+    matrix.sum_duplicates()
+    return normalize(matrix).astype(np.float32)
+
+
+def test_impact_layers_are_sorted_by_item_and_bounded():
+    rng = np.random.default_rng(7)
+    matrix = skewed_matrix(rng, rows=3000, columns=200, terms_per_row=8)
+    index = InvertedIndex(matrix, layer_postings=16, layer_ratio=2)
+
+    assert len(index.layer_bounds) - 1 > np.count_nonzero(np.diff(index.indptr))
+    for term in range(matrix.shape[1]):
+        layers = range(index.term_layers[term], index.term_layers[term + 1])
+        for layer in layers:
+            rows, weights = index._layer(layer)
+            assert np.all(np.diff(rows) > 0)
+            assert index.layer_max[layer] == weights.max()
+        assert np.all(np.diff(index.layer_max[list(layers)]) <= 0)
+        # Layers only reorder a term's postings
+        column = matrix[:, term].toarray().ravel()
+        start, end = index.indptr[term], index.indptr[term + 1]
+        np.testing.assert_array_equal(np.sort(index.rows[start:end]), np.flatnonzero(column))
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('query_terms', [3, 12, 40])
+def test_pruned_search_over_impact_layers_matches_brute_force(seed, query_terms):
+    rng = np.random.default_rng(200 + seed)
+    matrix = skewed_matrix(rng, rows=5000, columns=300, terms_per_row=10)
+    index = InvertedIndex(matrix, layer_postings=8, layer_ratio=2)
+
+    for _ in range(10):
+        terms = np.unique((rng.zipf(1.3, size=query_terms) - 1) % 300)
+        query = normalize(sparse.csr_matrix(
+            (rng.random(len(terms)).astype(np.float32) + 0.1, (np.zeros(len(terms), dtype=int), terms)),
+            shape=(1, 300)
+        ))
+        for k in (1, 10, 50):
+            items, scores = index.search(query, k)
+            assert_matches_brute_force(matrix, query, k, items, scores)
@@ -0,0 +1,64 @@
+import pytest
+
+COURSE = {'title': 'Machine Learning', 'provider': 'Coursera'}
+JOB = {'name': 'Data Scientist', 'industry': 'Tech'}
+
+
+def save(client, item_type, data):
+    response = client.post('/api/save-item', json={'type': item_type, 'data': data})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['item_id']
+
+
+@pytest.mark.parametrize('types, expected', [
+    ('course,,course,', ['courses']),
+    (' job , course,job', ['jobs', 'courses']),
+    (',', ['certificates', 'courses', 'jobs']),
+])
+def test_types_are_deduplicated_in_order(client, types, expected):
+    save(client, 'course', COURSE)
+    save(client, 'job', JOB)
+
+    response = client.get(f'/api/saved-items?types={types}')
+
+    assert response.status_code == 200
+    assert list(response.get_json()['items']) == expected
+
+
+def test_unknown_type_is_400(client):
+    assert client.get('/api/saved-items?types=course,podcast').status_code == 400
+
+
+def test_etag_answers_304_until_something_changes(client):
+    save(client, 'course', COURSE)
+    first = client.get('/api/saved-items')
+    etag = first.headers['ETag']
+
+    assert client.get('/api/saved-items', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/saved-items?types=course,course', headers={'If-None-Match': etag}).status_code == 200
+
+    save(client, 'job', JOB)
+    assert client.get('/api/saved-items', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_since_returns_the_delta_with_deletions(client):
+    course_id = save(client, 'course', COURSE)
+    since = client.get('/api/saved-items').get_json()['version']
+    job_id = save(client, 'job', JOB)
+    client.post('/api/delete-saved-item', json={'type': 'course', 'id': course_id})
+
+    body = client.get(f'/api/saved-items?since={since}').get_json()
+
+    assert body['since'] == since
+    assert [item['id'] for item in body['items']['jobs']] == [job_id]
+    assert body['items']['courses'] == []
+    assert body['deleted']['courses'] == [course_id]
+
+
+def test_since_ahead_of_the_server_returns_everything(client):
+    course_id = save(client, 'course', COURSE)
+
+    body = client.get('/api/saved-items?since=999').get_json()
+
+    assert body['since'] is None
+    assert [item['id'] for item in body['items']['courses']] == [course_id]
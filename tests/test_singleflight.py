@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+CALLERS = 8
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out waiting for the callers'
+        time.sleep(0.001)
+
+
+class GatedCall:
+    """A function that blocks until released, counting its executions"""
+
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.release = threading.Event()
+        self.executions = 0
+
+    def __call__(self):
+        self.executions += 1
+        assert self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def run_callers(flight, key, fn, count=CALLERS):
+    """Start count threads that call flight.do(key, fn) together; returns (threads, outcomes)"""
+    barrier = threading.Barrier(count)
+    outcomes = [None] * count
+
+    def caller(index):
+        barrier.wait()
+        try:
+            outcomes[index] = ('result', flight.do(key, fn))
+        except Exception as e:
+            outcomes[index] = ('error', e)
+
+    threads = [threading.Thread(target=caller, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    call = GatedCall(result={'courses': ['a', 'b']})
+
+    threads, outcomes = run_callers(flight, 'courses:python', call)
+    wait_for(lambda: flight.stats()['coalesced'] == CALLERS - 1)
+    assert flight.stats()['in_flight'] == 1
+    call.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert call.executions == 1
+    assert all(kind == 'result' and value is call.result for kind, value in outcomes)
+    stats = flight.stats()
+    assert stats['calls'] == CALLERS and stats['executions'] == 1 and stats['in_flight'] == 0
+    assert stats['coalesced_ratio'] == pytest.approx((CALLERS - 1) / CALLERS, abs=1e-3)
+    assert 1 <= stats['max_waiters'] <= CALLERS - 1
+
+
+def test_waiters_receive_the_leaders_exception():
+    flight = SingleFlight()
+    error = TimeoutError('Gemini took too long')
+    call = GatedCall(error=error)
+
+    threads, outcomes = run_callers(flight, 'companies:data', call)
+    wait_for(lambda: flight.stats()['coalesced'] == CALLERS - 1)
+    call.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert call.executions == 1
+    assert all(kind == 'error' and value is error for kind, value in outcomes)
+    assert flight.stats()['errors'] == 1
+    # The failure is not remembered: the next caller runs the function again
+    assert flight.do('companies:data', lambda: 'recovered') == 'recovered'
+
+
+def test_in_flight_counts_running_keys_only():
+    flight = SingleFlight()
+    first, second = GatedCall(result=1), GatedCall(result=2)
+
+    threads = run_callers(flight, 'first', first, count=2)[0] + run_callers(flight, 'second', second, count=1)[0]
+    wait_for(lambda: flight.stats()['calls'] == 3 and first.executions and second.executions)
+    assert flight.stats()['in_flight'] == 2
+
+    first.release.set()
+    threads[0].join(5)
+    threads[1].join(5)
+    assert flight.stats()['in_flight'] == 1
+
+    second.release.set()
+    threads[2].join(5)
+    stats = flight.stats()
+    assert stats['in_flight'] == 0
+    assert stats['executions'] == 2 and stats['coalesced'] == 1
@@ -0,0 +1,49 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import startup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imports app.py with the engine warm-up unable to start, so only what app.py itself
+# imports is loaded; prints the modules that appeared
+IMPORT_APP = '''
+import json, sys
+before = set(sys.modules)
+sys.modules['ml_models_fixed'] = None
+import app
+app.WARM_UP_THREAD.join()
+print(json.dumps(sorted(set(sys.modules) - before)))
+'''
+
+
+def test_import_app_leaves_the_heavy_modules_to_the_warm_up():
+    env = dict(os.environ, CAREERCOMPASS_LOG_LEVEL='CRITICAL')
+    child = subprocess.run(
+        [sys.executable, '-c', IMPORT_APP], cwd=ROOT, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert child.returncode == 0, child.stderr
+
+    loaded = json.loads(child.stdout.strip().splitlines()[-1])
+
+    assert 'app' in loaded
+    heavy = [
+        name for name in loaded
+        if name.split('.')[0] in ('pandas', 'sklearn', 'tensorflow', 'grpc') or name.startswith('google.')
+    ]
+    assert heavy == []
+
+
+def test_import_times_sums_self_time_per_package():
+    lines = [
+        'import time: self [us] | cumulative | imported package',
+        'import time:       100 |        100 |   numpy.core',
+        'import time:       250 |        350 | numpy',
+        'import time:        40 |         40 | json'
+    ]
+
+    assert startup.import_times(lines) == pytest.approx({'numpy': 0.00035, 'json': 0.00004})
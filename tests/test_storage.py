@@ -0,0 +1,113 @@
+import json
+
+import pytest
+from flask import Flask
+
+import storage
+
+
+@pytest.fixture
+def store(tmp_path):
+    """An app context bound to a fresh SQLite database"""
+    app = Flask(__name__)
+    storage.init_app(app, 'sqlite:///' + str(tmp_path / 'store.sqlite3'))
+    with app.app_context():
+        yield storage
+
+
+COURSE = {'title': 'Machine Learning', 'provider': 'Coursera', 'duration': '40 hours'}
+
+
+def test_user_fields_and_extra_fields_round_trip(store):
+    store.save_user('a@example.com', {'name': 'Ada', 'skills': 'Python', 'experience_years': 3})
+    store.save_user('a@example.com', {'skills': 'Python, SQL'})
+
+    user = store.get_user('a@example.com')
+
+    assert user['name'] == 'Ada'
+    assert user['skills'] == 'Python, SQL'
+    assert user['experience_years'] == 3
+    assert store.get_user('nobody@example.com') == {}
+
+
+def test_saving_the_same_item_again_is_rejected(store):
+    first = store.save_item('a@example.com', 'course', COURSE)
+    again = store.save_item('a@example.com', 'course', dict(COURSE, duration='12 hours'))
+
+    assert first is not None
+    assert again is None
+    assert [item['id'] for item in store.get_saved_items('a@example.com')['courses']] == [first]
+
+
+def test_duplicates_are_per_user_and_per_duplicate_fields(store):
+    assert store.save_item('a@example.com', 'course', COURSE)
+    assert store.save_item('b@example.com', 'course', COURSE)
+    assert store.save_item('a@example.com', 'course', dict(COURSE, provider='edX'))
+    assert store.save_item('a@example.com', 'certificate', {'name': 'Machine Learning', 'provider': 'Coursera'})
+
+
+def test_batch_save_skips_duplicates_inside_the_batch(store):
+    ids = store.save_items('a@example.com', 'job', [
+        {'name': 'Data Scientist', 'industry': 'Tech'},
+        {'name': 'Data Scientist', 'industry': 'Tech'},
+        {'name': 'Data Scientist', 'industry': 'Finance'}
+    ])
+
+    assert ids[0] is not None and ids[1] is None and ids[2] is not None
+    assert len(store.get_saved_items('a@example.com')['jobs']) == 2
+
+
+def test_only_changes_bump_the_version(store):
+    assert store.get_saved_items_version('a@example.com') == 0
+    store.save_item('a@example.com', 'course', COURSE)
+    store.save_item('a@example.com', 'course', COURSE)
+
+    assert store.get_saved_items_version('a@example.com') == 1
+    assert store.delete_item('a@example.com', 'course', 'no-such-id') is False
+    assert store.get_saved_items_version('a@example.com') == 1
+
+
+def test_unknown_item_type(store):
+    with pytest.raises(ValueError):
+        store.save_item('a@example.com', 'podcast', {'name': 'x'})
+
+
+def test_export_since_returns_only_newer_items_and_tombstones(store):
+    first = store.save_item('a@example.com', 'course', COURSE)
+    job = store.save_item('a@example.com', 'job', {'name': 'Data Scientist', 'industry': 'Tech'})
+    since = store.get_saved_items_version('a@example.com')
+    second = store.save_item('a@example.com', 'course', dict(COURSE, title='Deep Learning'))
+    assert store.delete_item('a@example.com', 'course', first)
+
+    version, items, deleted = store.export_saved_items('a@example.com', since=since)
+
+    assert version == since + 2
+    assert [json.loads(item)['id'] for item in items['course']] == [second]
+    assert items['job'] == [] and items['certificate'] == []
+    assert deleted == {'certificate': [], 'course': [first], 'job': []}
+
+    _, everything, nothing_deleted = store.export_saved_items('a@example.com')
+    assert [json.loads(item)['id'] for item in everything['course']] == [second]
+    assert [json.loads(item)['id'] for item in everything['job']] == [job]
+    assert nothing_deleted == {'certificate': [], 'course': [], 'job': []}
+
+
+def test_export_is_limited_to_the_requested_types(store):
+    store.save_item('a@example.com', 'course', COURSE)
+    store.save_item('a@example.com', 'job', {'name': 'Data Scientist', 'industry': 'Tech'})
+
+    _, items, deleted = store.export_saved_items('a@example.com', ('job',), since=0)
+
+    assert list(items) == ['job'] and list(deleted) == ['job']
+    assert len(items['job']) == 1
+
+
+def test_export_at_the_current_version_is_empty(store):
+    item_id = store.save_item('a@example.com', 'course', COURSE)
+    store.delete_item('a@example.com', 'course', item_id)
+    version = store.get_saved_items_version('a@example.com')
+
+    _, items, deleted = store.export_saved_items('a@example.com', since=version)
+
+    assert all(not values for values in items.values())
+    assert all(not ids for ids in deleted.values())
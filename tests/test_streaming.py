@@ -0,0 +1,66 @@
+import json
+import time
+import uuid
+
+from flask import has_request_context, request
+
+import metrics
+import structured_logging
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split('\n\n'):
+        event, data = block.split('\n', 1)
+        events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+def test_sse_body_runs_with_the_request_context(app_module):
+    def events():
+        yield 'context', {
+            'request_id': structured_logging.get_request_id(),
+            'has_request': has_request_context(),
+            'path': request.path if has_request_context() else None,
+            'timings': metrics.request_timings() is not None
+        }
+
+    with app_module.app.test_request_context('/api/find-certificates/stream'):
+        request_id_token = structured_logging.set_request_id('req-stream-1')
+        timing_token = metrics.start_request()
+        response = app_module.sse_response(events())
+        # What the request teardown does before the WSGI server reads the body
+        metrics.end_request(timing_token)
+        structured_logging.reset_request_id(request_id_token)
+
+    body = ''.join(response.response)
+
+    assert parse_events(body) == [('context', {
+        'request_id': 'req-stream-1', 'has_request': True, 'path': '/api/find-certificates/stream', 'timings': True
+    })]
+
+
+def test_stream_deadline_counts_from_request_entry(app_module):
+    engine = app_module.ai_ml_engine
+    before = engine.resilience_stats()['deadline_fallbacks']
+    interests = [f'Topic {uuid.uuid4().hex}']
+
+    # A request that arrived longer ago than the certificates budget has no time left for Gemini
+    started_at = time.perf_counter() - app_module.GEMINI_DEADLINES['certificates'] - 1
+    events = list(engine.stream_certificates_with_ml(interests, ['Data Scientist'], 'Any', started_at=started_at))
+
+    assert [event for event, _ in events] == ['ml_results', 'error']
+    assert engine.resilience_stats()['deadline_fallbacks'] == before + 1
+
+
+def test_stream_route_logs_and_finishes(client):
+    response = client.post('/api/find-certificates/stream', json={
+        'interests': [f'Topic {uuid.uuid4().hex}'], 'goals': ['Data Scientist']
+    }, headers={'X-Request-ID': 'req-stream-2'})
+
+    events = parse_events(response.get_data(as_text=True))
+
+    assert response.status_code == 200
+    assert response.headers['X-Request-ID'] == 'req-stream-2'
+    assert events[0][0] == 'ml_results'
+    assert events[-1][0] in ('done', 'error')